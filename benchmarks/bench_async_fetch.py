@@ -0,0 +1,66 @@
+"""
+Benchmark of AsyncFetcher and AsyncCountWordsFromUrl against a local asyncio.start_server stub.
+
+Usage:
+    python benchmarks/bench_async_fetch.py
+    python benchmarks/bench_async_fetch.py --concurrency 100 1000 5000 --page-kb 16
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main_version"))
+
+from tools.async_tools import AsyncFetcher, AsyncCountWordsFromUrl  # noqa: E402
+from html_fixtures import generate_html  # noqa: E402
+
+
+async def start_stub_server(page: bytes):
+    """
+    Starts a server answering every request with the same page.
+
+    :return(tuple): (server, base URL)
+    """
+    response = b"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\nContent-Length: %d\r\n\r\n%s" % (len(page), page)
+
+    async def handle(reader, writer):
+        while await reader.readline() not in (b"\r\n", b""):
+            pass
+        writer.write(response)
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0, backlog=8192)
+    return server, f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/"
+
+
+async def run_benchmark(concurrency_levels: list, page_kb: int):
+    page = generate_html(page_kb * 1024).encode()
+    server, url = await start_stub_server(page)
+    async with server:
+        print(f"{'concurrency':>11} {'fetch s':>8} {'fetch req/s':>12} {'analyze s':>10} {'analyze req/s':>14}")
+        for concurrency in concurrency_levels:
+            fetcher = AsyncFetcher(max_concurrency=concurrency)
+            start = time.perf_counter()
+            responses = await fetcher.fetch_many([url] * concurrency)
+            fetch_time = time.perf_counter() - start
+            assert all(response.data == page for response in responses)
+            start = time.perf_counter()
+            await AsyncCountWordsFromUrl.create_many([url] * concurrency, "result.txt", fetcher)
+            analyze_time = time.perf_counter() - start
+            print(f"{concurrency:>11} {fetch_time:>8.2f} {concurrency / fetch_time:>12.0f} "
+                  f"{analyze_time:>10.2f} {concurrency / analyze_time:>14.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Async fetcher benchmark.")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--page-kb', type=int, default=16)
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args.concurrency, args.page_kb))
+
+
+if __name__ == '__main__':
+    main()
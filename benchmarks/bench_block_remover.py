@@ -0,0 +1,80 @@
+"""
+Scaling benchmark of block removal (comments, scripts, styles) on documents from 1 MB to 100 MB.
+
+Compares BlockRemover, which strips all delimiter pairs in a single scan, with the random sentinel
+split used by inside_content_cleaner before, applied once per delimiter pair.
+
+Usage:
+    python benchmarks/bench_block_remover.py
+    python benchmarks/bench_block_remover.py --legacy-max-mb 10 --max-mb 10
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main_version"))
+
+from tools.block_remover import BlockRemover  # noqa: E402
+from html_fixtures import generate_html  # noqa: E402
+
+SIZES_MB = [1, 5, 10, 50, 100]
+LEGACY_PAIRS = [('<!--', '-->'), ('<script>', '</script>'), ('<script', '</script>'), ('<style', '</style>')]
+
+
+def legacy_inside_content_cleaner(input_string: str, left_d: str, right_d: str):
+    """
+    Implementation of inside_content_cleaner used before BlockRemover.
+    """
+    result_content = []
+    punctuation_marks = '!"#$%&\'()*+,-./:;<=>?@[\\]^_`{|}~'
+    while True:
+        random_tag = ''.join([random.choice(punctuation_marks) for _ in range(5)])
+        if random_tag not in input_string:
+            break
+    buff_string = input_string.replace(left_d, random_tag + left_d)
+    buff_string = buff_string.replace(right_d, right_d + random_tag)
+    buff_str_list = buff_string.split(random_tag)
+    for buff_str in buff_str_list:
+        if len(buff_str) != 0:
+            if buff_str.find(left_d) == 0 and buff_str.rfind(right_d) == len(buff_str) - len(right_d):
+                result_content.append("<null>")
+            else:
+                result_content.append(buff_str)
+    result_string = "".join(result_content)
+    return result_string.replace('<null>', '')
+
+
+def legacy_remove_blocks(text: str):
+    for left_d, right_d in LEGACY_PAIRS:
+        text = legacy_inside_content_cleaner(text, left_d, right_d)
+    return text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Block removal scaling benchmark.")
+    parser.add_argument('--legacy-max-mb', type=int, default=10,
+                        help="Largest input (MB) measured with the legacy sentinel split.")
+    parser.add_argument('--max-mb', type=int, default=100, help="Largest measured input (MB).")
+    args = parser.parse_args()
+
+    block_remover = BlockRemover([('<!--', '-->'), ('<script', '</script>'), ('<style', '</style>')])
+    print(f"{'size':>8} {'remover s':>10} {'MB/s':>8} {'s/MB':>8} {'legacy s':>10}")
+    for size_mb in SIZES_MB:
+        if size_mb > args.max_mb:
+            break
+        text = generate_html(size_mb * 2 ** 20)
+        start = time.perf_counter()
+        block_remover.remove(text)
+        elapsed = time.perf_counter() - start
+        legacy_elapsed = "-"
+        if size_mb <= args.legacy_max_mb:
+            start = time.perf_counter()
+            legacy_remove_blocks(text)
+            legacy_elapsed = f"{time.perf_counter() - start:.4f}"
+        print(f"{size_mb:>6}MB {elapsed:>10.4f} {size_mb / elapsed:>8.1f} {elapsed / size_mb:>8.4f} {legacy_elapsed:>10}")
+
+
+if __name__ == '__main__':
+    main()
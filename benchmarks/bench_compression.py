@@ -0,0 +1,134 @@
+"""
+Benchmark of compressed transfers against a local server serving compressed fixtures.
+
+The server serves --pages generated pages of --page-size bytes, encoded with --charset. A page is sent
+compressed with the best content encoding the client accepts (br, zstd, gzip or deflate, if the server side
+has the module) unless compression is disabled for the run. --bandwidth simulates a slower link by pacing the
+writes of the server. Every run fetches all pages with BatchWordCounter, once without and once with
+compression, and reports the bytes on the wire, the wall time and whether both runs counted the same words.
+
+Usage:
+    python benchmarks/bench_compression.py
+    python benchmarks/bench_compression.py --bandwidth 10 --pages 200
+    python benchmarks/bench_compression.py --stream --charset cp1250
+"""
+import argparse
+import gzip
+import os
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main_version"))
+
+from tools.batch import BatchWordCounter  # noqa: E402
+from html_fixtures import generate_html  # noqa: E402
+
+COMPRESSORS = {'gzip': gzip.compress, 'deflate': zlib.compress}
+try:
+    import brotli
+    COMPRESSORS['br'] = brotli.compress
+except ImportError:
+    pass
+try:
+    import zstandard
+    COMPRESSORS['zstd'] = zstandard.ZstdCompressor().compress
+except ImportError:
+    pass
+PREFERRED_ENCODINGS = ('br', 'zstd', 'gzip', 'deflate')
+
+
+class CompressedFixtureHandler(BaseHTTPRequestHandler):
+    """
+    Serves /page/<n> with the best accepted content encoding, counts the body bytes sent.
+    """
+
+    protocol_version = "HTTP/1.1"
+    pages = {}
+    charset = 'utf-8'
+    compress = True
+    bandwidth = 0
+    sent_bytes = 0
+    sent_lock = threading.Lock()
+
+    def do_GET(self):
+        bodies = self.pages[self.path]
+        accepted = {value.strip().split(';')[0] for value in self.headers.get('Accept-Encoding', '').split(',')}
+        encoding = next((encoding for encoding in PREFERRED_ENCODINGS if encoding in accepted and encoding in bodies),
+                        None) if self.compress else None
+        body = bodies[encoding or 'identity']
+        self.send_response(200)
+        self.send_header("Content-Type", f"text/html; charset={self.charset}")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        for start in range(0, len(body), 16384):
+            part = body[start:start + 16384]
+            if self.bandwidth:
+                time.sleep(len(part) / self.bandwidth)
+            self.wfile.write(part)
+        with self.sent_lock:
+            type(self).sent_bytes += len(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run(urls: list, compress: bool, args):
+    CompressedFixtureHandler.compress = compress
+    CompressedFixtureHandler.sent_bytes = 0
+    with tempfile.TemporaryDirectory() as directory:
+        counter = BatchWordCounter(os.path.join(directory, "result.txt"), max_workers=args.workers,
+                                   max_connections_per_host=args.workers, stream=args.stream)
+        start = time.perf_counter()
+        failed = sum(result.error is not None for result in counter.iter_results(urls))
+        elapsed = time.perf_counter() - start
+    return elapsed, CompressedFixtureHandler.sent_bytes, failed, dict(counter.total_counter.counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compressed transfer benchmark.")
+    parser.add_argument('--pages', type=int, default=100, help="Number of fixture pages.")
+    parser.add_argument('--page-size', type=int, default=256 * 2 ** 10, help="Size of a page in bytes.")
+    parser.add_argument('--charset', default='utf-8', help="Charset the pages are encoded with.")
+    parser.add_argument('--bandwidth', type=float, default=0,
+                        help="Simulated bandwidth of a connection in MB/s, 0 - unlimited.")
+    parser.add_argument('--workers', type=int, default=8, help="Number of pages fetched at the same time.")
+    parser.add_argument('--stream', action='store_true', help="Count the pages in stream mode.")
+    args = parser.parse_args()
+
+    for number in range(args.pages):
+        page = generate_html(args.page_size, seed=number).encode(args.charset, errors='xmlcharrefreplace')
+        bodies = {'identity': page}
+        bodies.update((encoding, compress(page)) for encoding, compress in COMPRESSORS.items())
+        CompressedFixtureHandler.pages[f"/page/{number}"] = bodies
+    CompressedFixtureHandler.charset = args.charset
+    CompressedFixtureHandler.bandwidth = args.bandwidth * 2 ** 20
+    site = ThreadingHTTPServer(("127.0.0.1", 0), CompressedFixtureHandler)
+    site.daemon_threads = True
+    threading.Thread(target=site.serve_forever, daemon=True).start()
+    urls = [f"http://127.0.0.1:{site.server_address[1]}/page/{number}" for number in range(args.pages)]
+    try:
+        plain_time, plain_bytes, plain_failed, plain_counts = run(urls, False, args)
+        compressed_time, compressed_bytes, compressed_failed, compressed_counts = run(urls, True, args)
+    finally:
+        site.shutdown()
+        site.server_close()
+
+    encoding = next(encoding for encoding in PREFERRED_ENCODINGS if encoding in COMPRESSORS)
+    bandwidth = f"{args.bandwidth:g} MB/s per connection" if args.bandwidth else "unlimited bandwidth"
+    print(f"{args.pages} pages of {args.page_size // 1024} KB in {args.charset}, {bandwidth}, "
+          f"{'stream' if args.stream else 'whole page'} mode, {args.workers} workers")
+    print(f"identity: {plain_bytes / 2 ** 20:8.2f} MB on the wire, {plain_time:7.2f} s, {plain_failed} failed")
+    print(f"{encoding:>8}: {compressed_bytes / 2 ** 20:8.2f} MB on the wire, {compressed_time:7.2f} s, "
+          f"{compressed_failed} failed")
+    print(f"transfer: {100 * (1 - compressed_bytes / plain_bytes):.1f}% smaller, "
+          f"wall time: {plain_time / compressed_time:.2f}x, same counts: {plain_counts == compressed_counts}")
+
+
+if __name__ == '__main__':
+    main()
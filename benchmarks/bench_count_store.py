@@ -0,0 +1,81 @@
+"""
+Benchmark of incremental updates and queries of a CountStore.
+
+A store with many documents is built and compacted, then the time of adding one more document, of a
+top-N query on a freshly opened store, of a query after the new document and of opening the store is measured.
+The top-N result is compared with recounting all documents from scratch.
+
+Usage:
+    python benchmarks/bench_count_store.py
+    python benchmarks/bench_count_store.py --documents 100000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main_version"))
+
+from tools.count_store import CountStore  # noqa: E402
+from tools.word_counter import WordCounter  # noqa: E402
+
+
+def generate_documents(documents_count: int, words_per_document: int = 200, vocabulary_size: int = 200000,
+                       seed: int = 0):
+    """
+    Generates frequency tables of documents with a Zipf-like word distribution.
+
+    :return(generator): Yields (URL, dictionary of word counts) tuples.
+    """
+    rng = random.Random(seed)
+    vocabulary = [f"word{index}" for index in range(vocabulary_size)]
+    for index in range(documents_count):
+        counts = {}
+        for _ in range(words_per_document):
+            word = vocabulary[min(int(rng.paretovariate(1.1)) - 1, vocabulary_size - 1)]
+            counts[word] = counts.get(word, 0) + 1
+        yield f"https://example.com/page/{index}", counts
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count store benchmark.")
+    parser.add_argument('--documents', type=int, default=100000, help="Number of documents in the store.")
+    parser.add_argument('--top', type=int, default=10, help="Number of top words queried.")
+    args = parser.parse_args()
+
+    documents = list(generate_documents(args.documents + 1))
+    with tempfile.TemporaryDirectory() as directory:
+        store = CountStore(directory)
+        start = time.perf_counter()
+        for url, counts in documents[:-1]:
+            store.add_document(url, counts)
+        store.compact()
+        print(f"built store of {args.documents} documents in {time.perf_counter() - start:.2f} s")
+
+        store, open_seconds = timed(CountStore, directory)
+        _, query_seconds = timed(store.most_common, args.top)
+        added, add_seconds = timed(store.add_document, *documents[-1])
+        top_words, tail_query_seconds = timed(store.most_common, args.top)
+
+        recount = WordCounter()
+        _, recount_seconds = timed(lambda: [recount.merge(WordCounter.from_counts(dict(counts)))
+                                            for _, counts in documents])
+        if not added or top_words != recount.most_common(args.top):
+            sys.exit("Store results differ from recounting")
+        print(f"open store:                      {open_seconds * 1000:>9.1f} ms")
+        print(f"top {args.top} query:                    {query_seconds * 1000:>9.1f} ms")
+        print(f"add one document:                {add_seconds * 1000:>9.1f} ms")
+        print(f"top {args.top} query after the add:      {tail_query_seconds * 1000:>9.1f} ms")
+        print(f"recount all documents in memory: {recount_seconds * 1000:>9.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
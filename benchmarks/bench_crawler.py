@@ -0,0 +1,106 @@
+"""
+Benchmark of the site crawler against a local fixture site.
+
+The fixture site has --pages generated pages, every page links to --links other pages (many links
+point to already seen pages), to itself with a fragment, to another site and to an image, so
+deduplication and same-site filtering are exercised. Pages are generated on request and not kept in memory.
+The crawl runs in this process, pages per second, fetched megabytes and the peak of memory allocated
+by the crawl (tracemalloc, the fixture server is included) are reported.
+
+Usage:
+    python benchmarks/bench_crawler.py
+    python benchmarks/bench_crawler.py --pages 10000 --page-size 16384 --workers 32
+    python benchmarks/bench_crawler.py --no-memory
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main_version"))
+
+from tools.crawler import SiteCrawler  # noqa: E402
+from html_fixtures import generate_html  # noqa: E402
+
+_PAGE_LINK = re.compile(r'/page/(\d+)')
+
+
+class FixtureSiteHandler(BaseHTTPRequestHandler):
+    """
+    Serves /page/<n>, pages link to pseudo-random other pages of the site. The links of the generated
+    paragraphs are mapped to the pages of the site.
+    """
+
+    protocol_version = "HTTP/1.1"
+    page_count = 5000
+    page_size = 8 * 2 ** 10
+    link_count = 8
+
+    def do_GET(self):
+        number = int(self.path.rsplit('/', 1)[-1]) if self.path.startswith('/page/') else 0
+        links = [f'<a href="/page/{(number * 31 + step * 977) % self.page_count}">link {step}</a>'
+                 for step in range(1, self.link_count + 1)]
+        links += [f'<a href="/page/{number}#top">top</a>', '<a href="https://other.example.com/">out</a>',
+                  '<a href="/static/logo.png">logo</a>']
+        page = _PAGE_LINK.sub(lambda match: f"/page/{int(match.group(1)) % self.page_count}",
+                              generate_html(self.page_size, seed=number))
+        body = page.replace('</body>', ''.join(links) + '</body>').encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Site crawler benchmark.")
+    parser.add_argument('--pages', type=int, default=5000, help="Number of pages of the fixture site.")
+    parser.add_argument('--page-size', type=int, default=8 * 2 ** 10, help="Size of a page in bytes.")
+    parser.add_argument('--links', type=int, default=8, help="Number of links to other pages per page.")
+    parser.add_argument('--workers', type=int, default=16, help="Number of pages fetched at the same time.")
+    parser.add_argument('--max-depth', type=int, default=100, help="Maximum crawl depth.")
+    parser.add_argument('--no-memory', action='store_true', help="Do not measure the memory peak.")
+    args = parser.parse_args()
+
+    FixtureSiteHandler.page_count = args.pages
+    FixtureSiteHandler.page_size = args.page_size
+    FixtureSiteHandler.link_count = args.links
+    site = ThreadingHTTPServer(("127.0.0.1", 0), FixtureSiteHandler)
+    site.daemon_threads = True
+    threading.Thread(target=site.serve_forever, daemon=True).start()
+    start_url = f"http://127.0.0.1:{site.server_address[1]}/page/0"
+    with tempfile.TemporaryDirectory() as directory:
+        crawler = SiteCrawler(os.path.join(directory, "result.txt"), max_workers=args.workers,
+                              max_connections_per_host=args.workers, max_depth=args.max_depth,
+                              max_pages=args.pages * 2, max_bytes=2 ** 40)
+        if not args.no_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        for _ in crawler.iter_results([start_url]):
+            pass
+        elapsed = time.perf_counter() - start
+        peak_bytes = tracemalloc.get_traced_memory()[1] if not args.no_memory else None
+        tracemalloc.stop()
+    site.shutdown()
+    site.server_close()
+
+    print(f"crawled {crawler.analyzed_count} pages ({crawler.failed_count} failed) of {args.pages} "
+          f"in {elapsed:.2f} s: {crawler.analyzed_count / elapsed:.1f} pages/s, "
+          f"{crawler.fetched_bytes / 2 ** 20 / elapsed:.2f} MB/s")
+    print(f"vocabulary: {len(crawler.total_counter.counts)} words, visited filter: "
+          f"{len(crawler.visited.bits) / 1024:.0f} KB for {len(crawler.visited)} URLs, "
+          f"{crawler.dropped_count} links dropped by the full frontier")
+    if peak_bytes is not None:
+        print(f"peak memory allocated during the crawl: {peak_bytes / 2 ** 20:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
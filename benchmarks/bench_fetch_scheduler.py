@@ -0,0 +1,130 @@
+"""
+Benchmark of tail latency and failures of fetching from a local server with injected delays and failures.
+
+Every request to the server takes --latency seconds, --slow-fraction of the requests take --slow-latency seconds
+instead and --failure-fraction of them are answered with 503. The same --requests requests are sent by --workers
+threads through a plain urllib3.PoolManager, through FetchScheduler with retries and through FetchScheduler
+with retries and hedged requests, and the latency percentiles of whole requests, the wall time and the number
+of failed requests (errors and 503 responses left after retries) are reported.
+
+Usage:
+    python benchmarks/bench_fetch_scheduler.py
+    python benchmarks/bench_fetch_scheduler.py --slow-fraction 0.05 --slow-latency 2 --hedge-percentile 90
+"""
+import argparse
+import concurrent.futures
+import math
+import os
+import random
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main_version"))
+
+from tools.fetch_scheduler import FetchScheduler  # noqa: E402
+
+
+class FaultInjectingHandler(BaseHTTPRequestHandler):
+    """
+    Serves a small page after a delay, some responses are slow and some are 503 errors.
+    """
+
+    protocol_version = "HTTP/1.1"
+    latency = 0.01
+    slow_latency = 1.0
+    slow_fraction = 0.02
+    failure_fraction = 0.0
+    random_lock = threading.Lock()
+    rng = random.Random(0)
+    body = b"<html><body><p>" + b"word " * 200 + b"</p></body></html>"
+
+    def do_GET(self):
+        with self.random_lock:
+            slow = self.rng.random() < self.slow_fraction
+            failed = self.rng.random() < self.failure_fraction
+        time.sleep(self.slow_latency if slow else self.latency)
+        body = b"unavailable" if failed else self.body
+        self.send_response(503 if failed else 200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run(http, url: str, args):
+    """
+    Sends all requests, returns the sorted latencies of the requests, the wall time and the number of failures.
+    """
+    import urllib3
+    FaultInjectingHandler.rng = random.Random(args.seed)
+
+    def fetch(number):
+        start = time.perf_counter()
+        try:
+            failed = http.request("GET", f"{url}/{number}").status != 200
+        except urllib3.exceptions.HTTPError:
+            failed = True
+        return time.perf_counter() - start, failed
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.workers) as executor:
+        outcomes = list(executor.map(fetch, range(args.requests)))
+    elapsed = time.perf_counter() - start
+    return sorted(latency for latency, _ in outcomes), elapsed, sum(failed for _, failed in outcomes)
+
+
+def percentile(ordered: list, percent: float):
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(percent / 100 * len(ordered)) - 1))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch scheduler benchmark.")
+    parser.add_argument('--requests', type=int, default=1000, help="Number of requests.")
+    parser.add_argument('--workers', type=int, default=16, help="Number of requests sent at the same time.")
+    parser.add_argument('--connections', type=int, default=32, help="Maximum number of connections to the server.")
+    parser.add_argument('--latency', type=float, default=0.01, help="Latency of a response in seconds.")
+    parser.add_argument('--slow-latency', type=float, default=1.0, help="Latency of a slow response in seconds.")
+    parser.add_argument('--slow-fraction', type=float, default=0.02, help="Fraction of slow responses.")
+    parser.add_argument('--failure-fraction', type=float, default=0.02, help="Fraction of 503 responses.")
+    parser.add_argument('--hedge-percentile', type=float, default=95, help="Latency percentile hedged after.")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the injected delays and failures.")
+    args = parser.parse_args()
+
+    import urllib3
+    FaultInjectingHandler.latency = args.latency
+    FaultInjectingHandler.slow_latency = args.slow_latency
+    FaultInjectingHandler.slow_fraction = args.slow_fraction
+    FaultInjectingHandler.failure_fraction = args.failure_fraction
+    site = ThreadingHTTPServer(("127.0.0.1", 0), FaultInjectingHandler)
+    site.daemon_threads = True
+    threading.Thread(target=site.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{site.server_address[1]}/page"
+    clients = [
+        ("PoolManager", urllib3.PoolManager(maxsize=args.connections, block=True)),
+        ("retries", FetchScheduler(args.connections, backoff=0.05)),
+        ("hedged", FetchScheduler(args.connections, backoff=0.05, hedge_percentile=args.hedge_percentile)),
+    ]
+    print(f"{args.requests} requests, {args.workers} workers, {args.slow_fraction:.0%} take {args.slow_latency:g} s, "
+          f"{args.failure_fraction:.0%} fail with 503")
+    print(f"{'client':>12} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8} {'max s':>8} {'wall s':>8} {'failed':>7}")
+    try:
+        for name, http in clients:
+            latencies, elapsed, failed = run(http, url, args)
+            print(f"{name:>12} {percentile(latencies, 50):>8.3f} {percentile(latencies, 95):>8.3f} "
+                  f"{percentile(latencies, 99):>8.3f} {latencies[-1]:>8.3f} {elapsed:>8.2f} {failed:>7}")
+            if isinstance(http, FetchScheduler):
+                host_stats = next(iter(http.stats().values()))
+                print(f"{'':>12} {host_stats['retries']} retries, {host_stats['hedges']} hedges "
+                      f"({host_stats['hedge_wins']} won)")
+    finally:
+        site.shutdown()
+        site.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark of the single-pass HTMLTextExtractor against the chained clean_* methods.
+
+Usage:
+    python benchmarks/bench_html_cleaner.py
+    python benchmarks/bench_html_cleaner.py --sizes-kb 100 1024 10240
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main_version"))
+
+from tools.interview_tools import HTMLContentCleaner  # noqa: E402
+from tools.html_text_extractor import HTMLTextExtractor  # noqa: E402
+from html_fixtures import generate_html  # noqa: E402
+
+
+def chained_clean_all(web_content: str):
+    cleaner = HTMLContentCleaner("https://www.example.com", "result.txt")
+    cleaner.web_content = web_content
+    cleaner.clean_html_comments()
+    cleaner.clean_js_scripts()
+    cleaner.clean_css_stuff()
+    cleaner.clean_html_ampersand_entities()
+    cleaner.clean_html_tags()
+    cleaner.clean_punctuation_marks()
+    return cleaner.web_content
+
+
+def measure(function, web_content: str):
+    """
+    Runs the function and measures its wall time and peak of traced allocations.
+
+    :return(tuple): (result, seconds, peak bytes)
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(web_content)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML cleaner benchmark.")
+    parser.add_argument('--sizes-kb', type=int, nargs='+', default=[100, 1024, 10240])
+    args = parser.parse_args()
+
+    print(f"{'size':>10} {'chained s':>10} {'chained peak MB':>16} {'single s':>9} {'single peak MB':>15}")
+    for size_kb in args.sizes_kb:
+        web_content = generate_html(size_kb * 1024)
+        chained, chained_time, chained_peak = measure(chained_clean_all, web_content)
+        single, single_time, single_peak = measure(HTMLTextExtractor().extract, web_content)
+        assert chained == single
+        print(f"{size_kb:>8}KB {chained_time:>10.3f} {chained_peak / 2 ** 20:>16.1f} "
+              f"{single_time:>9.3f} {single_peak / 2 ** 20:>15.1f}")
+
+
+if __name__ == '__main__':
+    main()
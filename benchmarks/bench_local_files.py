@@ -0,0 +1,77 @@
+"""
+Benchmark of local file input: count_local_file(), which cleans and counts a memory-mapped file in chunks,
+compared with reading the whole file, decoding it and extracting its text at once.
+
+Time is measured in a plain run, peak Python memory in a second run under tracemalloc.
+Mapped file pages are not Python allocations, so they are not included.
+
+Usage:
+    python benchmarks/bench_local_files.py
+    python benchmarks/bench_local_files.py --max-mb 1024
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main_version"))
+
+from tools.local_files import count_local_file  # noqa: E402
+from tools.html_text_extractor import HTMLTextExtractor  # noqa: E402
+from tools.word_counter import WordCounter  # noqa: E402
+from html_fixtures import generate_html  # noqa: E402
+
+SIZES_MB = [16, 64, 256]
+CHUNK_MB = 16
+
+
+def read_whole_file(path: str):
+    with open(path, 'rb') as f:
+        return WordCounter().update(HTMLTextExtractor().extract(f.read().decode()))
+
+
+def write_html_file(path: str, size_mb: int):
+    chunk = generate_html(CHUNK_MB * 2 ** 20).encode()
+    with open(path, 'wb') as f:
+        for _ in range(max(1, size_mb // CHUNK_MB)):
+            f.write(chunk)
+
+
+def measure(count, path: str):
+    start = time.perf_counter()
+    word_counter = count(path)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    count(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return word_counter, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local file input benchmark.")
+    parser.add_argument('--max-mb', type=int, default=SIZES_MB[-1], help="Largest file (MB) measured.")
+    parser.add_argument('--read-max-mb', type=int, default=SIZES_MB[-1],
+                        help="Largest file (MB) measured with the whole file read into memory.")
+    args = parser.parse_args()
+
+    print(f"{'size MB':>8} {'mmap s':>7} {'MB/s':>6} {'peak MB':>8} {'read s':>7} {'MB/s':>6} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "page.html")
+        for size_mb in [size for size in SIZES_MB if size < args.max_mb] + [args.max_mb]:
+            write_html_file(path, size_mb)
+            file_mb = os.path.getsize(path) / 2 ** 20
+            mapped_counter, mapped_seconds, mapped_peak = measure(count_local_file, path)
+            row = f"{file_mb:>8.0f} {mapped_seconds:>7.2f} {file_mb / mapped_seconds:>6.1f} {mapped_peak / 2 ** 20:>8.1f}"
+            if size_mb <= args.read_max_mb:
+                read_counter, read_seconds, read_peak = measure(read_whole_file, path)
+                if read_counter.counts != mapped_counter.counts:
+                    sys.exit(f"Results differ for {size_mb} MB")
+                row += f" {read_seconds:>7.2f} {file_mb / read_seconds:>6.1f} {read_peak / 2 ** 20:>8.1f}"
+            print(row)
+
+
+if __name__ == '__main__':
+    main()
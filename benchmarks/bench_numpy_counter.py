@@ -0,0 +1,59 @@
+"""
+Benchmark of the python and numpy counting engines on cleaned text from 1 MB to 1 GB.
+
+Corpora larger than 64 MB are counted as repeated 64 MB chunks, so memory stays bounded.
+Results of both engines are compared, the benchmark fails if they differ.
+
+Usage:
+    python benchmarks/bench_numpy_counter.py
+    python benchmarks/bench_numpy_counter.py --max-mb 64
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main_version"))
+
+from tools.word_counter import WordCounter  # noqa: E402
+from tools.numpy_counter import NumpyWordCounter, numpy  # noqa: E402
+from bench_word_counter import generate_clean_text  # noqa: E402
+
+SIZES_MB = [1, 16, 64, 256, 1024]
+CHUNK_MB = 64
+
+
+def count(word_counter, chunk: str, repeats: int):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        word_counter.update(chunk)
+        word_counter.most_common(10)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Counting engines benchmark.")
+    parser.add_argument('--max-mb', type=int, default=SIZES_MB[-1], help="Largest corpus (MB) measured.")
+    args = parser.parse_args()
+    if numpy is None:
+        sys.exit("NumPy is not installed")
+
+    print(f"{'size MB':>8} {'python s':>9} {'MB/s':>7} {'numpy s':>8} {'MB/s':>7} {'speedup':>8}")
+    chunks = {}
+    for size_mb in (size for size in SIZES_MB if size <= args.max_mb):
+        chunk_mb = min(size_mb, CHUNK_MB)
+        if chunk_mb not in chunks:
+            chunks = {chunk_mb: generate_clean_text(chunk_mb * 2 ** 20)}
+        repeats = size_mb // chunk_mb
+        python_counter, numpy_counter = WordCounter(), NumpyWordCounter()
+        python_seconds = count(python_counter, chunks[chunk_mb], repeats)
+        numpy_seconds = count(numpy_counter, chunks[chunk_mb], repeats)
+        if numpy_counter.counts != python_counter.counts or numpy_counter.most_common(
+                100) != python_counter.most_common(100):
+            sys.exit(f"Engines differ for {size_mb} MB")
+        print(f"{size_mb:>8} {python_seconds:>9.2f} {size_mb / python_seconds:>7.1f} {numpy_seconds:>8.2f} "
+              f"{size_mb / numpy_seconds:>7.1f} {python_seconds / numpy_seconds:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Scaling benchmark of ParallelWordCounter at 1, 2, 4, 8 and 16 worker processes.
+
+Two workloads are measured: many medium documents spread across the workers and a single
+large document split at safe tag boundaries.
+
+Usage:
+    python benchmarks/bench_parallel.py
+    python benchmarks/bench_parallel.py --workers 1 2 4 --documents 32 --document-kb 512 --large-mb 32
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main_version"))
+
+from tools.parallel import ParallelWordCounter  # noqa: E402
+from html_fixtures import generate_html  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process pool scaling benchmark.")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--documents', type=int, default=64)
+    parser.add_argument('--document-kb', type=int, default=512)
+    parser.add_argument('--large-mb', type=int, default=64)
+    args = parser.parse_args()
+
+    documents = [generate_html(args.document_kb * 1024, seed).encode() for seed in range(args.documents)]
+    large_document = generate_html(args.large_mb * 2 ** 20).encode()
+    documents_mb = sum(len(document) for document in documents) / 2 ** 20
+    print(f"cpus: {os.cpu_count()}, {args.documents} documents ({documents_mb:.0f} MB), "
+          f"large document {args.large_mb} MB")
+    print(f"{'workers':>7} {'documents s':>12} {'MB/s':>7} {'speedup':>8} {'large s':>8} {'MB/s':>7} {'speedup':>8}")
+    base_times = None
+    for workers in args.workers:
+        with ParallelWordCounter(max_workers=workers, split_size=max(2 ** 20, len(large_document) // workers)) as counter:
+            counter.count_document(b"<p>warm up</p>")
+            start = time.perf_counter()
+            counter.count_documents(documents)
+            documents_time = time.perf_counter() - start
+            start = time.perf_counter()
+            counter.count_document(large_document)
+            large_time = time.perf_counter() - start
+        if base_times is None:
+            base_times = documents_time, large_time
+        print(f"{workers:>7} {documents_time:>12.2f} {documents_mb / documents_time:>7.1f} "
+              f"{base_times[0] / documents_time:>8.2f} {large_time:>8.2f} {args.large_mb / large_time:>7.1f} "
+              f"{base_times[1] / large_time:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark of punctuation stripping on text from 1 MB to 100 MB.
+
+Compares the per character loop used before CharacterStripper with str.translate (ASCII and Unicode
+punctuation tables) and re.sub.
+
+Usage:
+    python benchmarks/bench_punctuation.py
+    python benchmarks/bench_punctuation.py --legacy-max-mb 10 --max-mb 10
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main_version"))
+
+from tools.char_classes import ASCII_PUNCTUATION, CharacterStripper  # noqa: E402
+from html_fixtures import generate_html  # noqa: E402
+
+SIZES_MB = [1, 10, 100]
+
+
+def legacy_remove_punctuation_marks(text: str):
+    """
+    Implementation used before CharacterStripper: string concatenation per character.
+    """
+    result_content = ''
+    for single_char in text:
+        if single_char not in ASCII_PUNCTUATION:
+            result_content += single_char
+    return result_content
+
+
+def measure(function, argument):
+    start = time.perf_counter()
+    result = function(argument)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Punctuation stripping benchmark.")
+    parser.add_argument('--legacy-max-mb', type=int, default=1,
+                        help="Largest input (MB) measured with the legacy loop.")
+    parser.add_argument('--max-mb', type=int, default=100, help="Largest measured input (MB).")
+    args = parser.parse_args()
+
+    ascii_stripper = CharacterStripper()
+    unicode_stripper = CharacterStripper(unicode_categories=('P',))
+    pattern = re.compile('[' + re.escape(ASCII_PUNCTUATION) + ']+')
+    engines = [
+        ('translate', ascii_stripper.strip),
+        ('unicode translate', unicode_stripper.strip),
+        ('re.sub', lambda text: pattern.sub('', text)),
+    ]
+
+    print(f"{'size':>8} {'engine':>18} {'seconds':>10} {'MB/s':>8}")
+    for size_mb in SIZES_MB:
+        if size_mb > args.max_mb:
+            break
+        text = generate_html(size_mb * 2 ** 20)
+        expected = ascii_stripper.strip(text)
+        rows = []
+        if size_mb <= args.legacy_max_mb:
+            result, elapsed = measure(legacy_remove_punctuation_marks, text)
+            assert result == expected
+            rows.append(('legacy loop', elapsed))
+        for name, function in engines:
+            result, elapsed = measure(function, text)
+            if name != 'unicode translate':
+                assert result == expected
+            rows.append((name, elapsed))
+        for name, elapsed in rows:
+            throughput = size_mb / elapsed if elapsed else float('inf')
+            print(f"{size_mb:>6}MB {name:>18} {elapsed:>10.4f} {throughput:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark of approximate counting (SketchWordCounter) against exact counting (WordCounter) on Zipfian corpora.
+
+Every corpus is counted in documents of --document-size words, the counts of every document are merged into
+the total counter the way BatchWordCounter does. Time, the peak of allocated memory (tracemalloc, measured
+in a second run), recall of the exact top words and the largest overestimation of a reported count are shown per corpus size.
+
+Usage:
+    python benchmarks/bench_sketch.py
+    python benchmarks/bench_sketch.py --tokens 1000000 5000000 --vocabulary 1000000 --error 0.0001
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main_version"))
+
+from tools.sketch import SketchWordCounter  # noqa: E402
+from tools.word_counter import WordCounter  # noqa: E402
+
+
+def zipfian_documents(token_count: int, vocabulary_size: int, exponent: float, document_size: int, seed: int = 0):
+    """
+    Yields space separated documents of words drawn from a Zipfian distribution.
+    """
+    rng = random.Random(seed)
+    cumulative_weights = list(itertools.accumulate(1 / rank ** exponent for rank in range(1, vocabulary_size + 1)))
+    words = [f"w{rank}" for rank in range(vocabulary_size)]
+    for start in range(0, token_count, document_size):
+        yield " ".join(rng.choices(words, cum_weights=cumulative_weights, k=min(document_size, token_count - start)))
+
+
+def count(create_counter, documents):
+    """
+    Counts the documents twice: timed without tracemalloc, which slows allocations down, then with it.
+
+    :return(tuple): (total counter, elapsed seconds, peak allocated bytes)
+    """
+    results = []
+    for track_memory in (False, True):
+        if track_memory:
+            tracemalloc.start()
+        total_counter = create_counter()
+        start = time.perf_counter()
+        for document in documents:
+            total_counter.merge(WordCounter().update(document))
+        if isinstance(total_counter, SketchWordCounter):
+            total_counter.flush()
+        results.append(time.perf_counter() - start)
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return total_counter, results[0], peak_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Approximate counting benchmark.")
+    parser.add_argument('--tokens', type=int, nargs='+', default=[200000, 1000000, 3000000],
+                        help="Corpus sizes in words.")
+    parser.add_argument('--vocabulary', type=int, default=500000, help="Number of distinct words to draw from.")
+    parser.add_argument('--exponent', type=float, default=1.1, help="Exponent of the Zipfian distribution.")
+    parser.add_argument('--document-size', type=int, default=5000, help="Number of words of a document.")
+    parser.add_argument('--error', type=float, default=0.0001, help="Error of the sketch relative to all words.")
+    parser.add_argument('--confidence', type=float, default=0.99, help="Confidence of the sketch.")
+    parser.add_argument('--top', type=int, default=100, help="Number of top words compared.")
+    args = parser.parse_args()
+
+    print(f"{'tokens':>10} {'counter':>8} {'time s':>8} {'peak MB':>8} {'top recall':>10} {'max over':>9}")
+    for token_count in args.tokens:
+        documents = list(zipfian_documents(token_count, args.vocabulary, args.exponent, args.document_size))
+        exact_counter, exact_time, exact_peak = count(WordCounter, documents)
+        sketch_counter, sketch_time, sketch_peak = count(lambda: SketchWordCounter(args.error, args.confidence),
+                                                         documents)
+        exact_top = {word for word, _ in exact_counter.most_common(args.top)}
+        heavy_hitters = sketch_counter.heavy_hitters(args.top)
+        recall = len(exact_top & {word for word, _, _ in heavy_hitters}) / len(exact_top)
+        max_over = max(estimate - exact_counter.counts.get(word, 0) for word, estimate, _ in heavy_hitters)
+        print(f"{token_count:>10} {'exact':>8} {exact_time:>8.2f} {exact_peak / 2 ** 20:>8.1f} {'':>10} {'':>9}")
+        print(f"{token_count:>10} {'sketch':>8} {sketch_time:>8.2f} {sketch_peak / 2 ** 20:>8.1f} {recall:>10.2f} "
+              f"{max_over:>9}")
+    print(f"sketch bound: counts at most {args.error * 100:g}% of all words too high with probability "
+          f"{args.confidence}, every word above {args.error * 100:g}% of all words is tracked")
+
+
+if __name__ == '__main__':
+    main()
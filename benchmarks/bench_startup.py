@@ -0,0 +1,156 @@
+"""
+Cold start benchmark of the command line entry point.
+
+main.py is run in fresh interpreters, the wall time of every scenario is the best of --repeat runs.
+One more run with -X importtime reports the total import time and the slowest imported modules.
+
+Scenarios:
+    - help: python main.py -h,
+    - cached_url: python main.py -u <url> of a page already stored in the HTTP response cache, served by
+      a local server answering 304 Not Modified,
+    - query_store: python main.py --query-store <dir> of a small count store.
+
+Results can be saved as a baseline and later runs compared with it, like in bench_suite.py.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeat 20 --top-imports 15
+    python benchmarks/bench_startup.py --save-baseline startup.json
+    python benchmarks/bench_startup.py --baseline startup.json --threshold 0.3
+"""
+import argparse
+import functools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+MAIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main_version")
+sys.path.insert(0, MAIN_DIR)
+
+from tools.count_store import CountStore  # noqa: E402
+from html_fixtures import generate_html  # noqa: E402
+
+TIME_SLACK_SECONDS = 5e-3
+
+
+class QuietHTTPRequestHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def run_main(arguments: list, import_time: bool = False):
+    """
+    Runs main.py in a fresh interpreter.
+
+    :return(tuple): (wall time in seconds, standard error output)
+    """
+    command = [sys.executable] + (['-X', 'importtime'] if import_time else []) + ['main.py'] + arguments
+    start = time.perf_counter()
+    completed = subprocess.run(command, cwd=MAIN_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    seconds = time.perf_counter() - start
+    if completed.returncode != 0:
+        sys.exit(f"{' '.join(arguments)} failed:\n{completed.stderr}")
+    return seconds, completed.stderr
+
+
+def parse_import_time(stderr: str):
+    """
+    Parses the -X importtime report.
+
+    :return(tuple): (total import time in seconds, list of (module, self time in seconds) pairs)
+    """
+    total = 0
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, cumulative_time, module = line[len('import time:'):].split('|')
+        modules.append((module.strip(), int(self_time) / 1e6))
+        if not module.startswith('  '):
+            total += int(cumulative_time)
+    return total / 1e6, sorted(modules, key=lambda item: item[1], reverse=True)
+
+
+def run_benchmark(scenarios: dict, repeat: int, top_imports: int):
+    """
+    Measures the scenarios and prints a summary of each.
+
+    :return(dict): Results keyed by scenario name, values are dictionaries with seconds and import_seconds.
+    """
+    results = {}
+    for name, arguments in scenarios.items():
+        best = min(run_main(arguments)[0] for _ in range(repeat))
+        import_seconds, modules = parse_import_time(run_main(arguments, import_time=True)[1])
+        results[name] = {'seconds': best, 'import_seconds': import_seconds}
+        print(f"{name}: {best * 1000:.1f} ms wall, {import_seconds * 1000:.1f} ms of imports")
+        for module, self_seconds in modules[:top_imports]:
+            print(f"    {self_seconds * 1000:>7.2f} ms  {module}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Command line cold start benchmark.")
+    parser.add_argument('--repeat', type=int, default=10, help="Number of timed runs, the best one is kept.")
+    parser.add_argument('--top-imports', type=int, default=10, help="Number of the slowest imports printed.")
+    parser.add_argument('--save-baseline', metavar='<path>', help="Save the results as a baseline.")
+    parser.add_argument('--baseline', metavar='<path>', help="Compare the results with a saved baseline.")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Allowed slowdown against the baseline, 0.25 means 25%%.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        site_dir = os.path.join(directory, "site")
+        os.mkdir(site_dir)
+        with open(os.path.join(site_dir, "page.html"), 'w', encoding='utf-8') as f:
+            f.write(generate_html(100 * 2 ** 10))
+        store = CountStore(os.path.join(directory, "store"))
+        store.add_document("https://example.com/", {"cold": 3, "start": 2})
+
+        handler = functools.partial(QuietHTTPRequestHandler, directory=site_dir)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        output_file = os.path.join(directory, "result.txt")
+        cache_dir = os.path.join(directory, "cache")
+        url = f"http://127.0.0.1:{server.server_address[1]}/page.html"
+        scenarios = {
+            'help': ['-h'],
+            'cached_url': ['-u', url, '-o', output_file, '--cache-dir', cache_dir],
+            'query_store': ['--query-store', os.path.join(directory, "store"), '-o', output_file],
+        }
+        try:
+            run_main(scenarios['cached_url'])
+            results = run_benchmark(scenarios, args.repeat, args.top_imports)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'results': results}, f, indent=1, sort_keys=True)
+        print(f"baseline saved to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline_results = json.load(f)['results']
+        regressions = []
+        for name, result in results.items():
+            expected = baseline_results.get(name)
+            if expected is None:
+                continue
+            slowdown = result['seconds'] - expected['seconds']
+            if result['seconds'] > expected['seconds'] * (1 + args.threshold) and slowdown > TIME_SLACK_SECONDS:
+                regressions.append(f"{name}: {result['seconds'] * 1000:.1f} ms, baseline "
+                                   f"{expected['seconds'] * 1000:.1f} ms")
+        if regressions:
+            print(f"{len(regressions)} startup regressions:")
+            print('\n'.join(regressions))
+            sys.exit(1)
+        print("no startup regressions")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+"""
+Offline benchmark suite and regression harness of the cleaning and counting pipeline.
+
+Every stage is run on every fixture (see html_fixtures.FIXTURES) of every size. The wall time is the best
+of --repeat runs, a run of a small input repeats the stage until it takes at least 200 ms
+(garbage collection is disabled while timing, like in timeit). The peak memory
+is measured in one more run under tracemalloc. Throughput is computed from the size of the stage input.
+
+Stages:
+    - clean_all: HTMLContentCleaner.clean_all() of the page,
+    - inside_content_cleaner: removal of the script blocks of the page,
+    - remove_punctuation_marks: of the page,
+    - get_dict_with_counted_words: CountWordsFromUrl.get_dict_with_counted_words() of the cleaned page.
+
+Results can be saved as a baseline and later runs compared with it. A stage slower than the baseline by more
+than --threshold, or using more memory than --memory-threshold, is a regression and the run exits with status 1.
+Baselines depend on the machine, compare only runs from the same one.
+
+Usage:
+    python benchmarks/bench_suite.py
+    python benchmarks/bench_suite.py --sizes 1KB 1MB 100MB --fixtures mixed nested
+    python benchmarks/bench_suite.py --save-baseline baseline.json
+    python benchmarks/bench_suite.py --baseline baseline.json --threshold 0.2
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main_version"))
+
+from tools.interview_tools import HTMLContentCleaner, CountWordsFromUrl  # noqa: E402
+from html_fixtures import FIXTURES  # noqa: E402
+
+SIZES = {'1KB': 2 ** 10, '10KB': 10 * 2 ** 10, '100KB': 100 * 2 ** 10, '1MB': 2 ** 20, '10MB': 10 * 2 ** 20,
+         '100MB': 100 * 2 ** 20}
+DEFAULT_SIZES = ['1KB', '10KB', '100KB', '1MB', '10MB']
+URL = "https://www.example.com"
+MIN_RUN_SECONDS = 0.2
+TIME_SLACK_SECONDS = 20e-6
+MEMORY_SLACK_BYTES = 2 ** 20
+BASELINE_VERSION = 1
+
+
+def clean_all(web_content: str):
+    cleaner = HTMLContentCleaner(URL, "result.txt")
+    cleaner.web_content = web_content
+    return cleaner.clean_all()
+
+
+def inside_content_cleaner(web_content: str):
+    return HTMLContentCleaner.inside_content_cleaner(web_content, '<script', '</script>')
+
+
+def remove_punctuation_marks(web_content: str):
+    return HTMLContentCleaner.remove_punctuation_marks(web_content)
+
+
+def get_dict_with_counted_words(cleaned_content: str):
+    count_handler = CountWordsFromUrl(URL, "result.txt")
+    count_handler.web_content = cleaned_content
+    return count_handler.get_dict_with_counted_words()
+
+
+# (stage name, function, True if the stage gets the cleaned page instead of the raw one)
+STAGES = [
+    ('clean_all', clean_all, False),
+    ('inside_content_cleaner', inside_content_cleaner, False),
+    ('remove_punctuation_marks', remove_punctuation_marks, False),
+    ('get_dict_with_counted_words', get_dict_with_counted_words, True),
+]
+
+
+def measure_time(function, stage_input: str, repeat: int):
+    """
+    Measures the best time of a single call.
+
+    :return(float): Seconds per call.
+    """
+    best = float('inf')
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            calls = 0
+            start = time.perf_counter()
+            while True:
+                function(stage_input)
+                calls += 1
+                elapsed = time.perf_counter() - start
+                if elapsed >= MIN_RUN_SECONDS:
+                    break
+            best = min(best, elapsed / calls)
+    finally:
+        gc.enable()
+    return best
+
+
+def measure_peak_memory(function, stage_input: str):
+    """
+    Measures the peak of memory allocated by a single call, the stage input is not included.
+
+    :return(int): Bytes.
+    """
+    tracemalloc.start()
+    try:
+        function(stage_input)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_suite(fixture_names: list, size_labels: list, stage_names: list, repeat: int):
+    """
+    Runs the stages on the fixtures and prints a row per measurement.
+
+    :return(dict): Results keyed by 'fixture/size/stage', values are dictionaries with
+        seconds, bytes (stage input size) and peak_bytes.
+    """
+    results = {}
+    print(f"{'fixture':>14} {'size':>6} {'stage':>28} {'ms':>10} {'MB/s':>8} {'peak MB':>8}")
+    for fixture_name in fixture_names:
+        for size_label in size_labels:
+            web_content = FIXTURES[fixture_name](SIZES[size_label])
+            cleaned_content = clean_all(web_content)
+            for stage_name, function, uses_cleaned_content in STAGES:
+                if stage_name not in stage_names:
+                    continue
+                stage_input = cleaned_content if uses_cleaned_content else web_content
+                input_bytes = len(stage_input.encode())
+                seconds = measure_time(function, stage_input, repeat)
+                peak_bytes = measure_peak_memory(function, stage_input)
+                results[f"{fixture_name}/{size_label}/{stage_name}"] = {
+                    'seconds': seconds, 'bytes': input_bytes, 'peak_bytes': peak_bytes}
+                print(f"{fixture_name:>14} {size_label:>6} {stage_name:>28} {seconds * 1000:>10.3f} "
+                      f"{input_bytes / 2 ** 20 / seconds:>8.1f} {peak_bytes / 2 ** 20:>8.1f}")
+    return results
+
+
+def save_baseline(path: str, results: dict):
+    baseline = {'version': BASELINE_VERSION, 'python': platform.python_version(), 'machine': platform.machine(),
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results': results}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=1, sort_keys=True)
+
+
+def load_baseline(path: str):
+    with open(path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('version') != BASELINE_VERSION:
+        sys.exit(f"{path} is not a baseline of version {BASELINE_VERSION}")
+    return baseline
+
+
+def find_regressions(results: dict, baseline_results: dict, threshold: float, memory_threshold: float):
+    """
+    Compares results with a baseline. Slowdowns smaller than TIME_SLACK_SECONDS and memory growth smaller
+    than MEMORY_SLACK_BYTES are ignored, timer and allocator noise of tiny inputs is not a regression.
+
+    :return(list): Descriptions of the regressions.
+    """
+    regressions = []
+    for key, result in results.items():
+        expected = baseline_results.get(key)
+        if expected is None:
+            continue
+        time_ratio = result['seconds'] / expected['seconds']
+        if time_ratio > 1 + threshold and result['seconds'] - expected['seconds'] > TIME_SLACK_SECONDS:
+            regressions.append(f"{key}: {result['seconds'] * 1000:.3f} ms, baseline "
+                               f"{expected['seconds'] * 1000:.3f} ms ({time_ratio - 1:+.0%})")
+        memory_growth = result['peak_bytes'] - expected['peak_bytes']
+        if memory_growth > MEMORY_SLACK_BYTES and result['peak_bytes'] > expected['peak_bytes'] * (1 + memory_threshold):
+            regressions.append(f"{key}: peak {result['peak_bytes'] / 2 ** 20:.1f} MB, baseline "
+                               f"{expected['peak_bytes'] / 2 ** 20:.1f} MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cleaning and counting pipeline benchmark suite.")
+    parser.add_argument('--fixtures', nargs='+', choices=list(FIXTURES), default=list(FIXTURES))
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=DEFAULT_SIZES)
+    parser.add_argument('--stages', nargs='+', choices=[name for name, _, _ in STAGES],
+                        default=[name for name, _, _ in STAGES])
+    parser.add_argument('--repeat', type=int, default=5, help="Number of timed runs, the best one is kept.")
+    parser.add_argument('--save-baseline', metavar='<path>', help="Save the results as a baseline.")
+    parser.add_argument('--baseline', metavar='<path>', help="Compare the results with a saved baseline.")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Allowed slowdown against the baseline, 0.25 means 25%%.")
+    parser.add_argument('--memory-threshold', type=float, default=0.10,
+                        help="Allowed peak memory growth against the baseline, 0.10 means 10%%.")
+    args = parser.parse_args()
+
+    results = run_suite(args.fixtures, args.sizes, args.stages, args.repeat)
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results)
+        print(f"baseline saved to {args.save_baseline}")
+    if args.baseline:
+        baseline = load_baseline(args.baseline)
+        regressions = find_regressions(results, baseline['results'], args.threshold, args.memory_threshold)
+        compared = len(results.keys() & baseline['results'].keys())
+        if regressions:
+            print(f"{len(regressions)} regressions in {compared} compared measurements:")
+            print('\n'.join(regressions))
+            sys.exit(1)
+        print(f"no regressions in {compared} compared measurements")
+
+
+if __name__ == '__main__':
+    main()
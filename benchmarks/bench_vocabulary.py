@@ -0,0 +1,73 @@
+"""
+Memory benchmark of CompactVocabulary compared with a dict of str to int.
+
+Both structures count the same distinct words with Zipf-like counts. The retained memory is computed
+with sys.getsizeof: the dict, its keys and the count objects which are not cached small integers,
+and CompactVocabulary.memory_usage() after compact().
+
+Usage:
+    python benchmarks/bench_vocabulary.py
+    python benchmarks/bench_vocabulary.py --words 10000000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main_version"))
+
+from tools.vocabulary import CompactVocabulary  # noqa: E402
+
+
+def generate_counted_words(words_count: int):
+    """
+    Generates distinct lowercase words of 2 to 12 characters with Zipf-like counts.
+
+    :param words_count: Number of distinct words.
+    :type words_count: int
+    :return(generator): Yields (word, count) tuples.
+    """
+    for index in range(words_count):
+        yield f"w{index:x}" + "abcdefgh"[:index % 6], max(1, 10 ** 6 // (index + 1))
+
+
+def dict_memory_usage(counts: dict):
+    return sys.getsizeof(counts) + sum(sys.getsizeof(word) + (sys.getsizeof(count) if count > 256 else 0)
+                                       for word, count in counts.items())
+
+
+def build_dict(words_count: int):
+    counts = {}
+    for word, count in generate_counted_words(words_count):
+        counts[word] = counts.get(word, 0) + count
+    return counts
+
+
+def build_vocabulary(words_count: int):
+    vocabulary = CompactVocabulary()
+    for word, count in generate_counted_words(words_count):
+        vocabulary.add(word, count)
+    return vocabulary.compact()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vocabulary memory benchmark.")
+    parser.add_argument('--words', type=int, default=1000000, help="Number of distinct words.")
+    args = parser.parse_args()
+
+    print(f"{'structure':>20} {'words':>10} {'MB':>10} {'bytes/word':>11} {'seconds':>8}")
+    sizes = []
+    for name, build, memory_usage in (('dict', build_dict, dict_memory_usage),
+                                      ('CompactVocabulary', build_vocabulary, CompactVocabulary.memory_usage)):
+        start = time.perf_counter()
+        structure = build(args.words)
+        elapsed = time.perf_counter() - start
+        size = memory_usage(structure)
+        sizes.append(size)
+        print(f"{name:>20} {args.words:>10} {size / 2 ** 20:>10.1f} {size / args.words:>11.1f} {elapsed:>8.2f}")
+        del structure
+    print(f"memory reduction: {sizes[0] / sizes[1]:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
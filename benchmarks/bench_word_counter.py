@@ -0,0 +1,78 @@
+"""
+Benchmark of the word counting engine on cleaned text from 10 KB to 50 MB.
+
+Usage:
+    python benchmarks/bench_word_counter.py
+    python benchmarks/bench_word_counter.py --legacy-max-kb 100
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main_version"))
+
+from tools.word_counter import WordCounter  # noqa: E402
+
+SIZES_KB = [10, 100, 1024, 10 * 1024, 50 * 1024]
+
+
+def generate_clean_text(size_bytes: int, vocabulary_size: int = 20000, seed: int = 0):
+    """
+    Generates cleaned text with a Zipf-like word distribution.
+
+    :param size_bytes: Approximate size of the generated text.
+    :type size_bytes: int
+    :param vocabulary_size: Number of distinct words to draw from.
+    :type vocabulary_size: int
+    :param seed: Random generator seed.
+    :type seed: int
+    :return(str): Generated text.
+    """
+    rng = random.Random(seed)
+    vocabulary = [f"Word{index}" for index in range(vocabulary_size)]
+    weights = [1 / (rank + 1) for rank in range(vocabulary_size)]
+    words = []
+    size = 0
+    while size < size_bytes:
+        batch = rng.choices(vocabulary, weights=weights, k=4096)
+        words.extend(batch)
+        size += sum(len(word) + 1 for word in batch)
+    return " ".join(words)[:size_bytes]
+
+
+def legacy_count(text: str):
+    """
+    Counting algorithm used before WordCounter: one list.count() per unique word.
+    """
+    unique_words_set = set(text.lower().split())
+    all_words_list = text.lower().split()
+    return {word: all_words_list.count(word) for word in unique_words_set}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Word counter scaling benchmark.")
+    parser.add_argument('--legacy-max-kb', type=int, default=100,
+                        help="Largest input (KB) measured with the legacy algorithm.")
+    args = parser.parse_args()
+
+    print(f"{'size':>10} {'words':>10} {'unique':>8} {'counter s':>10} {'MB/s':>8} {'legacy s':>10}")
+    for size_kb in SIZES_KB:
+        text = generate_clean_text(size_kb * 1024)
+        start = time.perf_counter()
+        counter = WordCounter().update(text)
+        elapsed = time.perf_counter() - start
+        legacy_elapsed = "-"
+        if size_kb <= args.legacy_max_kb:
+            start = time.perf_counter()
+            legacy_result = legacy_count(text)
+            legacy_elapsed = f"{time.perf_counter() - start:.4f}"
+            assert legacy_result == counter.counts
+        throughput = size_kb / 1024 / elapsed if elapsed else float('inf')
+        print(f"{size_kb:>8}KB {counter.total_words:>10} {len(counter.counts):>8} "
+              f"{elapsed:>10.4f} {throughput:>8.1f} {legacy_elapsed:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+Synthetic and recorded HTML documents used by the benchmark scripts.
+"""
+import os
+import random
+
+WORDS = ("the of and to in is was for on that with as by at from this be are or an it not which have "
+         "domain example document literature permission information python benchmark counter "
+         "analysis content page words text human readable").split()
+
+
+def generate_html(size_bytes: int, seed: int = 0):
+    """
+    Generates an HTML page mixing paragraphs, links, comments, scripts, styles and entities.
+
+    :param size_bytes: Approximate size of the generated document.
+    :type size_bytes: int
+    :param seed: Random generator seed.
+    :type seed: int
+    :return(str): Generated HTML document.
+    """
+    rng = random.Random(seed)
+    parts = ['<!DOCTYPE html><html><head><title>Benchmark page</title>'
+             '<style>body { margin: 0; } p > a { color: red; }</style></head><body>\n']
+    size = len(parts[0])
+    while size < size_bytes:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 30)))
+        kind = rng.random()
+        if kind < 0.6:
+            part = f'<p class="text">{sentence.capitalize()}, <a href="/page/{rng.randint(0, 999)}">{rng.choice(WORDS)}</a>.</p>\n'
+        elif kind < 0.75:
+            part = f'<div><span>{sentence}</span> &amp; &nbsp;&#8212; <b>{rng.choice(WORDS)}</b>!</div>\n'
+        elif kind < 0.85:
+            part = f'<!-- comment: {sentence} -->\n'
+        elif kind < 0.95:
+            part = f'<script type="text/javascript">var x = {rng.randint(0, 99)} < 100; // {sentence}\n</script>\n'
+        else:
+            part = f'<style>.c{rng.randint(0, 99)} {{ content: "{sentence}"; }}</style>\n'
+        parts.append(part)
+        size += len(part)
+    parts.append('</body></html>\n')
+    return ''.join(parts)
+
+
+def generate_script_heavy_html(size_bytes: int, seed: int = 0):
+    """
+    Generates an HTML page where most of the bytes are inline scripts with comparisons, markup in strings
+    and comments, and only a few paragraphs are visible text.
+
+    :param size_bytes: Approximate size of the generated document.
+    :type size_bytes: int
+    :param seed: Random generator seed.
+    :type seed: int
+    :return(str): Generated HTML document.
+    """
+    rng = random.Random(seed)
+    parts = ['<!DOCTYPE html><html><head><title>Scripts</title></head><body>\n']
+    size = len(parts[0])
+    while size < size_bytes:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 30)))
+        if rng.random() < 0.2:
+            part = f'<p>{sentence}.</p>\n'
+        else:
+            part = (f'<script>\nfor (var i = 0; i < {rng.randint(1, 99)}; i++) {{ a[i] = i > 3 && b < c; }}\n'
+                    f'document.write("<div class=\\"x\\">{sentence}</div>"); /* {sentence} */\n</script>\n')
+        parts.append(part)
+        size += len(part)
+    parts.append('</body></html>\n')
+    return ''.join(parts)
+
+
+def generate_entity_heavy_html(size_bytes: int, seed: int = 0):
+    """
+    Generates an HTML page whose text is densely interleaved with named and numeric character entities.
+
+    :param size_bytes: Approximate size of the generated document.
+    :type size_bytes: int
+    :param seed: Random generator seed.
+    :type seed: int
+    :return(str): Generated HTML document.
+    """
+    rng = random.Random(seed)
+    entities = ['&amp;', '&nbsp;', '&lt;', '&gt;', '&quot;', '&#8212;', '&#x27;', '&copy;', '& ']
+    parts = ['<!DOCTYPE html><html><head><title>Entities</title></head><body>\n']
+    size = len(parts[0])
+    while size < size_bytes:
+        part = '<p>' + ''.join(rng.choice(WORDS) + rng.choice(entities) for _ in range(rng.randint(5, 30))) + '</p>\n'
+        parts.append(part)
+        size += len(part)
+    parts.append('</body></html>\n')
+    return ''.join(parts)
+
+
+def generate_nested_html(size_bytes: int, seed: int = 0, depth: int = 256):
+    """
+    Generates an HTML page of deeply nested elements with attributes, text is found at every level.
+
+    :param size_bytes: Approximate size of the generated document.
+    :type size_bytes: int
+    :param seed: Random generator seed.
+    :type seed: int
+    :param depth: Nesting depth of one tree. Default is 256.
+    :type depth: int
+    :return(str): Generated HTML document.
+    """
+    rng = random.Random(seed)
+    parts = ['<!DOCTYPE html><html><head><title>Nested</title></head><body>\n']
+    size = len(parts[0])
+    while size < size_bytes:
+        tags = [rng.choice(('div', 'span', 'section', 'ul', 'li', 'table', 'td', 'b')) for _ in range(depth)]
+        opening = ''.join(f'<{tag} class="l{level}" data-id="{rng.randint(0, 9999)}">{rng.choice(WORDS)} '
+                          for level, tag in enumerate(tags))
+        part = opening + ''.join(f'</{tag}>' for tag in reversed(tags)) + '\n'
+        parts.append(part)
+        size += len(part)
+    parts.append('</body></html>\n')
+    return ''.join(parts)
+
+
+RECORDED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "unit_tests", "html_corpus")
+
+
+def recorded_html(size_bytes: int, seed: int = 0):
+    """
+    Concatenates the recorded pages of unit_tests/html_corpus until the requested size is reached.
+
+    :param size_bytes: Approximate size of the generated document.
+    :type size_bytes: int
+    :param seed: Random generator seed, the order of the pages.
+    :type seed: int
+    :return(str): Generated HTML document.
+    """
+    pages = []
+    for file_name in sorted(os.listdir(RECORDED_DIR)):
+        with open(os.path.join(RECORDED_DIR, file_name), 'r', encoding='utf-8') as f:
+            pages.append(f.read())
+    rng = random.Random(seed)
+    parts = []
+    size = 0
+    while size < size_bytes:
+        page = rng.choice(pages)
+        parts.append(page)
+        size += len(page)
+    return ''.join(parts)
+
+
+FIXTURES = {
+    'mixed': generate_html,
+    'script_heavy': generate_script_heavy_html,
+    'entity_heavy': generate_entity_heavy_html,
+    'nested': generate_nested_html,
+    'recorded': recorded_html,
+}
@@ -0,0 +1,167 @@
+"""
+Load test of the analysis server (main.py --serve) against a local stub site.
+
+The stub site serves generated pages, the server runs in its own process. Client threads send
+POST /analyze requests over keep-alive connections, URLs are drawn from a Zipf-like distribution, so
+popular pages are requested concurrently (coalesced into one fetch) and repeatedly (result cache).
+Latency percentiles, requests per second and the server statistics are reported. With --compare-cli
+the same pages are also analyzed by starting main.py -u once per URL, the way cron jobs did.
+
+Usage:
+    python benchmarks/load_test_server.py
+    python benchmarks/load_test_server.py --requests 5000 --concurrency 32 --urls 200
+    python benchmarks/load_test_server.py --result-ttl 0 --compare-cli 20
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import zlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+MAIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main_version")
+sys.path.insert(0, MAIN_DIR)
+
+from html_fixtures import generate_html  # noqa: E402
+
+
+class StubSiteHandler(BaseHTTPRequestHandler):
+    """
+    Serves /page/<n> with a generated page, generated pages are kept in memory.
+    """
+
+    page_size = 32 * 2 ** 10
+    pages = {}
+    pages_lock = threading.Lock()
+
+    def do_GET(self):
+        with self.pages_lock:
+            body = self.pages.get(self.path)
+            if body is None:
+                body = generate_html(self.page_size, seed=zlib.crc32(self.path.encode())).encode()
+                self.pages[self.path] = body
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_server(port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/health")
+            if connection.getresponse().status == 200:
+                connection.close()
+                return
+        except OSError:
+            time.sleep(0.05)
+    sys.exit("The analysis server did not start")
+
+
+def request_health(port: int):
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    connection.request("GET", "/health")
+    return json.loads(connection.getresponse().read())
+
+
+def run_client(port: int, urls: list, top_count: int, latencies: list, errors: list):
+    """
+    Sends requests for the URLs over one keep-alive connection.
+    """
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    for url in urls:
+        start = time.perf_counter()
+        connection.request("POST", "/analyze", json.dumps({"url": url, "top": top_count}),
+                           {"Content-Type": "application/json"})
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        if response.status != 200:
+            errors.append(response.status)
+    connection.close()
+
+
+def percentile(sorted_values: list, fraction: float):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analysis server load test.")
+    parser.add_argument('--requests', type=int, default=2000, help="Total number of requests.")
+    parser.add_argument('--concurrency', type=int, default=16, help="Number of client connections.")
+    parser.add_argument('--urls', type=int, default=100, help="Number of distinct pages of the stub site.")
+    parser.add_argument('--page-size', type=int, default=32 * 2 ** 10, help="Size of a stub page in bytes.")
+    parser.add_argument('--top', type=int, default=10, help="Number of top words requested.")
+    parser.add_argument('--workers', type=int, default=16, help="Number of analysis workers of the server.")
+    parser.add_argument('--result-ttl', type=float, default=60.0,
+                        help="Result cache TTL of the server in seconds, 0 disables the result cache.")
+    parser.add_argument('--compare-cli', type=int, default=0, metavar='<count>',
+                        help="Also time this many runs of main.py -u, one process per URL.")
+    args = parser.parse_args()
+
+    StubSiteHandler.page_size = args.page_size
+    site = ThreadingHTTPServer(("127.0.0.1", 0), StubSiteHandler)
+    threading.Thread(target=site.serve_forever, daemon=True).start()
+    site_url = f"http://127.0.0.1:{site.server_address[1]}"
+    port = free_port()
+    server = subprocess.Popen([sys.executable, "main.py", "--serve", f"127.0.0.1:{port}", "--no-cache",
+                               "--workers", str(args.workers), "--result-ttl", str(args.result_ttl)],
+                              cwd=MAIN_DIR, stdout=subprocess.DEVNULL)
+    try:
+        wait_for_server(port)
+        rng = random.Random(0)
+        urls = [f"{site_url}/page/{min(int(rng.paretovariate(1.2)), args.urls) - 1}" for _ in range(args.requests)]
+        latencies = []
+        errors = []
+        clients = [threading.Thread(target=run_client,
+                                    args=(port, urls[index::args.concurrency], args.top, latencies, errors))
+                   for index in range(args.concurrency)]
+        start = time.perf_counter()
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        elapsed = time.perf_counter() - start
+        latencies.sort()
+        print(f"{len(latencies)} requests, {args.concurrency} connections, {len(set(urls))} distinct pages "
+              f"of {args.page_size // 1024} KB, {len(errors)} errors")
+        print(f"throughput: {len(latencies) / elapsed:.1f} requests/s")
+        print(f"latency p50: {percentile(latencies, 0.50) * 1000:.2f} ms, "
+              f"p99: {percentile(latencies, 0.99) * 1000:.2f} ms, max: {latencies[-1] * 1000:.2f} ms")
+        print(f"server: {request_health(port)}")
+
+        if args.compare_cli:
+            start = time.perf_counter()
+            for url in urls[:args.compare_cli]:
+                subprocess.run([sys.executable, "main.py", "-u", url, "--no-cache", "-o", os.devnull],
+                               cwd=MAIN_DIR, stdout=subprocess.DEVNULL, check=True)
+            per_run = (time.perf_counter() - start) / args.compare_cli
+            print(f"main.py -u, one process per URL: {per_run * 1000:.1f} ms per URL, "
+                  f"{1 / per_run:.1f} URLs/s")
+    finally:
+        server.terminate()
+        server.wait()
+        site.shutdown()
+        site.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,9 @@
-from tools.interview_tools import CountWordsFromUrl
 import argparse
+import os
+from tools.word_counter import ENGINES, resolve_engine
+
+# Number of most recent stage records kept by the profiler in server mode.
+SERVER_PROFILE_RECORDS = 100000
 
 
 def main():
@@ -10,16 +14,44 @@ def main():
     Example of use:
         - python main.py -u https://example.com/\n
         - python main.py -u https://example.com/ -o result_file.txt\n
-        - python main.py -u https://example.com/ -s -n 3
+        - python main.py -u https://example.com/ -s -n 3\n
+        - python main.py -u https://example.com/ --stream\n
+        - python main.py -i urls.txt -o results.txt --workers 32\n
+        - python main.py -p ./site_mirror page.html\n
+        - python main.py -u https://example.com/ --cache-dir ./cache\n
+        - python main.py -i urls.txt --store ./counts\n
+        - python main.py --query-store ./counts -n 20\n
+        - python main.py -i urls.txt --profile profile.jsonl\n
+        - python main.py --serve 127.0.0.1:8080\n
+        - python main.py --crawl https://docs.example.com/ --max-pages 5000
         
     """
     parser = argparse.ArgumentParser(description=description, formatter_class=argparse.RawTextHelpFormatter)
     required = parser.add_argument_group("REQUIRED ARGUMENTS")
     optional = parser.add_argument_group("Optional arguments")
-    required.add_argument('-u', '--url',
-                          metavar='<url>',
-                          help='Web URL.',
-                          required=True)
+    source = required.add_mutually_exclusive_group(required=True)
+    source.add_argument('-u', '--url',
+                        metavar='<url>',
+                        help='Web URL.')
+    source.add_argument('-i', '--input-file',
+                        metavar='<urls_file_path>',
+                        help="File with web URLs, one per line ('-' reads standard input).")
+    source.add_argument('-p', '--path',
+                        metavar='<path>',
+                        nargs='+',
+                        help="Local HTML files or directories, directories are searched recursively for\n"
+                             "*.html, *.htm, *.xhtml and *.shtml files.")
+    source.add_argument('--query-store',
+                        metavar='<store_dir_path>',
+                        help='Save the top words of all documents of a count store, nothing is fetched.')
+    source.add_argument('--crawl',
+                        metavar='<url>',
+                        nargs='+',
+                        help='Crawl the site of the start URLs, links to their hosts are followed.')
+    source.add_argument('--serve',
+                        metavar='<address>',
+                        help="Run an analysis server on host:port or unix:<socket path>, requests are\n"
+                             "POST /analyze {\"url\": ..., \"top\": N} or GET /analyze?url=...&top=N.")
     optional.add_argument('-o', '--output-file',
                           metavar='<output_file_path>',
                           help='Output file path.',
@@ -33,9 +65,219 @@ def main():
                           help='Count of top words.',
                           type=int,
                           default=10)
+    optional.add_argument('--stream',
+                          action='store_true',
+                          help="Read and analyze the page in chunks, without keeping it in memory.",
+                          default=False)
+    optional.add_argument('--workers',
+                          metavar='<count>',
+                          help='Count of URLs (or local files) analyzed concurrently in batch mode.',
+                          type=int,
+                          default=16)
+    optional.add_argument('--connections-per-host',
+                          metavar='<count>',
+                          help='Maximum count of open connections to a single host.',
+                          type=int,
+                          default=4)
+    optional.add_argument('--host-rate',
+                          metavar='<requests_per_second>',
+                          help='Maximum average count of requests per second sent to a single host\n'
+                               '(default - no limit).',
+                          type=float,
+                          default=None)
+    optional.add_argument('--connect-timeout',
+                          metavar='<seconds>',
+                          help='Seconds to wait for a connection to a host.',
+                          type=float,
+                          default=10.0)
+    optional.add_argument('--read-timeout',
+                          metavar='<seconds>',
+                          help='Seconds to wait for every read of a response.',
+                          type=float,
+                          default=30.0)
+    optional.add_argument('--retries',
+                          metavar='<count>',
+                          help='Count of retries of a request failing with a connection error, a timeout or a\n'
+                               'temporary error status (429, 5xx), after an exponential backoff.',
+                          type=int,
+                          default=2)
+    optional.add_argument('--hedge-percentile',
+                          metavar='<percentile>',
+                          help="Send a duplicate request when no response arrived within this percentile of the\n"
+                               "recent latencies of the host, e.g. 95, the first response wins (default - disabled).",
+                          type=float,
+                          default=None)
+    optional.add_argument('--processes',
+                          metavar='<count>',
+                          help='Count of worker processes cleaning and counting pages in batch mode (0 - disabled).',
+                          type=int,
+                          default=0)
+    optional.add_argument('--cache-dir',
+                          metavar='<cache_dir_path>',
+                          help='Directory of the HTTP response cache, unchanged pages are not downloaded again.',
+                          default=os.path.join(os.path.expanduser("~"), ".cache", "interview_task"))
+    optional.add_argument('--cache-size',
+                          metavar='<megabytes>',
+                          help='Maximum size of the HTTP response cache in megabytes.',
+                          type=int,
+                          default=256)
+    optional.add_argument('--no-cache',
+                          action='store_true',
+                          help="Do not use the HTTP response cache.",
+                          default=False)
+    optional.add_argument('--memo-dir',
+                          metavar='<memo_dir_path>',
+                          help='Directory where counted words are memoized by page content hash, so identical\n'
+                               'pages are cleaned and counted only once across runs.',
+                          default=None)
+    optional.add_argument('--compact-total',
+                          action='store_true',
+                          help="Count the words of all URLs in a compact vocabulary (batch mode), which needs\n"
+                               "several times less memory for huge vocabularies.",
+                          default=False)
+    optional.add_argument('--sketch-error',
+                          metavar='<fraction>',
+                          help="Count the words of all URLs approximately in fixed memory (batch, crawl and local\n"
+                               "files modes), counts are at most this fraction of all words too high, e.g. 0.0001.\n"
+                               "Only the top words are known, with their error bounds.",
+                          type=float,
+                          default=None)
+    optional.add_argument('--sketch-confidence',
+                          metavar='<probability>',
+                          help="Probability that an approximate count is within --sketch-error.",
+                          type=float,
+                          default=0.99)
+    optional.add_argument('--store',
+                          metavar='<store_dir_path>',
+                          help='Count store where the frequency table of every analyzed page is saved, a page\n'
+                               'analyzed again replaces its previous table. Query it with --query-store.',
+                          default=None)
+    optional.add_argument('--engine',
+                          choices=ENGINES,
+                          help="Word counting engine, numpy counts in vectorized batches if NumPy is installed "
+                               "(currently slower than python).",
+                          default='python')
+    optional.add_argument('--unicode-punctuation',
+                          action='store_true',
+                          help="Remove all Unicode punctuation marks (e.g. curly quotes, dashes), not only ASCII ones.",
+                          default=False)
+    optional.add_argument('--max-depth',
+                          metavar='<count>',
+                          help='Maximum number of links followed from a start URL in crawl mode.',
+                          type=int,
+                          default=3)
+    optional.add_argument('--max-pages',
+                          metavar='<count>',
+                          help='Maximum number of pages fetched in crawl mode.',
+                          type=int,
+                          default=1000)
+    optional.add_argument('--max-megabytes',
+                          metavar='<megabytes>',
+                          help='Maximum number of megabytes fetched in crawl mode.',
+                          type=int,
+                          default=100)
+    optional.add_argument('--result-ttl',
+                          metavar='<seconds>',
+                          help='Seconds a result is served from the result cache in server mode (0 - disabled).',
+                          type=float,
+                          default=60.0)
+    optional.add_argument('--profile',
+                          metavar='<profile_file_path>',
+                          help='Record time, input and output size and memory peak of every fetching, cleaning\n'
+                               'and counting stage and save them to this file.',
+                          default=None)
+    optional.add_argument('--profile-format',
+                          choices=('jsonl', 'prometheus'),
+                          help="Format of the profile, a JSON object per stage run or a Prometheus text\n"
+                               "exposition summary per stage.",
+                          default='jsonl')
+    optional.add_argument('--profile-no-memory',
+                          action='store_true',
+                          help="Do not measure memory peaks in the profile, tracemalloc slows the program down.",
+                          default=False)
     args = parser.parse_args()
 
-    CountWordsFromUrl(args.url, args.output_file).save_top_words_to_file(args.number_of_words, args.show)
+    # Tools are imported only by the mode which uses them, short runs should not pay for the HTTP stack.
+    if args.query_store:
+        from tools.count_store import CountStore
+        CountStore(args.query_store).save_top_words_to_file(args.output_file, args.number_of_words, args.show)
+        return
+    engine = resolve_engine(args.engine)
+    character_stripper = None
+    if args.unicode_punctuation:
+        from tools.char_classes import CharacterStripper
+        character_stripper = CharacterStripper(unicode_categories=('P',))
+    profiler = None
+    if args.profile:
+        from tools.profiler import StageProfiler
+        # A server runs indefinitely, only its most recent records are kept, the summary covers all of them.
+        profiler = StageProfiler(track_memory=not args.profile_no_memory,
+                                 max_records=SERVER_PROFILE_RECORDS if args.serve else None)
+    store = None
+    if args.store:
+        from tools.count_store import CountStore
+        store = CountStore(args.store)
+
+    cache = None
+    scheduler = None
+    if args.path:
+        from tools.local_files import LocalFilesWordCounter, iter_local_files
+        local_handler = LocalFilesWordCounter(args.output_file, args.workers, processes=args.processes,
+                                              character_stripper=character_stripper,
+                                              compact_total=args.compact_total, engine=engine, store=store,
+                                              profiler=profiler, sketch_error=args.sketch_error,
+                                              sketch_confidence=args.sketch_confidence)
+        local_handler.save_results_to_file(iter_local_files(args.path), args.number_of_words, args.show)
+    else:
+        from tools.memo import CountMemo
+        memo = CountMemo(cache_dir=args.memo_dir)
+        if not args.no_cache:
+            from tools.http_cache import HTTPResponseCache
+            cache = HTTPResponseCache(args.cache_dir, args.cache_size * 2 ** 20)
+        from tools.fetch_scheduler import FetchScheduler
+        scheduler = FetchScheduler(args.connections_per_host, args.host_rate, connect_timeout=args.connect_timeout,
+                                   read_timeout=args.read_timeout, retries=args.retries,
+                                   hedge_percentile=args.hedge_percentile, num_pools=max(10, args.workers))
+        if args.crawl:
+            from tools.crawler import SiteCrawler
+            crawler = SiteCrawler(args.output_file, args.workers, args.connections_per_host, args.max_depth,
+                                  args.max_pages, args.max_megabytes * 2 ** 20, http=scheduler, cache=cache,
+                                  character_stripper=character_stripper, compact_total=args.compact_total,
+                                  engine=engine, store=store, profiler=profiler, sketch_error=args.sketch_error,
+                                  sketch_confidence=args.sketch_confidence)
+            crawler.save_results_to_file(args.crawl, args.number_of_words, args.show)
+        elif args.serve:
+            from tools.server import AnalysisService, serve
+            service = AnalysisService(args.workers, args.connections_per_host, http=scheduler, cache=cache, memo=memo,
+                                      character_stripper=character_stripper, engine=engine, profiler=profiler,
+                                      result_ttl=args.result_ttl)
+            serve(args.serve, service, verbose=args.show)
+        elif args.input_file:
+            from tools.batch import BatchWordCounter, read_urls
+            batch_handler = BatchWordCounter(args.output_file, args.workers, args.connections_per_host, args.stream,
+                                             http=scheduler, processes=args.processes, cache=cache, memo=memo,
+                                             character_stripper=character_stripper,
+                                             compact_total=args.compact_total, engine=engine, store=store,
+                                             profiler=profiler, sketch_error=args.sketch_error,
+                                             sketch_confidence=args.sketch_confidence)
+            batch_handler.save_results_to_file(read_urls(args.input_file), args.number_of_words, args.show)
+        else:
+            from tools.interview_tools import CountWordsFromUrl
+            count_handler = CountWordsFromUrl(args.url, args.output_file, args.stream, http=scheduler, cache=cache,
+                                              memo=memo, character_stripper=character_stripper, engine=engine,
+                                              profiler=profiler)
+            count_handler.save_top_words_to_file(args.number_of_words, args.show)
+            if store is not None:
+                store.add_document(args.url, count_handler.get_dict_with_counted_words())
+    if profiler is not None:
+        profiler.write(args.profile, args.profile_format)
+    if cache is not None:
+        cache.close()
+        if args.show:
+            print("Cache: {hits} hits, {misses} misses, {revalidations} revalidations".format(**cache.stats()))
+    if scheduler is not None and args.show:
+        for row in scheduler.format_stats():
+            print(row)
 
 
 if __name__ == '__main__':
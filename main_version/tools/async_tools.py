@@ -0,0 +1,262 @@
+import asyncio
+import ssl
+import urllib.parse
+import zlib
+from .charset import decode_html
+from .interview_tools import HTMLContentCleaner, CountWordsFromUrl
+
+
+class AsyncFetchError(Exception):
+    pass
+
+
+class AsyncHTTPResponse:
+    """
+    Response returned by AsyncFetcher.
+    """
+
+    def __init__(self, url: str, status: int, headers: dict, data: bytes):
+        """
+        Initializes the AsyncHTTPResponse instance.
+
+        :param url: The URL the response was received from, after redirects.
+        :type url: str
+        :param status: The HTTP status code.
+        :type status: int
+        :param headers: Response headers with lowercased names.
+        :type headers: dict
+        :param data: The response body, decompressed.
+        :type data: bytes
+        """
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.data = data
+
+
+class AsyncFetcher:
+    """
+    Minimal asyncio HTTP/1.1 client used to download many pages on one event loop.
+    gzip and deflate compressed responses are accepted and decompressed.
+
+    The number of requests in flight is bounded by a semaphore and every request has its own timeout.
+    Requests can be cancelled like any other asyncio task, the connection is closed in that case.
+    """
+
+    redirect_statuses = (301, 302, 303, 307, 308)
+
+    def __init__(self, max_concurrency: int = 100, timeout: float = 30.0, max_redirects: int = 3):
+        """
+        Initializes the AsyncFetcher instance.
+
+        :param max_concurrency: The maximum number of requests in flight. Default is 100.
+        :type max_concurrency: int
+        :param timeout: Timeout in seconds of a single request, including reading the body. Default is 30.0.
+        :type timeout: float
+        :param max_redirects: The maximum number of followed redirects. Default is 3.
+        :type max_redirects: int
+        """
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+        self._semaphore = None
+        self._ssl_context = None
+
+    async def fetch(self, url: str):
+        """
+        Downloads the given URL.
+
+        :param url: The http or https URL.
+        :type url: str
+        :return(AsyncHTTPResponse): The response.
+        :raise: AsyncFetchError: If the request fails or times out.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            for _ in range(self.max_redirects + 1):
+                try:
+                    response = await asyncio.wait_for(self._request(url), self.timeout)
+                except asyncio.TimeoutError:
+                    raise AsyncFetchError(f"request to {url} timed out after {self.timeout} s") from None
+                except (OSError, asyncio.IncompleteReadError, ValueError, zlib.error) as err:
+                    raise AsyncFetchError(f"request to {url} failed, reason {err!r}") from err
+                location = response.headers.get('location')
+                if response.status not in self.redirect_statuses or not location:
+                    return response
+                url = urllib.parse.urljoin(url, location)
+            raise AsyncFetchError(f"request to {url} exceeded {self.max_redirects} redirects")
+
+    async def fetch_many(self, urls):
+        """
+        Downloads all given URLs concurrently.
+
+        :param urls: An iterable of URLs.
+        :type urls: Iterable[str]
+        :return(list): AsyncHTTPResponse or AsyncFetchError instance for every URL, in the input order.
+        """
+        return await asyncio.gather(*(self.fetch(url) for url in urls), return_exceptions=True)
+
+    async def _request(self, url: str):
+        """
+        Sends a single GET request and reads the whole response.
+        """
+        url_parts = urllib.parse.urlsplit(url)
+        if url_parts.scheme not in ('http', 'https') or not url_parts.hostname:
+            raise ValueError(f"unsupported URL {url}")
+        ssl_context = None
+        if url_parts.scheme == 'https':
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            ssl_context = self._ssl_context
+        port = url_parts.port or (443 if ssl_context else 80)
+        path = url_parts.path or '/'
+        if url_parts.query:
+            path += '?' + url_parts.query
+        reader, writer = await asyncio.open_connection(url_parts.hostname, port, ssl=ssl_context)
+        try:
+            writer.write((f"GET {path} HTTP/1.1\r\n"
+                          f"Host: {url_parts.netloc}\r\n"
+                          "Accept: */*\r\n"
+                          "Accept-Encoding: gzip, deflate\r\n"
+                          "Connection: close\r\n\r\n").encode('latin-1'))
+            await writer.drain()
+            status_line = (await reader.readline()).decode('latin-1').split(None, 2)
+            if len(status_line) < 2 or not status_line[0].startswith('HTTP/'):
+                raise ValueError(f"invalid status line {status_line}")
+            status = int(status_line[1])
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            if 'chunked' in headers.get('transfer-encoding', '').lower():
+                data = await self._read_chunked(reader)
+            elif 'content-length' in headers:
+                data = await reader.readexactly(int(headers['content-length']))
+            else:
+                data = await reader.read()
+            return AsyncHTTPResponse(url, status, headers, self._decompress(data, headers.get('content-encoding')))
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    @staticmethod
+    def _decompress(data: bytes, content_encoding: str = None):
+        """
+        Decompresses a body sent with gzip or deflate content encoding.
+        """
+        content_encoding = (content_encoding or '').strip().lower()
+        if content_encoding in ('gzip', 'x-gzip'):
+            return zlib.decompress(data, 16 + zlib.MAX_WBITS)
+        if content_encoding == 'deflate':
+            # Some servers send a raw deflate stream instead of the zlib format required by the standard.
+            try:
+                return zlib.decompress(data)
+            except zlib.error:
+                return zlib.decompress(data, -zlib.MAX_WBITS)
+        return data
+
+    @staticmethod
+    async def _read_chunked(reader: asyncio.StreamReader):
+        """
+        Reads a body sent with chunked transfer encoding.
+        """
+        chunks = []
+        while True:
+            size_line = await reader.readline()
+            chunk_size = int(size_line.split(b';', 1)[0].strip(), 16)
+            if chunk_size == 0:
+                while await reader.readline() not in (b'\r\n', b'\n', b''):
+                    pass
+                return b''.join(chunks)
+            chunks.append(await reader.readexactly(chunk_size))
+            await reader.readexactly(2)
+
+
+class AsyncCountWordsFromUrl(CountWordsFromUrl):
+    """
+    CountWordsFromUrl counterpart for asyncio applications. The page is downloaded with AsyncFetcher,
+    cleaning and counting are inherited from CountWordsFromUrl.
+
+    Instances should be created with: await AsyncCountWordsFromUrl.create(url, result_file)
+    """
+
+    def __init__(self, web_url: str, result_file: str, page_content: str = None):
+        """
+        Initializes the AsyncCountWordsFromUrl instance with already downloaded content, see create().
+
+        :param web_url: The URL of the web page.
+        :type web_url: str
+        :param result_file: The file path where the results will be saved.
+        :type result_file: str
+        :param page_content: The downloaded page, None if the download failed.
+        :type page_content: str
+        """
+        self.page_content = page_content
+        super().__init__(web_url, result_file)
+
+    def get_web_content(self):
+        """
+        Uses the content downloaded by create() instead of a blocking request.
+
+        :return:
+            (str): The web content as a string if the request was successful.
+            (bool): False if the request failed.
+        """
+        if self.page_content is None:
+            return False
+        self.web_content = self.page_content
+        return self.web_content
+
+    @classmethod
+    async def create(cls, web_url: str, result_file: str, fetcher: AsyncFetcher = None):
+        """
+        Downloads and decodes the page without blocking the event loop. As in CountWordsFromUrl, the content
+        is cleaned and counted later, on the first access to the content or the counts. request_failed is set
+        if the download failed.
+
+        :param web_url: The URL of the web page.
+        :type web_url: str
+        :param result_file: The file path where the results will be saved.
+        :type result_file: str
+        :param fetcher: Fetcher shared between many instances. Default is None, which creates a new one.
+        :type fetcher: AsyncFetcher
+        :return(AsyncCountWordsFromUrl): The created instance.
+        :raise: InvalidUrlError: If the URL format is invalid.
+        """
+        HTMLContentCleaner(web_url, result_file).check_url()
+        if fetcher is None:
+            fetcher = AsyncFetcher()
+        try:
+            response = await fetcher.fetch(web_url)
+            page_content = decode_html(response.data, response.headers.get('content-type'))
+        except AsyncFetchError as err:
+            print(f"http/https GET request failed, reason {err}")
+            page_content = None
+        count_handler = cls(web_url, result_file, page_content)
+        count_handler.request_failed = page_content is None
+        return count_handler
+
+    @classmethod
+    async def create_many(cls, web_urls, result_file: str, fetcher: AsyncFetcher = None):
+        """
+        Downloads and analyzes many pages concurrently.
+
+        :param web_urls: An iterable of URLs.
+        :type web_urls: Iterable[str]
+        :param result_file: The file path where the results will be saved.
+        :type result_file: str
+        :param fetcher: Fetcher bounding the concurrency. Default is None, which creates a new one.
+        :type fetcher: AsyncFetcher
+        :return(list): AsyncCountWordsFromUrl or InvalidUrlError instance for every URL, in the input order.
+        """
+        if fetcher is None:
+            fetcher = AsyncFetcher()
+        return await asyncio.gather(*(cls.create(web_url, result_file, fetcher) for web_url in web_urls),
+                                    return_exceptions=True)
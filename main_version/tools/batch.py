@@ -0,0 +1,252 @@
+import concurrent.futures
+import sys
+import threading
+from .interview_tools import HTMLContentCleaner, CountWordsFromUrl, InvalidUrlError
+from .parallel import ParallelWordCounter
+from .word_counter import WordCounter
+from .profiler import NULL_PROFILER
+from .vocabulary import CompactVocabulary
+from .sketch import SketchWordCounter, format_heavy_hitters
+from .top_k import format_top_words
+
+
+def read_urls(input_file: str):
+    """
+    Reads URLs from a file, one URL per line. Empty lines and lines starting with '#' are skipped.
+
+    :param input_file: The path of the file with URLs, '-' means standard input.
+    :type input_file: str
+    :return(generator): Yields URLs.
+    """
+    handle = sys.stdin if input_file == '-' else open(input_file, 'r')
+    try:
+        for line in handle:
+            url = line.strip()
+            if url and not url.startswith('#'):
+                yield url
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+class UrlResult:
+    """
+    Result of analysis of a single URL from a batch.
+    """
+
+    def __init__(self, url: str, word_counter: WordCounter = None, error: str = None):
+        """
+        Initializes the UrlResult instance.
+
+        :param url: The analyzed URL.
+        :type url: str
+        :param word_counter: Counted words, None if the analysis failed.
+        :type word_counter: WordCounter
+        :param error: Reason of the failure, None if the analysis succeeded.
+        :type error: str
+        """
+        self.url = url
+        self.word_counter = word_counter
+        self.error = error
+
+
+class BatchWordCounter:
+    """
+    Analyzes many URLs concurrently through one shared connection pool.
+    """
+
+    source_label = "URL"
+
+    def __init__(self, result_file: str, max_workers: int = 16, max_connections_per_host: int = 4,
+                 stream: bool = False, http=None, processes: int = 0, cache=None, memo=None,
+                 character_stripper=None, compact_total: bool = False, engine: str = 'python', store=None,
+                 profiler=None, sketch_error: float = None, sketch_confidence: float = 0.99):
+        """
+        Initializes the BatchWordCounter instance.
+
+        :param result_file: The file path where the results will be saved.
+        :type result_file: str
+        :param max_workers: The number of URLs processed at the same time. Default is 16.
+        :type max_workers: int
+        :param max_connections_per_host: The maximum number of open connections to a single host. Default is 4.
+        :type max_connections_per_host: int
+        :param stream: If True, pages are analyzed in chunks, see CountWordsFromUrl. Default is False.
+        :type stream: bool
+        :param http: Connection pool to use instead of a new one, e.g. a FetchScheduler adding timeouts, retries,
+            rate limits and hedging per host. Default is None.
+        :type http: urllib3.PoolManager
+        :param processes: If greater than 0, fetched pages are cleaned and counted by this number of worker
+            processes instead of the fetching threads. Default is 0.
+        :type processes: int
+        :param cache: Persistent response cache shared by all fetching threads. Default is None.
+        :type cache: HTTPResponseCache
+        :param memo: Memo of counted words shared by all fetching threads, not used together with processes.
+            Default is None.
+        :type memo: CountMemo
+        :param character_stripper: Punctuation marks and special characters removed from the pages.
+            Default is None, which means ASCII punctuation marks.
+        :type character_stripper: CharacterStripper
+        :param compact_total: If True, the words of all URLs combined are counted in a CompactVocabulary
+            instead of a dictionary, which needs several times less memory for huge vocabularies. Default is False.
+        :type compact_total: bool
+        :param engine: Counting engine of single pages, 'python' or 'numpy'. Default is 'python'.
+        :type engine: str
+        :param store: Persistent store where the frequency table of every analyzed URL is saved. Default is None.
+        :type store: CountStore
+        :param profiler: Records time, sizes and memory of the stages of every URL. Default is None.
+        :type profiler: StageProfiler
+        :param sketch_error: If set, the words of all URLs combined are counted approximately in a
+            SketchWordCounter of fixed size, whose counts are at most this fraction of all words too high.
+            Default is None, which means exact counting.
+        :type sketch_error: float
+        :param sketch_confidence: The probability that an approximate count is within sketch_error. Default is 0.99.
+        :type sketch_confidence: float
+        """
+        self.result_file = result_file
+        self.max_workers = max_workers
+        self.stream = stream
+        self.max_connections_per_host = max_connections_per_host
+        self._http = http
+        self._http_lock = threading.Lock()
+        self.cache = cache
+        self.memo = memo
+        self.character_stripper = character_stripper
+        self.engine = engine
+        self.store = store
+        self.profiler = profiler or NULL_PROFILER
+        self.parallel_counter = None
+        if processes > 0:
+            self.parallel_counter = ParallelWordCounter(processes, character_stripper=character_stripper)
+        if sketch_error is not None:
+            self.total_counter = SketchWordCounter(sketch_error, sketch_confidence)
+        else:
+            self.total_counter = CompactVocabulary() if compact_total else WordCounter()
+        self.analyzed_count = 0
+        self.failed_count = 0
+
+    @property
+    def http(self):
+        """
+        The shared connection pool, created on first use, so runs which fetch nothing never import urllib3.
+        """
+        with self._http_lock:
+            if self._http is None:
+                import urllib3
+                self._http = urllib3.PoolManager(num_pools=max(10, self.max_workers),
+                                                 maxsize=self.max_connections_per_host,
+                                                 block=True)
+            return self._http
+
+    def analyze_url(self, url: str):
+        """
+        Fetches and counts words of a single URL.
+
+        :param url: The URL of the web page.
+        :type url: str
+        :return(UrlResult): The result of the analysis.
+        """
+        if self.parallel_counter is not None:
+            return self._analyze_url_in_processes(url)
+        try:
+            count_handler = CountWordsFromUrl(url, self.result_file, self.stream, self.http, self.cache, self.memo,
+                                              self.character_stripper, self.engine, self.profiler)
+        except InvalidUrlError:
+            return UrlResult(url, error="invalid URL format")
+        word_counter = count_handler.word_counter
+        if word_counter is None or count_handler.request_failed:
+            return UrlResult(url, error="request failed")
+        return UrlResult(url, word_counter)
+
+    def _analyze_url_in_processes(self, url: str):
+        """
+        Fetches the raw page and passes it to the worker processes.
+        """
+        cleaner = HTMLContentCleaner(url, self.result_file, http=self.http, cache=self.cache, profiler=self.profiler)
+        try:
+            raw_content = cleaner.get_raw_web_content()
+        except InvalidUrlError:
+            return UrlResult(url, error="invalid URL format")
+        if raw_content is False:
+            return UrlResult(url, error="request failed")
+        if cleaner.detect_charset(raw_content) != 'utf-8':
+            # The worker processes split and decode UTF-8 documents.
+            raw_content = cleaner.decode_web_content(raw_content).encode()
+        return UrlResult(url, self.parallel_counter.count_document(raw_content))
+
+    def iter_results(self, urls):
+        """
+        Analyzes URLs concurrently. Only a bounded number of URLs is scheduled at once,
+        so arbitrarily long URL lists can be processed.
+
+        :param urls: An iterable of URLs.
+        :type urls: Iterable[str]
+        :return(generator): Yields UrlResult instances in completion order.
+        """
+        urls = iter(urls)
+        max_pending = self.max_workers * 2
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = set()
+            for url in urls:
+                pending.add(executor.submit(self.analyze_url, url))
+                if len(pending) >= max_pending:
+                    done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    yield from self._collect(done)
+            while pending:
+                done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                yield from self._collect(done)
+        if self.parallel_counter is not None:
+            self.parallel_counter.close()
+
+    def _collect(self, done_futures):
+        """
+        Merges finished results into the total counter and the store.
+        """
+        for future in done_futures:
+            result = future.result()
+            if result.error is None:
+                self.analyzed_count += 1
+                self.total_counter.merge(result.word_counter)
+                if self.store is not None:
+                    self.store.add_document(result.url, result.word_counter.counts)
+            else:
+                self.failed_count += 1
+            yield result
+
+    def save_results_to_file(self, urls, top_count: int = 10, print_to_console: bool = False):
+        """
+        Analyzes URLs and saves the top words of every URL followed by the top words of all URLs combined.
+
+        :param urls: An iterable of URLs.
+        :type urls: Iterable[str]
+        :param top_count: The number of top words to save per URL and in total. Default is 10.
+        :type top_count: int
+        :param print_to_console: If True, prints the results to the console. Default is False.
+        :type print_to_console: bool
+        :return: The path to the result file.
+        """
+        with open(self.result_file, 'w') as f:
+            for result in self.iter_results(urls):
+                rows = [f"{self.source_label}: {result.url}"]
+                if result.error is None:
+                    rows.extend(format_top_words(result.word_counter.most_common(top_count)))
+                else:
+                    rows.append(f"ERROR: {result.error}")
+                self._write_rows(f, rows, print_to_console)
+            rows = [f"TOTAL: {self.analyzed_count} analyzed, {self.failed_count} failed"]
+            if isinstance(self.total_counter, SketchWordCounter):
+                rows.extend(format_heavy_hitters(self.total_counter.heavy_hitters(top_count)))
+            else:
+                rows.extend(format_top_words(self.total_counter.most_common(top_count)))
+            self._write_rows(f, rows, print_to_console)
+        return self.result_file
+
+    @staticmethod
+    def _write_rows(handle, rows: list, print_to_console: bool):
+        """
+        Writes rows followed by an empty line.
+        """
+        for row in rows:
+            if print_to_console:
+                print(row)
+            handle.write(row + '\n')
+        handle.write('\n')
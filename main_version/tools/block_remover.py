@@ -0,0 +1,172 @@
+import re
+
+_TAG_NAME_OPENER = re.compile(r'<[A-Za-z][\w-]*\Z')
+
+KEEP = 'keep'
+DROP = 'drop'
+
+
+class BlockRemover:
+    """
+    Removes blocks delimited by (left, right) pairs, e.g. comments, scripts and styles, in one linear scan.
+
+    Rules:
+        - delimiters are matched ASCII case-insensitively, so '<script' also matches '<SCRIPT',
+        - an opener which looks like a tag name (e.g. '<script' or '<head') only matches if it is followed
+          by whitespace, '/' or '>', so '<script type="module">' is a block while '<header>' is not,
+        - a block ends at the first right delimiter of its pair, blocks are not nested (as in HTML, where
+          '<!-- a <!-- b -->' is a single comment),
+        - blocks are removed together with their delimiters,
+        - an opener without a right delimiter is an unterminated block: with unterminated='keep' it is left
+          in the text, with unterminated='drop' everything from the opener to the end of the text is removed.
+
+    Every right delimiter is searched at most once per position, so many unterminated openers
+    do not make the scan quadratic.
+    """
+
+    def __init__(self, blocks: list, unterminated: str = KEEP):
+        """
+        Initializes the BlockRemover instance.
+
+        :param blocks: A list of (left delimiter, right delimiter) pairs, earlier pairs win if openers overlap.
+        :type blocks: list
+        :param unterminated: 'keep' or 'drop', see the class description. Default is 'keep'.
+        :type unterminated: str
+        """
+        if unterminated not in (KEEP, DROP):
+            raise ValueError(f"Unterminated block handling should be '{KEEP}' or '{DROP}'")
+        for left_d, right_d in blocks:
+            if not left_d or not right_d:
+                raise ValueError("Delimiters should not be empty")
+            if left_d.lower() == right_d.lower():
+                raise ValueError("Left and right delimiter should not be the same")
+        self.blocks = list(blocks)
+        self.unterminated = unterminated
+        self._opener = re.compile('|'.join(self._opener_pattern(left_d) for left_d, _ in self.blocks),
+                                  re.IGNORECASE | re.ASCII)
+        self._pair_indexes = {}
+        for pair_index, (left_d, _) in enumerate(self.blocks):
+            self._pair_indexes.setdefault(left_d.lower(), pair_index)
+        self._closers = [re.compile(re.escape(right_d), re.IGNORECASE | re.ASCII) for _, right_d in self.blocks]
+        self._lower_left_ds = [left_d.lower() for left_d, _ in self.blocks]
+        self._longest_left_d = max(len(left_d) for left_d in self._lower_left_ds)
+        self.opener_prefixes = tuple({first + second for left_d in self._lower_left_ds
+                                      for first in {left_d[0], left_d[0].upper()}
+                                      for second in {left_d[1:2], left_d[1:2].upper()}})
+
+    @staticmethod
+    def is_tag_name_opener(left_d: str):
+        """
+        Checks if the left delimiter looks like a tag name, e.g. '<script', and needs a boundary after it.
+
+        :param left_d: The left delimiter.
+        :type left_d: str
+        :return(bool): True for tag name openers.
+        """
+        return _TAG_NAME_OPENER.match(left_d) is not None
+
+    @classmethod
+    def _opener_pattern(cls, left_d: str):
+        # No capturing groups: they disable the literal prefix search of the regex engine.
+        if cls.is_tag_name_opener(left_d):
+            return re.escape(left_d) + r'(?=[\s/>])'
+        return re.escape(left_d)
+
+    def new_closer_cache(self):
+        """
+        Creates the cache of right delimiter positions used by match_block() during a single scan of a text.
+
+        :return(list): The cache.
+        """
+        return [None] * len(self.blocks)
+
+    def _find_closer(self, text: str, pair_index: int, start: int, closer_cache: list):
+        """
+        Finds the right delimiter of the pair at or after start, reusing the previous search of the scan.
+
+        :return(int): Position right after the right delimiter, or -1 if there is none.
+        """
+        cached = closer_cache[pair_index] if closer_cache is not None else None
+        if cached is not None:
+            searched_from, found = cached
+            if searched_from <= start and (found is None or found.start() >= start):
+                return -1 if found is None else found.end()
+        found = self._closers[pair_index].search(text, start)
+        if closer_cache is not None:
+            closer_cache[pair_index] = (start, found)
+        return -1 if found is None else found.end()
+
+    def match_block(self, text: str, index: int, final: bool = True, closer_cache: list = None):
+        """
+        Checks if a block starts at the given index.
+
+        :param text: The text.
+        :type text: str
+        :param index: The checked position.
+        :type index: int
+        :param final: False if more text may follow, then undecidable positions are reported. Default is True.
+        :type final: bool
+        :param closer_cache: Cache created by new_closer_cache(), shared by calls with increasing indexes
+            on the same text. Default is None.
+        :type closer_cache: list
+        :return(int): Position right after the block, -1 if no block starts at the index,
+            or None if it can't be decided before more text is available.
+        """
+        opener = self._opener.match(text, index)
+        if opener is None:
+            if not final and len(text) - index <= self._longest_left_d:
+                tail = text[index:].lower()
+                if any(left_d.startswith(tail) for left_d in self._lower_left_ds):
+                    return None
+            return -1
+        block_end = self._find_closer(text, self._pair_indexes[opener.group().lower()], opener.end(), closer_cache)
+        if block_end != -1:
+            return block_end
+        if not final:
+            return None
+        return len(text) if self.unterminated == DROP else -1
+
+    def right_delimiter(self, text: str, index: int):
+        """
+        Retrieves the right delimiter pattern of the block opened at the given index.
+
+        :param text: The text.
+        :type text: str
+        :param index: Position of an opener.
+        :type index: int
+        :return: Compiled case-insensitive pattern of the right delimiter, or None if no opener is there.
+        """
+        opener = self._opener.match(text, index)
+        if opener is None:
+            return None
+        return self._closers[self._pair_indexes[opener.group().lower()]]
+
+    def remove(self, text: str):
+        """
+        Removes all blocks from the text.
+
+        :param text: The input text.
+        :type text: str
+        :return(str): The text without the blocks.
+        """
+        result_content = []
+        closer_cache = self.new_closer_cache()
+        search_opener = self._opener.search
+        position = 0
+        search_from = 0
+        while True:
+            opener = search_opener(text, search_from)
+            if opener is None:
+                break
+            block_end = self._find_closer(text, self._pair_indexes[opener.group().lower()], opener.end(), closer_cache)
+            if block_end == -1:
+                if self.unterminated == DROP:
+                    result_content.append(text[position:opener.start()])
+                    position = len(text)
+                    break
+                search_from = opener.start() + 1
+                continue
+            result_content.append(text[position:opener.start()])
+            position = search_from = block_end
+        result_content.append(text[position:])
+        return ''.join(result_content)
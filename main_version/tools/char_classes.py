@@ -0,0 +1,57 @@
+import functools
+import hashlib
+import sys
+import unicodedata
+
+ASCII_PUNCTUATION = '!"#$%&\'()*+,-./:;<=>?@[\\]^_`{|}~'
+
+
+@functools.lru_cache(maxsize=None)
+def unicode_characters(categories: tuple):
+    """
+    Collects all Unicode characters belonging to the given general categories.
+
+    :param categories: Category names or their first letters, e.g. ('P',) for all punctuation or ('Pd', 'Sm').
+    :type categories: tuple
+    :return(str): The characters, computed once per categories tuple.
+    """
+    if not categories:
+        return ''
+    return ''.join(chr(code_point) for code_point in range(sys.maxunicode + 1)
+                   if unicodedata.category(chr(code_point)).startswith(categories))
+
+
+class CharacterStripper:
+    """
+    Removes a configurable set of characters in bulk using precomputed translation tables.
+
+    Text is processed by str.translate, so no Python code runs per character.
+    """
+
+    def __init__(self, characters: str = ASCII_PUNCTUATION, unicode_categories: tuple = ()):
+        """
+        Initializes the CharacterStripper instance.
+
+        :param characters: Characters to remove. Default is ASCII punctuation marks.
+        :type characters: str
+        :param unicode_categories: Unicode general categories removed in addition to the characters,
+            e.g. ('P',) removes all Unicode punctuation and ('P', 'S') also symbols. Default is ().
+        :type unicode_categories: tuple
+        """
+        characters = ''.join(sorted(set(characters + unicode_characters(tuple(unicode_categories)))))
+        self.characters = characters
+        self.table = dict.fromkeys(map(ord, characters))
+        self.fingerprint = hashlib.blake2b(characters.encode(), digest_size=4).hexdigest()
+
+    def strip(self, text: str):
+        """
+        Removes the characters from the text.
+
+        :param text: The input text.
+        :type text: str
+        :return(str): The text without the characters.
+        """
+        return text.translate(self.table)
+
+
+DEFAULT_STRIPPER = CharacterStripper()
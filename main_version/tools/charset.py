@@ -0,0 +1,69 @@
+import codecs
+import re
+
+DEFAULT_CHARSET = 'utf-8'
+# Number of leading bytes searched for a <meta> charset declaration, as in the HTML encoding sniffing algorithm.
+PRESCAN_SIZE = 1024
+
+_BOMS = ((codecs.BOM_UTF8, 'utf-8-sig'), (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16'))
+_CONTENT_TYPE_CHARSET = re.compile(r';\s*charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+# Matches both <meta charset="..."> and <meta http-equiv="Content-Type" content="text/html; charset=...">.
+_META_CHARSET = re.compile(rb'<meta\s[^>]*?charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+# Browsers decode pages labelled as Latin-1 or ASCII as windows-1252, which is a superset of both.
+_CHARSET_OVERRIDES = {'latin-1': 'cp1252', 'iso8859-1': 'cp1252', 'ascii': 'cp1252'}
+
+
+def lookup_charset(label: str):
+    """
+    Resolves a charset label to a Python codec name.
+
+    :param label: The label, e.g. 'UTF-8', 'windows-1250' or 'ISO-8859-1'.
+    :type label: str
+    :return(str): The codec name, None if the label is unknown.
+    """
+    try:
+        name = codecs.lookup(label).name
+    except LookupError:
+        return None
+    return _CHARSET_OVERRIDES.get(name, name)
+
+
+def detect_charset(content_type: str = None, head: bytes = b''):
+    """
+    Detects the charset of an HTML document without decoding it: a byte order mark wins, then the charset
+    parameter of the Content-Type header, then a <meta> declaration in the first PRESCAN_SIZE bytes.
+
+    :param content_type: The Content-Type header of the response. Default is None.
+    :type content_type: str
+    :param head: The document or at least its first PRESCAN_SIZE bytes. Default is b''.
+    :type head: bytes
+    :return(str): The codec name, DEFAULT_CHARSET if no known charset is declared.
+    """
+    for bom, charset in _BOMS:
+        if head.startswith(bom):
+            return charset
+    if content_type:
+        declared = _CONTENT_TYPE_CHARSET.search(content_type)
+        charset = declared and lookup_charset(declared.group(1))
+        if charset:
+            return charset
+    declared = _META_CHARSET.search(head, 0, PRESCAN_SIZE)
+    if declared is not None:
+        charset = lookup_charset(declared.group(1).decode('ascii'))
+        # A document whose <meta> could be read as ASCII is not UTF-16.
+        if charset and not charset.startswith('utf-16'):
+            return charset
+    return DEFAULT_CHARSET
+
+
+def decode_html(raw_content: bytes, content_type: str = None):
+    """
+    Decodes an HTML document with the charset detected by detect_charset(), undecodable bytes are replaced.
+
+    :param raw_content: The document.
+    :type raw_content: bytes
+    :param content_type: The Content-Type header of the response. Default is None.
+    :type content_type: str
+    :return(str): The decoded document.
+    """
+    return raw_content.decode(detect_charset(content_type, raw_content), errors='replace')
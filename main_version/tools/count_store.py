@@ -0,0 +1,475 @@
+import array
+import hashlib
+import heapq
+import itertools
+import json
+import mmap
+import operator
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from .vocabulary import CompactVocabulary
+from .word_counter import WordCounter
+from .top_k import select_top_words, format_top_words
+
+
+class CountStoreFormatError(Exception):
+    pass
+
+
+def counts_digest(counts: dict):
+    """
+    Computes a digest of a frequency table, equal for tables with the same words and counts in any order.
+
+    :param counts: A dictionary where keys are words and values are their counts.
+    :type counts: dict
+    :return(bytes): 16 bytes long BLAKE2b digest.
+    """
+    lines = '\n'.join(f"{word} {count}" for word, count in sorted(counts.items()))
+    return hashlib.blake2b(lines.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+
+class StoredDocument:
+    """
+    Entry of a document in a CountStore.
+    """
+
+    def __init__(self, url: str, content_digest: bytes, timestamp: float, total_words: int, offset: int, size: int):
+        """
+        Initializes the StoredDocument instance.
+
+        :param url: The URL (or path) of the document.
+        :type url: str
+        :param content_digest: The digest of the frequency table, see counts_digest().
+        :type content_digest: bytes
+        :param timestamp: The time the document was stored, in seconds since the epoch.
+        :type timestamp: float
+        :param total_words: The number of words of the document.
+        :type total_words: int
+        :param offset: Position of the record in the log.
+        :type offset: int
+        :param size: Size of the record in bytes.
+        :type size: int
+        """
+        self.url = url
+        self.content_digest = content_digest
+        self.timestamp = timestamp
+        self.total_words = total_words
+        self.offset = offset
+        self.size = size
+
+
+class CountStore:
+    """
+    Persistent, versioned store of the full frequency tables of analyzed documents and their aggregate.
+
+    Files in the store directory:
+        - a log of document records, only ever appended to. A record holds the URL, the digest of the
+          frequency table, the timestamp and the frequency table itself, and refers to the previous record of
+          the same URL which it replaces. Records are checked with CRC32, a torn record at the end of the log
+          (an interrupted write) is dropped when the store is opened.
+        - the aggregate: a CompactVocabulary with the counts of all documents of the log up to the snapshot offset.
+        - index.json: names of the current log and aggregate files, the snapshot offset and the top index_size
+          words of the aggregate.
+
+    Adding a document appends one record, so it costs only the size of that document; an unchanged document
+    (same frequency table as stored) is skipped. Records after the snapshot offset (the tail) are folded into a
+    new aggregate by compact(), which runs automatically once the tail grows beyond compact_ratio of the
+    aggregate, so its cost is amortized over the added documents. Replaced records are dropped from the log
+    when they take more space than the live ones.
+
+    Top-N queries combine the stored top word index with the tail; the aggregate is loaded only if a word
+    outside the index could reach the top N.
+
+    Only one process at a time may write to a store.
+    """
+
+    magic = b'WCLG'
+    version = 1
+    min_compact_size = 2 ** 20
+    _file_header = struct.Struct('<4sB?')
+    _record_crc = struct.Struct('<I')
+    _record_header = struct.Struct('<q16sdQIII')
+
+    def __init__(self, directory: str, index_size: int = 1000, compact_ratio: float = 0.25):
+        """
+        Opens the store, creating it if the directory does not contain one.
+
+        :param directory: The store directory.
+        :type directory: str
+        :param index_size: The number of top words kept in the index. Default is 1000.
+        :type index_size: int
+        :param compact_ratio: The tail is compacted once it is larger than this part of the aggregate size.
+            Default is 0.25.
+        :type compact_ratio: float
+        :raise: CountStoreFormatError: If the store files are not of this version or are corrupted.
+        """
+        self.directory = directory
+        self.index_size = index_size
+        self.compact_ratio = compact_ratio
+        self.documents = {}
+        self._lock = threading.Lock()
+        self._aggregate = None
+        self._tail = []
+        self._dead_size = 0
+        os.makedirs(directory, exist_ok=True)
+        index_path = os.path.join(directory, 'index.json')
+        if os.path.exists(index_path):
+            with open(index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get('version') != self.version:
+                raise CountStoreFormatError(f"{directory} is not a count store of version {self.version}")
+        else:
+            index = {'version': self.version, 'generation': 0, 'log_file': 'documents-0.log', 'aggregate_file': None,
+                     'snapshot_offset': self._file_header.size, 'total_words': 0, 'vocabulary_size': 0,
+                     'top_words': []}
+        self._index = index
+        self._scan_log()
+
+    @property
+    def log_path(self):
+        return os.path.join(self.directory, self._index['log_file'])
+
+    @property
+    def total_words(self):
+        """
+        The number of words of all stored documents.
+        """
+        return sum(document.total_words for document in self.documents.values())
+
+    def _scan_log(self):
+        """
+        Reads the record headers of the log into the documents table and drops a torn record at its end.
+        """
+        if not os.path.exists(self.log_path):
+            if self._index['snapshot_offset'] != self._file_header.size:
+                raise CountStoreFormatError(f"{self.log_path} is missing")
+            with open(self.log_path, 'wb') as f:
+                f.write(self._file_header.pack(self.magic, self.version, sys.byteorder == 'little'))
+        snapshot_offset = self._index['snapshot_offset']
+        with open(self.log_path, 'r+b') as f:
+            file_header = f.read(self._file_header.size)
+            if len(file_header) != self._file_header.size:
+                raise CountStoreFormatError(f"{self.log_path} is too short to be a count store log")
+            magic, version, little_endian = self._file_header.unpack(file_header)
+            if magic != self.magic or version != self.version:
+                raise CountStoreFormatError(f"{self.log_path} is not a count store log of version {self.version}")
+            if little_endian != (sys.byteorder == 'little'):
+                raise CountStoreFormatError(f"{self.log_path} was written on a machine with another byte order")
+            file_size = os.fstat(f.fileno()).st_size
+            offset = self._file_header.size
+            if file_size > offset:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as log:
+                    offset = self._scan_records(log, offset, file_size, snapshot_offset)
+            if offset < file_size:
+                if offset < snapshot_offset:
+                    raise CountStoreFormatError(f"{self.log_path} is corrupted before the snapshot offset")
+                f.truncate(offset)
+        self._log_size = offset
+
+    def _scan_records(self, log, offset: int, file_size: int, snapshot_offset: int):
+        """
+        Registers the records of the memory-mapped log. CRC32 is checked only for the tail, the records before
+        the snapshot offset were checked by compact().
+
+        :return(int): Position right after the last complete record.
+        """
+        crc_size = self._record_crc.size
+        header_size = crc_size + self._record_header.size
+        while offset + header_size <= file_size:
+            replaced_offset, content_digest, timestamp, total_words, url_size, words_size, words_count = \
+                self._record_header.unpack_from(log, offset + crc_size)
+            size = header_size + url_size + words_size + 8 * words_count
+            if offset + size > file_size:
+                break
+            if offset >= snapshot_offset:
+                if zlib.crc32(log[offset + crc_size:offset + size]) != self._record_crc.unpack_from(log, offset)[0]:
+                    break
+                self._tail.append((offset, replaced_offset))
+            url = log[offset + header_size:offset + header_size + url_size].decode('utf-8', 'surrogatepass')
+            self._register(StoredDocument(url, content_digest, timestamp, total_words, offset, size))
+            offset += size
+        return offset
+
+    def _register(self, document: StoredDocument):
+        replaced_document = self.documents.get(document.url)
+        if replaced_document is not None:
+            self._dead_size += replaced_document.size
+        self.documents[document.url] = document
+
+    def _encode_record(self, url: str, counts: dict, content_digest: bytes, timestamp: float, replaced_offset: int):
+        """
+        Encodes a document record: CRC32, header, URL, words separated by line breaks and the array of counts.
+        """
+        words = '\n'.join(counts).encode('utf-8', 'surrogatepass')
+        if words.count(b'\n') != max(len(counts) - 1, 0):
+            raise ValueError("Stored words should not contain line breaks")
+        encoded_url = url.encode('utf-8', 'surrogatepass')
+        body = b''.join((self._record_header.pack(replaced_offset, content_digest, timestamp, sum(counts.values()),
+                                                  len(encoded_url), len(words), len(counts)),
+                         encoded_url, words, array.array('Q', counts.values()).tobytes()))
+        return self._record_crc.pack(zlib.crc32(body)) + body
+
+    def _read_record(self, f, offset: int):
+        """
+        Reads a record from the open log.
+
+        :return(tuple): (URL, dictionary of word counts, record header fields)
+        :raise: CountStoreFormatError: If the record is corrupted.
+        """
+        f.seek(offset)
+        header = f.read(self._record_crc.size + self._record_header.size)
+        crc, = self._record_crc.unpack_from(header)
+        fields = self._record_header.unpack_from(header, self._record_crc.size)
+        _, _, _, _, url_size, words_size, words_count = fields
+        payload = f.read(url_size + words_size + 8 * words_count)
+        if zlib.crc32(payload, zlib.crc32(header[self._record_crc.size:])) != crc:
+            raise CountStoreFormatError(f"Record at {offset} of {self.log_path} is corrupted")
+        url = payload[:url_size].decode('utf-8', 'surrogatepass')
+        words = payload[url_size:url_size + words_size].decode('utf-8', 'surrogatepass').split('\n') \
+            if words_count else []
+        word_counts = array.array('Q')
+        word_counts.frombytes(payload[url_size + words_size:])
+        return url, dict(zip(words, word_counts)), fields
+
+    def add_document(self, url: str, counts: dict, timestamp: float = None):
+        """
+        Stores the frequency table of a document, replacing the previous one of the same URL.
+
+        :param url: The URL (or path) of the document.
+        :type url: str
+        :param counts: A dictionary where keys are words and values are their counts.
+        :type counts: dict
+        :param timestamp: The time of the analysis in seconds since the epoch. Default is None, which means now.
+        :type timestamp: float
+        :return(bool): False if the same frequency table is already stored for the URL, otherwise True.
+        """
+        content_digest = counts_digest(counts)
+        with self._lock:
+            replaced_document = self.documents.get(url)
+            if replaced_document is not None and replaced_document.content_digest == content_digest:
+                return False
+            replaced_offset = -1 if replaced_document is None else replaced_document.offset
+            timestamp = time.time() if timestamp is None else timestamp
+            record = self._encode_record(url, counts, content_digest, timestamp, replaced_offset)
+            with open(self.log_path, 'ab') as f:
+                f.write(record)
+            offset, self._log_size = self._log_size, self._log_size + len(record)
+            self._tail.append((offset, replaced_offset))
+            self._register(StoredDocument(url, content_digest, timestamp, sum(counts.values()), offset, len(record)))
+        self.compact_if_needed()
+        return True
+
+    def get_document(self, url: str):
+        """
+        Reads the stored frequency table of a document.
+
+        :param url: The URL (or path) of the document.
+        :type url: str
+        :return(WordCounter): Counted words, or None if the document is not stored.
+        """
+        document = self.documents.get(url)
+        if document is None:
+            return None
+        with open(self.log_path, 'rb') as f:
+            _, counts, _ = self._read_record(f, document.offset)
+        return WordCounter.from_counts(counts)
+
+    def _load_aggregate(self):
+        """
+        Loads the aggregate of the snapshot, once.
+        """
+        if self._aggregate is None:
+            aggregate_file = self._index['aggregate_file']
+            if aggregate_file is None:
+                self._aggregate = CompactVocabulary()
+            else:
+                self._aggregate = CompactVocabulary.load(os.path.join(self.directory, aggregate_file))
+        return self._aggregate
+
+    def _tail_deltas(self):
+        """
+        Sums the changes of the word counts made by the records after the snapshot.
+
+        :return(dict): A dictionary where keys are words and values are count changes, possibly negative.
+        """
+        deltas = {}
+        get_delta = deltas.get
+        with open(self.log_path, 'rb') as f:
+            for offset, replaced_offset in self._tail:
+                _, counts, _ = self._read_record(f, offset)
+                for word, count in counts.items():
+                    deltas[word] = get_delta(word, 0) + count
+                if replaced_offset != -1:
+                    _, counts, _ = self._read_record(f, replaced_offset)
+                    for word, count in counts.items():
+                        deltas[word] = get_delta(word, 0) - count
+        return deltas
+
+    @staticmethod
+    def _merged_items(aggregate_items, deltas: dict):
+        """
+        Adds count changes to the alphabetically ordered aggregate items, words with no occurrences left are dropped.
+        """
+        merged_items = heapq.merge(aggregate_items, sorted(deltas.items()), key=operator.itemgetter(0))
+        for word, items in itertools.groupby(merged_items, key=operator.itemgetter(0)):
+            count = sum(count for _, count in items)
+            if count > 0:
+                yield word, count
+
+    def total_counter(self):
+        """
+        Builds the aggregate of all stored documents.
+
+        :return(CompactVocabulary): Counted words of all documents.
+        """
+        with self._lock:
+            deltas = self._tail_deltas()
+            return CompactVocabulary.from_sorted_items(self._merged_items(self._load_aggregate().items(), deltas))
+
+    def most_common(self, top_count: int = 10):
+        """
+        Retrieves words with the highest counts in all stored documents.
+
+        :param top_count: The number of top words to retrieve, -1 means all words. Default is 10.
+        :type top_count: int
+        :return(list): A list of (word, count) tuples in descending count order, ties sorted alphabetically.
+        """
+        if top_count > 0:
+            with self._lock:
+                top_words = self._most_common_from_index(top_count, self._tail_deltas())
+            if top_words is not None:
+                return top_words
+        return self.total_counter().most_common(top_count)
+
+    def _most_common_from_index(self, top_count: int, deltas: dict):
+        """
+        Computes the top words from the index of the snapshot and the tail changes.
+
+        Words outside the index have at most the count of the last indexed word (the threshold), words changed
+        by the tail are looked up in the aggregate only if they could reach the top. Must be called with the lock held.
+
+        :return(list): The top words, or None if words outside the index and the tail could reach the top.
+        """
+        top_words = self._index['top_words']
+        complete = self._index['vocabulary_size'] <= len(top_words)
+        if not complete and top_count > len(top_words):
+            return None
+        threshold = 0 if complete else top_words[-1][1]
+        indexed_words = dict(top_words)
+        candidates = {word: count + deltas.get(word, 0) for word, count in top_words}
+        unindexed_words = [word for word in deltas if word not in indexed_words]
+        if not complete:
+            lower_bounds = dict(candidates)
+            lower_bounds.update((word, deltas[word]) for word in unindexed_words)
+            provisional_top = select_top_words({word: count for word, count in lower_bounds.items() if count > 0},
+                                               top_count)
+            if len(provisional_top) < top_count or provisional_top[-1][1] <= threshold:
+                return None
+            kth_count = provisional_top[-1][1]
+            unindexed_words = [word for word in unindexed_words if deltas[word] + threshold >= kth_count]
+            if unindexed_words:
+                aggregate = self._load_aggregate()
+                candidates.update((word, aggregate.count(word) + deltas[word]) for word in unindexed_words)
+        else:
+            candidates.update((word, deltas[word]) for word in unindexed_words)
+        return select_top_words({word: count for word, count in candidates.items() if count > 0}, top_count)
+
+    def compact_if_needed(self):
+        """
+        Compacts the store if the tail is larger than compact_ratio of the aggregate.
+
+        :return(bool): True if the store was compacted.
+        """
+        aggregate_file = self._index['aggregate_file']
+        aggregate_size = 0 if aggregate_file is None else os.path.getsize(os.path.join(self.directory, aggregate_file))
+        if self._log_size - self._index['snapshot_offset'] <= self.compact_ratio * max(aggregate_size,
+                                                                                        self.min_compact_size):
+            return False
+        self.compact()
+        return True
+
+    def compact(self):
+        """
+        Folds the tail into a new aggregate and rebuilds the top word index. The log is rewritten without
+        replaced records if they take more space than the live ones. New files are written first and
+        index.json is replaced last, so an interrupted compaction leaves the previous state intact.
+
+        :return(CountStore): The store instance, to allow chaining.
+        """
+        with self._lock:
+            aggregate = CompactVocabulary.from_sorted_items(
+                self._merged_items(self._load_aggregate().items(), self._tail_deltas()))
+            generation = self._index['generation'] + 1
+            index = dict(self._index, generation=generation, aggregate_file=f"aggregate-{generation}.bin",
+                         total_words=aggregate.total_words, vocabulary_size=len(aggregate),
+                         top_words=aggregate.most_common(min(self.index_size, len(aggregate))))
+            aggregate.save(os.path.join(self.directory, index['aggregate_file']))
+            documents = self.documents
+            if self._dead_size > self._log_size - self._dead_size:
+                index['log_file'] = f"documents-{generation}.log"
+                documents = self._write_live_records(os.path.join(self.directory, index['log_file']))
+                index['snapshot_offset'] = sum(document.size for document in documents.values()) + \
+                    self._file_header.size
+            else:
+                index['snapshot_offset'] = self._log_size
+            self._write_index(index)
+            for file_name in {self._index['aggregate_file'], self._index['log_file']} - \
+                    {index['aggregate_file'], index['log_file'], None}:
+                os.remove(os.path.join(self.directory, file_name))
+            self._index = index
+            self._aggregate = aggregate
+            self.documents = documents
+            self._log_size = index['snapshot_offset']
+            self._tail = []
+            self._dead_size = 0
+        return self
+
+    def _write_live_records(self, path: str):
+        """
+        Writes a new log with the current record of every document.
+
+        :return(dict): The documents table of the new log.
+        """
+        documents = {}
+        offset = self._file_header.size
+        with open(self.log_path, 'rb') as source, open(path, 'wb') as f:
+            f.write(self._file_header.pack(self.magic, self.version, sys.byteorder == 'little'))
+            for url, document in self.documents.items():
+                _, counts, _ = self._read_record(source, document.offset)
+                record = self._encode_record(url, counts, document.content_digest, document.timestamp, -1)
+                f.write(record)
+                documents[url] = StoredDocument(url, document.content_digest, document.timestamp,
+                                                document.total_words, offset, len(record))
+                offset += len(record)
+        return documents
+
+    def _write_index(self, index: dict):
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(file_descriptor, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(temporary_path, os.path.join(self.directory, 'index.json'))
+
+    def save_top_words_to_file(self, result_file: str, top_count: int = 10, print_to_console: bool = False):
+        """
+        Saves the top words of all stored documents to a file.
+
+        :param result_file: The file path where the top words will be saved.
+        :type result_file: str
+        :param top_count: The number of top words to save. Default is 10.
+        :type top_count: int
+        :param print_to_console: If True, prints the top words to the console. Default is False.
+        :type print_to_console: bool
+        :return: The path to the result file.
+        """
+        rows = [f"STORE: {self.directory}", f"TOTAL: {len(self.documents)} documents, {self.total_words} words"]
+        if print_to_console:
+            print('\n'.join(rows))
+        rows.extend(format_top_words(self.most_common(top_count), print_to_console))
+        with open(result_file, 'w') as f:
+            f.write('\n'.join(rows) + '\n')
+        return result_file
@@ -0,0 +1,289 @@
+import collections
+import concurrent.futures
+import hashlib
+import math
+import re
+import urllib.parse
+from .interview_tools import HTMLContentCleaner, InvalidUrlError
+from .batch import BatchWordCounter, UrlResult
+from .word_counter import create_word_counter
+
+# Links to these files are not fetched, they are not HTML pages.
+SKIPPED_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.ico', '.bmp', '.pdf', '.zip', '.gz',
+                      '.tar', '.tgz', '.bz2', '.xz', '.7z', '.exe', '.dmg', '.iso', '.mp3', '.mp4', '.avi', '.mov',
+                      '.webm', '.woff', '.woff2', '.ttf', '.eot', '.css', '.js', '.json', '.xml', '.rss', '.txt')
+_URL_PARTS = re.compile(r'([A-Za-z][A-Za-z0-9+.-]*)://([^/?#\s]*)(?=[/?#]|\Z)([^#]*)')
+_DEFAULT_PORTS = {'http': ':80', 'https': ':443'}
+
+
+class BloomFilter:
+    """
+    Set of strings with a fixed memory footprint and no false negatives.
+
+    A string which was added is always reported as present, a string which was not added is reported as
+    present with a probability of about error_rate as long as no more than capacity strings were added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 1e-4):
+        """
+        Initializes the BloomFilter instance.
+
+        :param capacity: The expected number of added strings.
+        :type capacity: int
+        :param error_rate: The false positive probability at capacity. Default is 0.0001.
+        :type error_rate: float
+        """
+        if capacity <= 0 or not 0 < error_rate < 1:
+            raise ValueError("Capacity should be positive and error rate between 0 and 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.bit_count = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.bit_count / capacity * math.log(2)))
+        self.bits = bytearray((self.bit_count + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        # Double hashing: the k positions are derived from two 64-bit halves of one digest.
+        digest = int.from_bytes(hashlib.blake2b(item.encode('utf-8', 'surrogatepass'), digest_size=16).digest(),
+                                'little')
+        first = digest & 0xFFFFFFFFFFFFFFFF
+        second = (digest >> 64) | 1
+        bit_count = self.bit_count
+        return [position % bit_count for position in range(first, first + self.hash_count * second, second)]
+
+    def add(self, item: str):
+        """
+        Adds a string.
+
+        :param item: The string.
+        :type item: str
+        :return(bool): True if the string was not present before, False if it was (or is a false positive).
+        """
+        added = False
+        bits = self.bits
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                added = True
+        self.count += added
+        return added
+
+    def __contains__(self, item: str):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def __len__(self):
+        return self.count
+
+
+def normalize_url(url: str):
+    """
+    Normalizes a URL for deduplication: the scheme and host are lowercased, the fragment and a default port
+    are removed and an empty path becomes '/'.
+
+    :param url: An absolute URL.
+    :type url: str
+    :return(str): The normalized URL, None if it is not an http(s) URL.
+    """
+    parts = _URL_PARTS.match(url.strip())
+    if parts is None:
+        return None
+    scheme, netloc, path = parts.groups()
+    scheme = scheme.lower()
+    if scheme not in _DEFAULT_PORTS:
+        return None
+    user, at, host = netloc.rpartition('@')
+    host = host.lower()
+    if host.endswith(_DEFAULT_PORTS[scheme]):
+        host = host[:-len(_DEFAULT_PORTS[scheme])]
+    elif host.endswith(':'):
+        host = host[:-1]
+    if not host or host.startswith(':'):
+        return None
+    if not path.startswith('/'):
+        path = '/' + path
+    return f"{scheme}://{user}{at}{host}{path}"
+
+
+class CrawlResult(UrlResult):
+    """
+    Result of analysis of a single crawled page.
+    """
+
+    def __init__(self, url: str, word_counter=None, error: str = None, links: list = None, size: int = 0):
+        """
+        Initializes the CrawlResult instance.
+
+        :param url: The crawled URL.
+        :type url: str
+        :param word_counter: Counted words, None if the analysis failed.
+        :type word_counter: WordCounter
+        :param error: Reason of the failure, None if the analysis succeeded.
+        :type error: str
+        :param links: Absolute URLs of the links of the page. Default is None, which means no links.
+        :type links: list
+        :param size: The number of fetched bytes. Default is 0.
+        :type size: int
+        """
+        super().__init__(url, word_counter, error)
+        self.links = links or []
+        self.size = size
+
+
+class SiteCrawler(BatchWordCounter):
+    """
+    Crawls a site from start URLs and counts the words of its pages.
+
+    Pages are fetched by the threads of BatchWordCounter through its shared connection pool. Links are
+    collected by HTMLTextExtractor in the same pass which cleans the page, only links to the hosts of the
+    start URLs are followed. Visited URLs are deduplicated by a Bloom filter of fixed size and the frontier
+    is a bounded queue, so memory does not grow with the size of the site. Word counts are merged into the
+    total counter as pages finish.
+
+    The crawl stops at max_pages pages or after max_bytes fetched bytes; pages already being fetched
+    when a budget runs out are still counted, so the byte budget may be exceeded by up to max_workers pages.
+    """
+
+    source_label = "PAGE"
+
+    def __init__(self, result_file: str, max_workers: int = 16, max_connections_per_host: int = 4,
+                 max_depth: int = 3, max_pages: int = 1000, max_bytes: int = 100 * 2 ** 20,
+                 max_frontier: int = 100000, http=None, cache=None, character_stripper=None,
+                 compact_total: bool = False, engine: str = 'python', store=None, profiler=None,
+                 sketch_error: float = None, sketch_confidence: float = 0.99):
+        """
+        Initializes the SiteCrawler instance.
+
+        :param result_file: The file path where the results will be saved.
+        :type result_file: str
+        :param max_workers: The number of pages fetched at the same time. Default is 16.
+        :type max_workers: int
+        :param max_connections_per_host: The maximum number of open connections to a single host. Default is 4.
+        :type max_connections_per_host: int
+        :param max_depth: The maximum number of links followed from a start URL. Default is 3.
+        :type max_depth: int
+        :param max_pages: The maximum number of fetched pages. Default is 1000.
+        :type max_pages: int
+        :param max_bytes: The maximum number of fetched bytes. Default is 100 MiB.
+        :type max_bytes: int
+        :param max_frontier: The maximum number of URLs waiting to be fetched, new links are dropped
+            when the frontier is full. Default is 100000.
+        :type max_frontier: int
+        :param http: Connection pool to use instead of a new one. Default is None.
+        :type http: urllib3.PoolManager
+        :param cache: Persistent response cache. Default is None.
+        :type cache: HTTPResponseCache
+        :param character_stripper: Punctuation marks and special characters removed from the pages.
+            Default is None, which means ASCII punctuation marks.
+        :type character_stripper: CharacterStripper
+        :param compact_total: If True, the words of all pages are counted in a CompactVocabulary. Default is False.
+        :type compact_total: bool
+        :param engine: Counting engine of single pages, 'python' or 'numpy'. Default is 'python'.
+        :type engine: str
+        :param store: Persistent store where the frequency table of every page is saved. Default is None.
+        :type store: CountStore
+        :param profiler: Records time, sizes and memory of the stages of every page. Default is None.
+        :type profiler: StageProfiler
+        :param sketch_error: If set, the words of all pages are counted approximately, see BatchWordCounter.
+            Default is None.
+        :type sketch_error: float
+        :param sketch_confidence: The probability that an approximate count is within sketch_error. Default is 0.99.
+        :type sketch_confidence: float
+        """
+        super().__init__(result_file, max_workers, max_connections_per_host, http=http, cache=cache,
+                         character_stripper=character_stripper, compact_total=compact_total, engine=engine,
+                         store=store, profiler=profiler, sketch_error=sketch_error,
+                         sketch_confidence=sketch_confidence)
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self.max_frontier = max_frontier
+        # Every URL marked as visited is either fetched or waiting in the frontier.
+        self.visited = BloomFilter(max_pages + max_frontier)
+        self.allowed_hosts = set()
+        self.scheduled_count = 0
+        self.fetched_bytes = 0
+        self.dropped_count = 0
+
+    def analyze_url(self, url: str):
+        """
+        Fetches, cleans and counts words of a single page and collects its links.
+
+        :param url: The URL of the page.
+        :type url: str
+        :return(CrawlResult): The result of the analysis.
+        """
+        cleaner = HTMLContentCleaner(url, self.result_file, http=self.http, cache=self.cache,
+                                     character_stripper=self.character_stripper, profiler=self.profiler)
+        try:
+            raw_content = cleaner.get_raw_web_content()
+        except InvalidUrlError:
+            return CrawlResult(url, error="invalid URL format")
+        if raw_content is False:
+            return CrawlResult(url, error="request failed")
+        cleaner.web_content = cleaner.decode_web_content(raw_content)
+        hrefs = []
+        cleaner.clean_all(hrefs)
+        with self.profiler.stage('count', url, len(cleaner.web_content)):
+            word_counter = create_word_counter(self.engine).update(cleaner.web_content)
+        links = [urllib.parse.urljoin(url, href) for href in hrefs]
+        return CrawlResult(url, word_counter, links=links, size=len(raw_content))
+
+    def _enqueue(self, frontier: collections.deque, url: str, depth: int):
+        """
+        Adds a URL to the frontier unless it was already seen, leads to another site or the frontier is full.
+        """
+        url = normalize_url(url)
+        if url is None:
+            return
+        _, _, netloc, path = url.split('/', 3)
+        if netloc not in self.allowed_hosts or path.partition('?')[0].lower().endswith(SKIPPED_EXTENSIONS):
+            return
+        if len(frontier) >= self.max_frontier:
+            if url not in self.visited:
+                self.dropped_count += 1
+            return
+        if self.visited.add(url):
+            frontier.append((url, depth))
+
+    def _within_budget(self):
+        return self.scheduled_count < self.max_pages and self.fetched_bytes < self.max_bytes
+
+    def iter_results(self, urls):
+        """
+        Crawls the site breadth first from the start URLs.
+
+        :param urls: An iterable of start URLs, their hosts are the crawled site.
+        :type urls: Iterable[str]
+        :return(generator): Yields CrawlResult instances in completion order.
+        """
+        frontier = collections.deque()
+        for url in urls:
+            normalized_url = normalize_url(url)
+            if normalized_url is None:
+                self.failed_count += 1
+                yield CrawlResult(url, error="invalid URL format")
+                continue
+            self.allowed_hosts.add(normalized_url.split('/', 3)[2])
+            self._enqueue(frontier, normalized_url, 0)
+        max_pending = self.max_workers * 2
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {}
+            while True:
+                while frontier and len(pending) < max_pending and self._within_budget():
+                    url, depth = frontier.popleft()
+                    pending[executor.submit(self.analyze_url, url)] = depth
+                    self.scheduled_count += 1
+                if not pending:
+                    break
+                done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    depth = pending.pop(future)
+                    result = future.result()
+                    self.fetched_bytes += result.size
+                    if depth < self.max_depth:
+                        for link in result.links:
+                            self._enqueue(frontier, link, depth + 1)
+                    result.links = []
+                yield from self._collect(done)
@@ -0,0 +1,439 @@
+import bisect
+import collections
+import math
+import queue
+import random
+import threading
+import time
+
+# Responses worth another attempt: throttling and temporary failures of the server or a gateway.
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+# Upper bounds of the latency histogram buckets in seconds, the last bucket is unbounded.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+
+
+class TokenBucket:
+    """
+    Rate limiter allowing rate requests per second on average and bursts of up to burst requests.
+    """
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        """
+        Initializes the TokenBucket instance, the bucket starts full.
+
+        :param rate: The number of tokens added per second.
+        :type rate: float
+        :param burst: The maximum number of tokens in the bucket. Default is 1.0.
+        :type burst: float
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """
+        Adds the tokens accrued since the last call. Must be called with the lock held.
+        """
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """
+        Takes a token, waiting until it accrues if the bucket is empty. Waiting callers reserve their tokens
+        in arrival order, so the bucket goes below zero instead of being polled.
+
+        :return(float): Seconds waited.
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def try_acquire(self):
+        """
+        Takes a token only if one is available right now.
+
+        :return(bool): True if a token was taken.
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class LatencyHistogram:
+    """
+    Latencies of one host: counts per LATENCY_BUCKETS bucket of all latencies and a window of the most
+    recent ones, from which percentiles are computed.
+    """
+
+    def __init__(self, window: int = 500):
+        """
+        Initializes the LatencyHistogram instance.
+
+        :param window: The number of most recent latencies kept for percentiles. Default is 500.
+        :type window: int
+        """
+        self.bucket_counts = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.total_seconds = 0.0
+        self.recent = collections.deque(maxlen=window)
+
+    def add(self, seconds: float):
+        """
+        Records a latency.
+
+        :param seconds: The latency.
+        :type seconds: float
+        """
+        self.bucket_counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total_seconds += seconds
+        self.recent.append(seconds)
+
+    def percentile(self, percent: float):
+        """
+        Computes a nearest-rank percentile of the recent latencies.
+
+        :param percent: The percentile, from 0 to 100.
+        :type percent: float
+        :return(float): The latency in seconds, None if nothing was recorded.
+        """
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(percent / 100 * len(ordered)) - 1))]
+
+
+class _HostState:
+    """
+    Rate limiter, latencies and counters of one host. Counters are guarded by the lock of the scheduler.
+    """
+
+    def __init__(self, rate: float, burst: float, window: int):
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.latency = LatencyHistogram(window)
+        self.attempts = 0
+        self.failures = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+
+def _close_response(response):
+    """
+    Closes the connection of a response nobody reads, so a slow body is not downloaded for nothing.
+    """
+    if response is not None:
+        response.close()
+        response.release_conn()
+
+
+class _HedgeRace:
+    """
+    Attempts of one hedged request, each running in its own thread. The caller takes outcomes in completion
+    order, responses arriving after finish() are closed.
+    """
+
+    def __init__(self):
+        self._outcomes = queue.Queue()
+        self._lock = threading.Lock()
+        self._finished = False
+
+    def start(self, send, args: tuple, hedge: bool):
+        threading.Thread(target=self._run, args=(send, args, hedge), daemon=True).start()
+
+    def _run(self, send, args: tuple, hedge: bool):
+        try:
+            outcome = (send(*args, hedge=hedge), None, hedge)
+        except Exception as err:
+            outcome = (None, err, hedge)
+        with self._lock:
+            if not self._finished:
+                self._outcomes.put(outcome)
+                return
+        _close_response(outcome[0])
+
+    def wait(self, timeout: float = None):
+        """
+        Waits for the next outcome, a (response, error, hedge) tuple, None if the timeout expired.
+        """
+        try:
+            return self._outcomes.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def finish(self):
+        """
+        Closes the responses received but not taken, later ones are closed by their threads.
+        """
+        with self._lock:
+            self._finished = True
+        while True:
+            try:
+                response = self._outcomes.get_nowait()[0]
+            except queue.Empty:
+                return
+            _close_response(response)
+
+
+class FetchScheduler:
+    """
+    Sends requests with per host limits, deadlines, retries and hedging, so one slow or throttling host
+    does not stall a whole run.
+
+    - concurrency: at most max_connections_per_host connections to a host are open, a request waits for a free
+      one. A connection is busy until its response is read, also when the body is streamed.
+    - rate: with requests_per_second, requests to a host are spaced by a token bucket allowing bursts of burst.
+    - deadlines: every attempt has connect_timeout to connect and read_timeout for every read from the socket.
+    - retries: connection errors, timeouts and RETRY_STATUSES responses are retried up to retries times after
+      an exponential backoff with jitter, or after the Retry-After delay of the response if it is longer.
+      Errors while a streamed body is read are not retried, the response is already returned.
+    - hedging: with hedge_percentile, a duplicate of an attempt is sent when no response arrived within that
+      percentile of the recent latencies of the host, and the first response wins. A duplicate is sent only
+      if a connection and a rate token are free right away, so hedging never queues behind other requests.
+
+    Latencies (until the response is returned, for streamed bodies until the headers) of every attempt
+    are kept per host. request() has the signature of urllib3.PoolManager.request, so a FetchScheduler
+    can be passed as the connection pool of HTMLContentCleaner, CountWordsFromUrl, BatchWordCounter,
+    SiteCrawler or AnalysisService.
+    """
+
+    def __init__(self, max_connections_per_host: int = 4, requests_per_second: float = None, burst: float = 1.0,
+                 connect_timeout: float = 10.0, read_timeout: float = 30.0, retries: int = 2, backoff: float = 0.5,
+                 max_backoff: float = 30.0, hedge_percentile: float = None, hedge_min_samples: int = 20,
+                 latency_window: int = 500, num_pools: int = 10, http=None):
+        """
+        Initializes the FetchScheduler instance.
+
+        :param max_connections_per_host: The maximum number of open connections to a single host. Default is 4.
+        :type max_connections_per_host: int
+        :param requests_per_second: The average number of requests per second sent to a single host.
+            Default is None, which means no rate limit.
+        :type requests_per_second: float
+        :param burst: The number of requests sent to a host at once before the rate limit applies. Default is 1.0.
+        :type burst: float
+        :param connect_timeout: Seconds to wait for a connection. Default is 10.0.
+        :type connect_timeout: float
+        :param read_timeout: Seconds to wait for every read of the response. Default is 30.0.
+        :type read_timeout: float
+        :param retries: The number of retries of a failed request. Default is 2.
+        :type retries: int
+        :param backoff: The delay before the first retry in seconds, doubled for every next one. Default is 0.5.
+        :type backoff: float
+        :param max_backoff: The maximum delay before a retry in seconds. Default is 30.0.
+        :type max_backoff: float
+        :param hedge_percentile: The latency percentile of a host after which a duplicate request is sent,
+            e.g. 95. Default is None, which means no hedging.
+        :type hedge_percentile: float
+        :param hedge_min_samples: The number of latencies of a host needed before its requests are hedged.
+            Default is 20.
+        :type hedge_min_samples: int
+        :param latency_window: The number of most recent latencies of a host the percentiles are computed from.
+            Default is 500.
+        :type latency_window: int
+        :param num_pools: The number of hosts whose connections are kept open. Default is 10.
+        :type num_pools: int
+        :param http: Connection pool to use instead of a new one, it should block when a host has no free
+            connection to enforce max_connections_per_host. Default is None.
+        :type http: urllib3.PoolManager
+        """
+        import urllib3
+        if http is None:
+            http = urllib3.PoolManager(num_pools=num_pools, maxsize=max_connections_per_host, block=True)
+        self.http = http
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.timeout = urllib3.Timeout(connect=connect_timeout, read=read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.latency_window = latency_window
+        # urllib3 only follows redirects, failed attempts are retried by the scheduler.
+        self._retry = urllib3.Retry(total=None, connect=0, read=0, other=0, status=0, redirect=5)
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def request(self, method: str, url: str, headers: dict = None, **kwargs):
+        """
+        Sends a request, retrying and hedging it as configured.
+
+        :param method: The HTTP method. Only idempotent methods should be used, attempts can be duplicated.
+        :type method: str
+        :param url: The requested URL.
+        :type url: str
+        :param headers: Request headers. Default is None.
+        :type headers: dict
+        :param kwargs: Additional keyword arguments passed to urllib3.PoolManager.request.
+        :return(urllib3.BaseHTTPResponse): The first successful response, or the last RETRY_STATUSES response
+            if all attempts were answered with one.
+        :raise: urllib3.exceptions.HTTPError: If the last attempt failed.
+        """
+        import urllib3
+        host = self._host_state(url)
+        kwargs.setdefault('timeout', self.timeout)
+        kwargs.setdefault('retries', self._retry)
+        for attempt in range(self.retries + 1):
+            try:
+                response = self._attempt(host, method, url, headers, kwargs)
+            except urllib3.exceptions.HTTPError:
+                if attempt == self.retries:
+                    raise
+                delay = self._backoff_delay(attempt)
+            else:
+                if response.status not in RETRY_STATUSES or attempt == self.retries:
+                    return response
+                delay = max(self._backoff_delay(attempt), self._retry_after(response))
+                response.drain_conn()
+                response.release_conn()
+            with self._lock:
+                host.retries += 1
+            time.sleep(delay)
+
+    def _host_state(self, url: str):
+        import urllib3
+        netloc = urllib3.util.parse_url(url).netloc
+        with self._lock:
+            host = self._hosts.get(netloc)
+            if host is None:
+                host = self._hosts[netloc] = _HostState(self.requests_per_second, self.burst, self.latency_window)
+            return host
+
+    def _backoff_delay(self, attempt: int):
+        """
+        Exponential backoff with jitter, so clients failing together do not retry together.
+        """
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _retry_after(self, response):
+        """
+        Seconds of the Retry-After header of a response, 0.0 if it is missing or an HTTP date.
+        """
+        try:
+            return min(self.max_backoff, max(0.0, float(response.headers.get('Retry-After'))))
+        except (TypeError, ValueError):
+            return 0.0
+
+    def _attempt(self, host: _HostState, method: str, url: str, headers: dict, kwargs: dict):
+        """
+        Sends one attempt of a request after a rate token is taken, hedged if the host has enough latencies.
+        """
+        if host.bucket is not None:
+            host.bucket.acquire()
+        hedge_delay = None
+        if self.hedge_percentile is not None:
+            with self._lock:
+                if len(host.latency.recent) >= self.hedge_min_samples:
+                    hedge_delay = host.latency.percentile(self.hedge_percentile)
+        if hedge_delay is None:
+            return self._send(host, method, url, headers, kwargs)
+        return self._send_hedged(host, method, url, headers, kwargs, hedge_delay)
+
+    def _send(self, host: _HostState, method: str, url: str, headers: dict, kwargs: dict, hedge: bool = False):
+        """
+        Sends a single request and records its latency or failure.
+        """
+        import urllib3
+        start = time.perf_counter()
+        try:
+            response = self.http.request(method, url, headers=headers, **kwargs)
+        except urllib3.exceptions.EmptyPoolError:
+            # No connection was free for a duplicate, nothing was sent and it is not counted in hedges.
+            raise
+        except urllib3.exceptions.HTTPError:
+            with self._lock:
+                host.attempts += 1
+                host.failures += 1
+                host.hedges += hedge
+            raise
+        with self._lock:
+            host.attempts += 1
+            host.hedges += hedge
+            host.latency.add(time.perf_counter() - start)
+        return response
+
+    def _send_hedged(self, host: _HostState, method: str, url: str, headers: dict, kwargs: dict,
+                     hedge_delay: float):
+        """
+        Sends an attempt and a duplicate of it if no response arrived within hedge_delay seconds.
+        The first response wins, the other one is closed. An error is raised only if both attempts failed.
+        """
+        race = _HedgeRace()
+        race.start(self._send, (host, method, url, headers, kwargs), hedge=False)
+        launched = 1
+        outcome = race.wait(hedge_delay)
+        if outcome is None and (host.bucket is None or host.bucket.try_acquire()):
+            # pool_timeout=0 fails at once instead of waiting for a connection of the host.
+            race.start(self._send, (host, method, url, headers, dict(kwargs, pool_timeout=0)), hedge=True)
+            launched = 2
+        if outcome is None:
+            outcome = race.wait()
+        received = 1
+        primary_error = None
+        while outcome[1] is not None:
+            if not outcome[2]:
+                primary_error = outcome[1]
+            if received == launched:
+                break
+            outcome = race.wait()
+            received += 1
+        race.finish()
+        response, error, hedge = outcome
+        if error is not None:
+            # The duplicate may only have found no free connection, the error of the attempt itself is reported.
+            raise primary_error or error
+        if hedge:
+            with self._lock:
+                host.hedge_wins += 1
+        return response
+
+    def stats(self):
+        """
+        Retrieves the counters and latencies of every host.
+
+        :return(dict): Keys are hosts (with the port if the URL had one), values are dictionaries with the numbers
+            of attempts, failures (attempts raising an error), retries, hedges (duplicates sent) and hedge_wins,
+            p50, p95 and p99 latencies of the recent attempts in seconds (None if there is none) and
+            histogram - a list of (bucket upper bound in seconds, count) pairs.
+        """
+        with self._lock:
+            return {netloc: {'attempts': host.attempts, 'failures': host.failures, 'retries': host.retries,
+                             'hedges': host.hedges, 'hedge_wins': host.hedge_wins,
+                             'p50': host.latency.percentile(50), 'p95': host.latency.percentile(95),
+                             'p99': host.latency.percentile(99),
+                             'histogram': list(zip(LATENCY_BUCKETS, host.latency.bucket_counts))}
+                    for netloc, host in self._hosts.items()}
+
+    def format_stats(self):
+        """
+        Formats the counters and the latency histogram of every host.
+
+        :return(list): Rows, e.g.
+            'example.com: 120 attempts, 1 failed, 2 retries, 6 hedges (4 won), p50 0.041 s, p95 0.180 s, p99 0.950 s'
+            followed by '    <= 0.05 s: 73' rows of the non-empty histogram buckets.
+        """
+        rows = []
+        for netloc, host in sorted(self.stats().items()):
+            percentiles = ", ".join(f"{name} {host[name]:.3f} s" for name in ('p50', 'p95', 'p99')
+                                    if host[name] is not None)
+            rows.append(f"{netloc}: {host['attempts']} attempts, {host['failures']} failed, "
+                        f"{host['retries']} retries, {host['hedges']} hedges ({host['hedge_wins']} won)"
+                        + (f", {percentiles}" if percentiles else ""))
+            previous_bound = 0.0
+            for bound, count in host['histogram']:
+                if count:
+                    label = f"<= {bound:g} s" if bound != math.inf else f"> {previous_bound:g} s"
+                    rows.append(f"    {label}: {count}")
+                previous_bound = bound
+        return rows
@@ -0,0 +1,200 @@
+import html
+import re
+from .char_classes import DEFAULT_STRIPPER
+from .block_remover import BlockRemover
+
+_SPECIAL_CHARS = re.compile(r'[<>&]')
+_HTML_ENTITY = re.compile(r'&(\w+|#\w+);')
+_PARTIAL_HTML_ENTITY = re.compile(r'&#?\w*\Z')
+_ANCHOR_HREF = re.compile(r'<a\s[^>]*?\bhref\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))', re.IGNORECASE)
+
+
+class HTMLTextExtractor:
+    """
+    Single-pass state machine extracting human-readable text from an HTML document.
+
+    Produces the same text as the chained HTMLContentCleaner.clean_* methods: comments, script,
+    style (and optionally head) blocks are dropped (see BlockRemover for the rules), entities and
+    tags are replaced by a space and punctuation marks are removed. The document is walked once and
+    only the visible text is copied.
+
+    The document can be passed at once to extract() or in chunks to feed() and close(). The parser
+    state is carried across chunk boundaries and only an undecided tail (a partial tag opener or
+    entity, or a block waiting for its closing delimiter) is buffered. The buffer never grows beyond
+    lookahead characters: a block still open after that is skipped up to its closing delimiter,
+    which is the only case where chunked input may give a different result than extract().
+
+    If collect_links is True, the href values of <a> tags are collected into links while the tags are skipped,
+    so links are extracted in the same pass as the text.
+    """
+
+    def __init__(self, count_head: bool = False, lookahead: int = 65536, character_stripper=None,
+                 collect_links: bool = False):
+        """
+        Initializes the HTMLTextExtractor instance.
+
+        :param count_head: A flag indicating whether the <head> block should be removed as well. Default is False.
+        :type count_head: bool
+        :param lookahead: Maximum number of characters buffered between chunks. Default is 65536.
+        :type lookahead: int
+        :param character_stripper: Removes punctuation marks from the extracted text. Default is None,
+            which means ASCII punctuation marks are removed.
+        :type character_stripper: CharacterStripper
+        :param collect_links: If True, href values of <a> tags (with entities decoded, not resolved against
+            the document URL) are appended to links. Default is False.
+        :type collect_links: bool
+        """
+        self.blocks = [('<!--', '-->'), ('<script', '</script>'), ('<style', '</style>')]
+        if count_head:
+            self.blocks.insert(0, ('<head', '</head>'))
+        self.block_remover = BlockRemover(self.blocks)
+        self.character_stripper = character_stripper or DEFAULT_STRIPPER
+        self.lookahead = lookahead
+        self.collect_links = collect_links
+        self.links = []
+        self._buffer = ''
+        self._in_tag = False
+        self._open_block_right_d = None
+
+    def find_block_end(self, text: str, index: int, final: bool = True, closer_cache: list = None):
+        """
+        Checks if a removable block starts at the given index.
+
+        :param text: The HTML document.
+        :type text: str
+        :param index: Position of a '<' character.
+        :type index: int
+        :param final: False if more text may follow, see feed(). Default is True.
+        :type final: bool
+        :param closer_cache: See BlockRemover.match_block(). Default is None.
+        :type closer_cache: list
+        :return(int): Position right after the block, -1 if no block starts at the index,
+            or None if it can't be decided before more text is available.
+        """
+        if not text.startswith(self.block_remover.opener_prefixes, index):
+            if not final and len(text) - index < 2:
+                return None
+            return -1
+        return self.block_remover.match_block(text, index, final, closer_cache)
+
+    def _scan(self, text: str, final: bool):
+        """
+        Processes the text until its end or until the first undecided position.
+
+        :return(tuple): (cleaned text with punctuation marks, position of the first unprocessed character)
+        """
+        chunks = []
+        segments = []
+        append = segments.append
+        search_special = _SPECIAL_CHARS.search
+        match_entity = _HTML_ENTITY.match
+        closer_cache = self.block_remover.new_closer_cache()
+        in_tag = self._in_tag
+        collect_links = self.collect_links
+        position = 0
+        while True:
+            if self._open_block_right_d is not None:
+                right_d = self._open_block_right_d
+                block_end = right_d.search(text, position)
+                if block_end is None:
+                    position = len(text) if final else max(position, len(text) - len(right_d.pattern) + 1)
+                    break
+                self._open_block_right_d = None
+                position = block_end.end()
+            special = search_special(text, position)
+            if special is None:
+                if not in_tag:
+                    append(text[position:])
+                position = len(text)
+                break
+            index = special.start()
+            if not in_tag and index > position:
+                append(text[position:index])
+            if len(segments) > 4096:
+                chunks.append(''.join(segments))
+                segments.clear()
+            position = index
+            char = text[index]
+            if char == '<':
+                block_end = self.find_block_end(text, index, final, closer_cache)
+                if block_end is None:
+                    if len(text) - index < self.lookahead:
+                        break
+                    self._open_block_right_d = self.block_remover.right_delimiter(text, index)
+                    position = index + 1
+                elif block_end != -1:
+                    position = block_end
+                else:
+                    if collect_links and text.startswith(('<a', '<A'), index):
+                        if not final and len(text) - index < self.lookahead and text.find('>', index) == -1:
+                            break
+                        self._collect_link(text, index)
+                    in_tag = True
+                    position = index + 1
+            elif char == '>':
+                in_tag = False
+                append(' ')
+                position = index + 1
+            else:
+                entity = match_entity(text, index)
+                if entity is None:
+                    if not final and len(text) - index < self.lookahead and _PARTIAL_HTML_ENTITY.match(text, index):
+                        break
+                    if not in_tag:
+                        append(char)
+                    position = index + 1
+                else:
+                    if not in_tag:
+                        append(' ')
+                    position = entity.end()
+        self._in_tag = in_tag
+        chunks.append(''.join(segments))
+        segments.clear()
+        result = ''.join(chunks)
+        chunks.clear()
+        return result, position
+
+    def _collect_link(self, text: str, index: int):
+        """
+        Appends the href value of the <a> tag starting at the index to links.
+        """
+        anchor = _ANCHOR_HREF.match(text, index)
+        if anchor is not None:
+            href = anchor.group(anchor.lastindex).strip()
+            self.links.append(html.unescape(href) if '&' in href else href)
+
+    def feed(self, chunk: str):
+        """
+        Processes the next chunk of the document.
+
+        :param chunk: The next part of the HTML document.
+        :type chunk: str
+        :return(str): Cleaned text of the part of the document which could be processed.
+        """
+        text = self._buffer + chunk if self._buffer else chunk
+        result, position = self._scan(text, final=False)
+        self._buffer = text[position:]
+        return self.character_stripper.strip(result)
+
+    def close(self):
+        """
+        Processes the buffered end of the document and resets the parser state.
+
+        :return(str): Cleaned text of the buffered part of the document.
+        """
+        result, _ = self._scan(self._buffer, final=True)
+        self._buffer = ''
+        self._in_tag = False
+        self._open_block_right_d = None
+        return self.character_stripper.strip(result)
+
+    def extract(self, text: str):
+        """
+        Extracts human-readable text from the HTML document.
+
+        :param text: The HTML document.
+        :type text: str
+        :return(str): Text without blocks, tags, entities and punctuation marks.
+        """
+        self._buffer = text
+        return self.close()
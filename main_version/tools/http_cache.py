@@ -0,0 +1,232 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+class HTTPResponseCache:
+    """
+    Persistent cache of response bodies keyed by URL.
+
+    Stored responses are always revalidated: the next request for a URL is sent with If-None-Match and
+    If-Modified-Since headers built from the stored ETag and Last-Modified values, and the stored body
+    is reused when the server answers 304 Not Modified. Only responses having at least one of these
+    validators are stored. Bodies are stored decompressed, together with their Content-Type header
+    for charset detection. When the total size of stored bodies exceeds the size cap, the least recently
+    used entries are evicted. Access times and validators refreshed by 304 responses are kept in memory
+    and written with the next stored response or by close(), so cache hits do not write to the disk.
+
+    Counters:
+        - hits: stored body reused after a 304 response,
+        - misses: full body downloaded,
+        - revalidations: conditional requests sent.
+    """
+
+    index_file_name = 'index.json'
+
+    def __init__(self, cache_dir: str, max_size: int = 256 * 2 ** 20):
+        """
+        Initializes the HTTPResponseCache instance, entries stored by previous runs are loaded.
+
+        :param cache_dir: The directory where responses are stored. Created if it does not exist.
+        :type cache_dir: str
+        :param max_size: The maximum total size of stored bodies in bytes. Default is 256 MiB.
+        :type max_size: int
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self._lock = threading.Lock()
+        self._index_changed = False
+        os.makedirs(cache_dir, exist_ok=True)
+        self._entries = self._load_index()
+
+    def stats(self):
+        """
+        Retrieves the cache counters.
+
+        :return(dict): Number of hits, misses, revalidations, stored entries and their total size in bytes.
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'revalidations': self.revalidations,
+                    'entries': len(self._entries), 'size': sum(entry['size'] for entry in self._entries.values())}
+
+    def fetch(self, url: str, request):
+        """
+        Retrieves the response body of the URL, revalidating the stored copy if there is one.
+
+        :param url: The requested URL.
+        :type url: str
+        :param request: Function sending a GET request to the URL, called with headers and preload_content
+            keyword arguments, e.g. HTMLContentCleaner.request.
+        :type request: Callable
+        :return(bytes): The response body.
+        """
+        return b''.join(self.stream(url, request))
+
+    def stream(self, url: str, request, chunk_size: int = 65536):
+        """
+        Same as fetch(), but the body is read and yielded in chunks. A downloaded body is written
+        to the cache while it is being yielded.
+
+        :param url: The requested URL.
+        :type url: str
+        :param request: Function sending a GET request to the URL, see fetch().
+        :type request: Callable
+        :param chunk_size: The number of bytes yielded at once. Default is 65536.
+        :type chunk_size: int
+        :return(generator): Yields parts of the response body.
+        """
+        key = self._key(url)
+        with self._lock:
+            entry = self._entries.get(key)
+        headers = {}
+        if entry is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+            with self._lock:
+                self.revalidations += 1
+        response = request(headers=headers, preload_content=False)
+        if response.status == 304 and entry is not None:
+            body_handle = self._open_body(key)
+            if body_handle is not None:
+                response.release_conn()
+                with self._lock:
+                    self.hits += 1
+                    self._touch(key, response.headers)
+                with body_handle:
+                    yield from iter(lambda: body_handle.read(chunk_size), b'')
+                return
+            response.release_conn()
+            response = request(headers={}, preload_content=False)
+        try:
+            with self._lock:
+                self.misses += 1
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if response.status != 200 or not (etag or last_modified):
+                yield from response.stream(chunk_size)
+                return
+            content_type = response.headers.get('Content-Type')
+            yield from self._store_while_streaming(key, url, etag, last_modified, content_type,
+                                                   response.stream(chunk_size))
+        finally:
+            response.release_conn()
+
+    def _store_while_streaming(self, key: str, url: str, etag: str, last_modified: str, content_type: str, chunks):
+        """
+        Yields chunks and writes them into a temporary file, which replaces the stored body at the end.
+        """
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        size = 0
+        try:
+            with os.fdopen(file_descriptor, 'wb') as body_handle:
+                for chunk in chunks:
+                    size += len(chunk)
+                    if size <= self.max_size:
+                        body_handle.write(chunk)
+                    yield chunk
+            if size <= self.max_size:
+                with self._lock:
+                    os.replace(temporary_path, self._body_path(key))
+                    self._entries[key] = {'url': url, 'etag': etag, 'last_modified': last_modified,
+                                          'content_type': content_type, 'size': size, 'last_access': time.time()}
+                    self._evict()
+                    self._save_index()
+        finally:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+    def content_type(self, url: str):
+        """
+        Retrieves the Content-Type header stored with the response of the URL, e.g. to detect the charset
+        of a body reused after a 304 response.
+
+        :param url: The requested URL.
+        :type url: str
+        :return(str): The header value, None if the URL is not cached or had no Content-Type header.
+        """
+        with self._lock:
+            entry = self._entries.get(self._key(url))
+            return entry.get('content_type') if entry is not None else None
+
+    @staticmethod
+    def _key(url: str):
+        return hashlib.sha256(url.encode()).hexdigest()
+
+    def _body_path(self, key: str):
+        return os.path.join(self.cache_dir, key + '.body')
+
+    def _open_body(self, key: str):
+        """
+        Opens the stored body, or returns None and forgets the entry if the file is missing.
+        """
+        try:
+            return open(self._body_path(key), 'rb')
+        except FileNotFoundError:
+            with self._lock:
+                self._entries.pop(key, None)
+                self._save_index()
+            return None
+
+    def close(self):
+        """
+        Writes the access times and validators changed since the index was last written.
+        """
+        with self._lock:
+            if self._index_changed:
+                self._save_index()
+
+    def _touch(self, key: str, headers):
+        """
+        Marks the entry as recently used and takes the validators a 304 response may have updated, in memory
+        only. Must be called with the lock held.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry['last_access'] = time.time()
+            if headers.get('ETag'):
+                entry['etag'] = headers['ETag']
+            if headers.get('Last-Modified'):
+                entry['last_modified'] = headers['Last-Modified']
+            self._index_changed = True
+
+    def _evict(self):
+        """
+        Removes the least recently used entries until the size cap is met. Must be called with the lock held.
+        """
+        total_size = sum(entry['size'] for entry in self._entries.values())
+        if total_size <= self.max_size:
+            return
+        for key, entry in sorted(self._entries.items(), key=lambda item: item[1]['last_access']):
+            if total_size <= self.max_size:
+                break
+            del self._entries[key]
+            total_size -= entry['size']
+            try:
+                os.remove(self._body_path(key))
+            except FileNotFoundError:
+                pass
+
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.cache_dir, self.index_file_name), 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_index(self):
+        """
+        Writes the index atomically. Must be called with the lock held.
+        """
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(file_descriptor, 'w') as f:
+            json.dump(self._entries, f)
+        os.replace(temporary_path, os.path.join(self.cache_dir, self.index_file_name))
+        self._index_changed = False
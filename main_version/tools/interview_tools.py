@@ -1,7 +1,27 @@
-import urllib3
-import validators
-import random
 import re
+import codecs
+from .word_counter import WordCounter, create_word_counter
+from .top_k import format_top_words
+from .html_text_extractor import HTMLTextExtractor
+from .char_classes import DEFAULT_STRIPPER
+from .block_remover import BlockRemover
+from .profiler import NULL_PROFILER
+from .charset import PRESCAN_SIZE, detect_charset
+
+
+_TAG_CHARS = re.compile(r'[<>]')
+# http(s) URL with a domain name (also internationalized), localhost, IPv4 or IPv6 host, an optional user,
+# port, path, query and fragment.
+_URL_PATTERN = re.compile(
+    r'https?://'
+    r'(?:[^\s/?#@:]+(?::[^\s/?#@]*)?@)?'
+    r'(?:(?:[^\W_](?:[\w-]{0,61}[^\W_])?\.)+(?:[^\W\d_]{2,63}|xn--[a-z0-9-]{1,59})\.?'
+    r'|localhost'
+    r'|(?:(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)\.){3}(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)'
+    r'|\[[0-9a-f:.]+\])'
+    r'(?::\d{1,5})?'
+    r'(?:[/?#]\S*)?',
+    re.IGNORECASE)
 
 
 class InvalidUrlPreambleError(Exception):
@@ -13,7 +33,8 @@ class InvalidUrlError(Exception):
 
 
 class HTMLContentCleaner:
-    def __init__(self, web_url: str, result_file: str, count_head: bool = False):
+    def __init__(self, web_url: str, result_file: str, count_head: bool = False, http=None, cache=None,
+                 character_stripper=None, profiler=None):
         """
         Initializes the HTMLContentCleaner class instance.
 
@@ -23,11 +44,55 @@ class HTMLContentCleaner:
         :type result_file: str
         :param count_head: A flag indicating whether the <head> content should be counted or cleaned. Default is False.
         :type count_head: bool
+        :param http: Connection pool used for requests, e.g. shared between many instances. Default is None,
+            which means the module level urllib3.request helper is used.
+        :type http: urllib3.PoolManager
+        :param cache: Persistent response cache, the page is downloaded again only if it has changed.
+            Default is None.
+        :type cache: HTTPResponseCache
+        :param character_stripper: Punctuation marks and special characters removed from the content.
+            Default is None, which means ASCII punctuation marks.
+        :type character_stripper: CharacterStripper
+        :param profiler: Records time, sizes and memory of the fetching and cleaning stages. Default is None,
+            which means nothing is recorded.
+        :type profiler: StageProfiler
         """
         self.web_url = web_url
         self.web_content = None
+        self.content_type = None
+        self.charset = None
+        self.request_failed = False
         self.result_file = result_file
         self.count_head = count_head
+        self.http = http
+        self.cache = cache
+        self.character_stripper = character_stripper or DEFAULT_STRIPPER
+        self.profiler = profiler or NULL_PROFILER
+
+    def request(self, headers: dict = None, **kwargs):
+        """
+        Sends a GET request to the web URL through the configured connection pool.
+
+        Compressed responses (gzip, deflate, and br or zstd if their decoders are installed) are accepted,
+        urllib3 decompresses them, also chunk by chunk when the body is streamed. The Content-Type header
+        of a response with a body is kept in content_type for charset detection.
+
+        :param headers: Additional request headers. Default is None.
+        :type headers: dict
+        :param kwargs: Additional keyword arguments passed to the request method.
+        :return(urllib3.BaseHTTPResponse): The response.
+        """
+        import urllib3
+        request_headers = urllib3.make_headers(accept_encoding=True)
+        if headers:
+            request_headers.update(headers)
+        if self.http is None:
+            response = urllib3.request("GET", self.web_url, headers=request_headers, **kwargs)
+        else:
+            response = self.http.request("GET", self.web_url, headers=request_headers, **kwargs)
+        if response.status != 304:
+            self.content_type = response.headers.get('Content-Type')
+        return response
 
     def validate_url(self):
         """
@@ -35,18 +100,15 @@ class HTMLContentCleaner:
 
         :return(bool): True if the URL is valid, otherwise False.
         """
-        if validators.url(self.web_url):
+        if _URL_PATTERN.fullmatch(self.web_url):
             return True
         else:
             return False
 
-    def get_web_content(self):
+    def check_url(self):
         """
-        Fetches the web content from the specified URL if the URL is valid.
+        Checks the format of the given web URL.
 
-        :return:
-            (str): The web content as a string if the request is successful.
-            (bool): False if the request fails.
         :raise: InvalidUrlError: If the URL format is invalid.
         """
         if not self.validate_url():
@@ -57,20 +119,137 @@ class HTMLContentCleaner:
                 - https://www.example.com
             """)
             raise InvalidUrlError(err_msg)
+
+    def get_raw_web_content(self):
+        """
+        Fetches the undecoded web content from the specified URL if the URL is valid.
+
+        :return:
+            (bytes): The response body if the request is successful.
+            (bool): False if the request fails.
+        :raise: InvalidUrlError: If the URL format is invalid.
+        """
+        self.check_url()
+        import urllib3
+        self.request_failed = False
         try:
-            content_handler = urllib3.request("GET", self.web_url)
-            page_content = content_handler.data.decode()
-            self.web_content = page_content
-            return self.web_content
+            with self.profiler.stage('fetch', self.web_url) as stage:
+                if self.cache is None:
+                    raw_content = self.request().data
+                else:
+                    raw_content = self.cache.fetch(self.web_url, self.request)
+                stage.bytes_out = len(raw_content)
+            return raw_content
         except urllib3.exceptions.HTTPError as err:
             print(f"http/https GET request failed, reason {err}")
+            self.request_failed = True
             return False
 
+    def get_web_content(self):
+        """
+        Fetches the web content from the specified URL if the URL is valid.
+
+        :return:
+            (str): The web content as a string if the request is successful.
+            (bool): False if the request fails.
+        :raise: InvalidUrlError: If the URL format is invalid.
+        """
+        raw_content = self.get_raw_web_content()
+        if raw_content is False:
+            return False
+        self.web_content = self.decode_web_content(raw_content)
+        return self.web_content
+
+    def detect_charset(self, head: bytes):
+        """
+        Detects the charset of the fetched page from the Content-Type header of the response (or of the
+        cached response) and the beginning of the page, see charset.detect_charset().
+
+        :param head: The page or at least its first charset.PRESCAN_SIZE bytes.
+        :type head: bytes
+        :return(str): The codec name, also kept in charset.
+        """
+        content_type = self.content_type
+        if content_type is None and self.cache is not None:
+            content_type = self.cache.content_type(self.web_url)
+        self.charset = detect_charset(content_type, head)
+        return self.charset
+
+    def decode_web_content(self, raw_content: bytes):
+        """
+        Decodes the fetched page once with its detected charset, undecodable bytes are replaced.
+
+        :param raw_content: The response body.
+        :type raw_content: bytes
+        :return(str): The decoded page.
+        """
+        with self.profiler.stage('decode', self.web_url, len(raw_content)) as stage:
+            web_content = raw_content.decode(self.detect_charset(raw_content), errors='replace')
+            stage.bytes_out = len(web_content)
+        return web_content
+
+    def stream_web_content(self, chunk_size: int = 65536):
+        """
+        Fetches the web content from the specified URL in chunks and cleans it on the fly.
+
+        The response body is never held in memory as a whole: every received chunk is decompressed, decoded
+        and passed through HTMLTextExtractor, which carries its state across chunk boundaries. Only the first
+        charset.PRESCAN_SIZE bytes are buffered until the charset is detected.
+
+        :param chunk_size: The number of bytes read from the response at once. Default is 65536.
+        :type chunk_size: int
+        :return(generator): Yields parts of the cleaned web content. Nothing more is yielded if the request
+            fails, request_failed is set in that case.
+        :raise: InvalidUrlError: If the URL format is invalid.
+        """
+        self.check_url()
+        import urllib3
+        self.request_failed = False
+        if self.cache is None:
+            chunks = self._stream_response(chunk_size)
+        else:
+            chunks = self.cache.stream(self.web_url, self.request, chunk_size)
+        decoder = None
+        head = b""
+        extractor = HTMLTextExtractor(self.count_head, character_stripper=self.character_stripper)
+        try:
+            for chunk in chunks:
+                if decoder is None:
+                    head += chunk
+                    if len(head) < PRESCAN_SIZE:
+                        continue
+                    decoder = codecs.getincrementaldecoder(self.detect_charset(head))(errors='replace')
+                    chunk, head = head, b""
+                with self.profiler.stage('stream_clean', self.web_url, len(chunk)) as stage:
+                    cleaned_content = extractor.feed(decoder.decode(chunk))
+                    stage.bytes_out = len(cleaned_content)
+                if cleaned_content:
+                    yield cleaned_content
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder(self.detect_charset(head))(errors='replace')
+            yield extractor.feed(decoder.decode(head, final=True)) + extractor.close()
+        except urllib3.exceptions.HTTPError as err:
+            print(f"http/https GET request failed, reason {err}")
+            self.request_failed = True
+
+    def _stream_response(self, chunk_size: int):
+        """
+        Sends the request and yields the response body in chunks.
+        """
+        content_handler = self.request(preload_content=False)
+        try:
+            yield from content_handler.stream(chunk_size)
+        finally:
+            content_handler.release_conn()
+
     @staticmethod
     def inside_content_cleaner(input_string: str, left_d: str, right_d: str):
         """
         Removes content between specified delimiters from the input string.
 
+        Delimiters are matched case-insensitively and a block ends at the first right delimiter,
+        unterminated blocks are kept. See BlockRemover for all the rules.
+
         :param input_string: The input string to be cleaned.
         :type input_string: str
         :param left_d: The left delimiter.
@@ -79,26 +258,7 @@ class HTMLContentCleaner:
         :type left_d: str
         :return(str): The cleaned string with content between the delimiters removed.
         """
-        if left_d == right_d:
-            raise Exception("Left and right delimiter should not be the same")
-        result_content = []
-        punctuation_marks = '!"#$%&\'()*+,-./:;<=>?@[\\]^_`{|}~'
-        while True:
-            random_tag = ''.join([random.choice(punctuation_marks) for _ in range(5)])
-            if random_tag not in input_string:
-                break
-        buff_string = input_string.replace(left_d, random_tag + left_d)
-        buff_string = buff_string.replace(right_d, right_d + random_tag)
-        buff_str_list = buff_string.split(random_tag)
-        for buff_str in buff_str_list:
-            if len(buff_str) != 0:
-                if buff_str.find(left_d) == 0 and buff_str.rfind(right_d) == len(buff_str) - len(right_d):
-                    result_content.append("<null>")
-                else:
-                    result_content.append(buff_str)
-        result_string = "".join(result_content)
-        result_string = result_string.replace('<null>', '')
-        return result_string
+        return BlockRemover([(left_d, right_d)]).remove(input_string)
 
     @staticmethod
     def remove_html_tags(text: str):
@@ -110,15 +270,20 @@ class HTMLContentCleaner:
         :return(str): The text with HTML tags removed.
         """
         result_content = []
-        bool_tag = False
-        for single_char in text:
-            if single_char == '<':
-                bool_tag = True
-            elif single_char == '>':
-                bool_tag = False
+        in_tag = False
+        position = 0
+        for tag_char in _TAG_CHARS.finditer(text):
+            index = tag_char.start()
+            if not in_tag:
+                result_content.append(text[position:index])
+            if tag_char.group() == '<':
+                in_tag = True
+            else:
+                in_tag = False
                 result_content.append(' ')
-            elif not bool_tag:
-                result_content.append(single_char)
+            position = index + 1
+        if not in_tag:
+            result_content.append(text[position:])
         return ''.join(result_content)
 
     @staticmethod
@@ -130,12 +295,7 @@ class HTMLContentCleaner:
         :type text: str
         :return: The text with punctuation marks removed.
         """
-        result_content = ''
-        punctuation_marks = '!"#$%&\'()*+,-./:;<=>?@[\\]^_`{|}~'
-        for single_char in text:
-            if single_char not in punctuation_marks:
-                result_content += single_char
-        return result_content
+        return DEFAULT_STRIPPER.strip(text)
 
     @staticmethod
     def remove_html_ampersand_entities(text: str):
@@ -148,17 +308,26 @@ class HTMLContentCleaner:
         """
         return re.sub(r"&(\w+|#\w+);", ' ', text)
 
+    def _run_cleaning_stage(self, stage_name: str, clean, *args):
+        """
+        Applies a cleaning function to the web content if it exists, measured as a profiler stage.
+
+        :return(str): The cleaned web content.
+        """
+        if not self.web_content:
+            return self.web_content, "Web content is not present."
+        with self.profiler.stage(stage_name, self.web_url, len(self.web_content)) as stage:
+            self.web_content = clean(self.web_content, *args)
+            stage.bytes_out = len(self.web_content)
+        return self.web_content
+
     def clean_head(self):
         """
         Cleans the <head> section of the web content if it exists.
 
         :return(str): The web content with the <head> section cleaned.
         """
-        if self.web_content:
-            self.web_content = self.inside_content_cleaner(self.web_content, '<head>', '</head>')
-            return self.web_content
-        else:
-            return self.web_content, "Web content is not present."
+        return self._run_cleaning_stage('clean_head', self.inside_content_cleaner, '<head', '</head>')
 
     def clean_js_scripts(self):
         """
@@ -166,12 +335,7 @@ class HTMLContentCleaner:
 
         :return(str): The web content with JavaScript content cleaned.
         """
-        if self.web_content:
-            self.web_content = self.inside_content_cleaner(self.web_content, '<script>', '</script>')
-            self.web_content = self.inside_content_cleaner(self.web_content, '<script', '</script>')
-            return self.web_content
-        else:
-            return self.web_content, "Web content is not present."
+        return self._run_cleaning_stage('clean_js_scripts', self.inside_content_cleaner, '<script', '</script>')
 
     def clean_css_stuff(self):
         """
@@ -179,11 +343,7 @@ class HTMLContentCleaner:
 
         :return(str): The web content with CSS content cleaned.
         """
-        if self.web_content:
-            self.web_content = self.inside_content_cleaner(self.web_content, '<style', '</style>')
-            return self.web_content
-        else:
-            return self.web_content, "Web content is not present."
+        return self._run_cleaning_stage('clean_css_stuff', self.inside_content_cleaner, '<style', '</style>')
 
     def clean_html_comments(self):
         """
@@ -191,11 +351,7 @@ class HTMLContentCleaner:
 
         :return(str): The web content with HTML comments cleaned.
         """
-        if self.web_content:
-            self.web_content = self.inside_content_cleaner(self.web_content, '<!--', '-->')
-            return self.web_content
-        else:
-            return self.web_content, "Web content is not present."
+        return self._run_cleaning_stage('clean_html_comments', self.inside_content_cleaner, '<!--', '-->')
 
     def clean_html_ampersand_entities(self):
         """
@@ -203,11 +359,7 @@ class HTMLContentCleaner:
 
         :return(str): The web content with ampersand entities cleaned.
         """
-        if self.web_content:
-            self.web_content = self.remove_html_ampersand_entities(self.web_content)
-            return self.web_content
-        else:
-            return self.web_content, "Web content is not present."
+        return self._run_cleaning_stage('clean_html_ampersand_entities', self.remove_html_ampersand_entities)
 
     def clean_html_tags(self):
         """
@@ -215,11 +367,7 @@ class HTMLContentCleaner:
 
         :return(str): The web content with HTML tags cleaned.
         """
-        if self.web_content:
-            self.web_content = self.remove_html_tags(self.web_content)
-            return self.web_content
-        else:
-            return self.web_content, "Web content is not present."
+        return self._run_cleaning_stage('clean_html_tags', self.remove_html_tags)
 
     def clean_punctuation_marks(self):
         """
@@ -227,26 +375,28 @@ class HTMLContentCleaner:
 
         :return(str): The web content with punctuation marks cleaned.
         """
-        if self.web_content:
-            self.web_content = self.remove_punctuation_marks(self.web_content)
-            return self.web_content
-        else:
-            return self.web_content, "Web content is not present."
+        return self._run_cleaning_stage('clean_punctuation_marks', self.character_stripper.strip)
 
-    def clean_all(self):
+    def clean_all(self, links: list = None):
         """
         Cleans the web content by applying all available cleaning methods.
 
+        Comments, scripts, styles, entities, tags and punctuation marks are removed in a single pass,
+        see HTMLTextExtractor.
+
+        :param links: If given, href values of the <a> tags are appended to it during the same pass.
+            Default is None.
+        :type links: list
         :return(str): The fully cleaned web content.
         """
-        if self.count_head:
-            self.clean_head()
-        self.clean_html_comments()
-        self.clean_js_scripts()
-        self.clean_css_stuff()
-        self.clean_html_ampersand_entities()
-        self.clean_html_tags()
-        self.clean_punctuation_marks()
+        if self.web_content:
+            with self.profiler.stage('clean_all', self.web_url, len(self.web_content)) as stage:
+                extractor = HTMLTextExtractor(self.count_head, character_stripper=self.character_stripper,
+                                              collect_links=links is not None)
+                self.web_content = extractor.extract(self.web_content)
+                if links is not None:
+                    links.extend(extractor.links)
+                stage.bytes_out = len(self.web_content)
         return self.web_content
 
 
@@ -254,20 +404,169 @@ class CountWordsFromUrl(HTMLContentCleaner):
     """
     A class to count words from a web URL after cleaning the HTML content.
     Inherits from HTMLContentCleaner.
+
+    The pipeline is lazy: the page is fetched and cleaned when web_content is first read, tokenized and
+    counted when a result needing words or counts is first requested. Every stage result is cached on the
+    instance and dropped when web_url, count_head, character_stripper or stream change, or when web_content
+    is assigned.
     """
 
-    def __init__(self, web_url: str, result_file: str):
+    def __init__(self, web_url: str, result_file: str, stream: bool = False, http=None, cache=None, memo=None,
+                 character_stripper=None, engine: str = 'python', profiler=None):
         """
-        Initializes the CountWordsFromUrl instance and cleans the web content.
+        Initializes the CountWordsFromUrl instance. Only the URL format is checked, nothing is fetched
+        until a result is requested.
 
         :param web_url: The URL of the web page to fetch and clean.
         :type web_url: str
         :param result_file: The file path where the cleaned content will be saved.
         :type result_file: str
+        :param stream: If True, the page is read in chunks and its words are counted on the fly, so the
+            web content is never held in memory. Default is False.
+        :type stream: bool
+        :param http: Connection pool used for requests. Default is None.
+        :type http: urllib3.PoolManager
+        :param cache: Persistent response cache. Default is None.
+        :type cache: HTTPResponseCache
+        :param memo: Memo of cleaned content and counted words keyed by a hash of the page content,
+            not used in stream mode. Default is None.
+        :type memo: CountMemo
+        :param character_stripper: Punctuation marks and special characters removed from the content.
+            Default is None, which means ASCII punctuation marks.
+        :type character_stripper: CharacterStripper
+        :param engine: Counting engine, 'python' or 'numpy', see create_word_counter(). Default is 'python'.
+        :type engine: str
+        :param profiler: Records time, sizes and memory of the fetching, cleaning and counting stages.
+            Default is None, which means nothing is recorded.
+        :type profiler: StageProfiler
+        :raise: InvalidUrlError: If the URL format is invalid.
+        """
+        super().__init__(web_url, result_file, http=http, cache=cache, character_stripper=character_stripper,
+                         profiler=profiler)
+        self.stream = stream
+        self.memo = memo
+        self.engine = engine
+        self.check_url()
+
+    @property
+    def web_content(self):
+        """
+        The cleaned web content, fetched and cleaned on first access. None if the request failed
+        and always None in stream mode.
+        """
+        self._check_inputs()
+        if not self._content_loaded and not self.stream:
+            self._load_web_content()
+        return self._web_content
+
+    @web_content.setter
+    def web_content(self, web_content):
+        self._web_content = web_content
+        self._content_loaded = web_content is not None
+        self._content_inputs = self._inputs() if self._content_loaded else None
+        self._words = None
+        self._word_counter = None
+        self._top_words = None
+
+    @property
+    def word_counter(self):
+        """
+        Counted words of the page, counted on first access. None if the request failed.
+        """
+        self._check_inputs()
+        if self._word_counter is None:
+            if self.stream:
+                self._content_inputs = self._inputs()
+                self._word_counter = self.count_streamed_web_content()
+            elif self.web_content is not None and self._word_counter is None:
+                self._word_counter = self.count_web_content()
+        return self._word_counter
+
+    @word_counter.setter
+    def word_counter(self, word_counter):
+        self._word_counter = word_counter
+        self._top_words = None
+
+    def _inputs(self):
+        """
+        Retrieves the attributes the cached stage results depend on.
+        """
+        return self.web_url, self.count_head, self.character_stripper, self.stream
+
+    def _check_inputs(self):
+        """
+        Drops the cached stage results if the attributes they depend on have changed.
+        """
+        if self._content_inputs is not None and self._content_inputs != self._inputs():
+            self.web_content = None
+
+    def _load_web_content(self):
+        """
+        Runs the fetching and cleaning stages, a failed request is not repeated until the inputs change.
+        """
+        self._content_loaded = True
+        self._content_inputs = self._inputs()
+        if self.memo is not None:
+            self.count_memoized_web_content()
+        else:
+            self.get_web_content()
+            self.clean_all()
+
+    def count_streamed_web_content(self):
+        """
+        Reads the page in chunks and counts its words on the fly, see stream_web_content().
+
+        :return(WordCounter): Counted words, empty if the request fails.
+        """
+        word_counter = create_word_counter(self.engine)
+        for cleaned_content in self.stream_web_content():
+            with self.profiler.stage('stream_count', self.web_url, len(cleaned_content)):
+                word_counter.feed(cleaned_content)
+        return word_counter.flush()
+
+    def count_memoized_web_content(self):
         """
-        super().__init__(web_url, result_file)
-        self.get_web_content()
-        self.clean_all()
+        Fetches the web content, then cleans and counts it unless a page with identical content
+        was already processed.
+
+        :return(str): The cleaned web content, or False if the request fails.
+        """
+        raw_content = self.get_raw_web_content()
+        if raw_content is False:
+            return False
+        key = self.memo.key(raw_content, self.count_head, self.character_stripper.fingerprint)
+        memoized = self.memo.get(key)
+        if memoized is None:
+            self.web_content = self.decode_web_content(raw_content)
+            self.clean_all()
+            self.word_counter = self.count_web_content()
+            self.memo.put(key, self.web_content, dict(self.word_counter.counts))
+        else:
+            self.web_content, counts = memoized
+            self.word_counter = WordCounter.from_counts(dict(counts))
+        return self.web_content
+
+    def count_web_content(self):
+        """
+        Counts words of the cleaned web content with the configured engine. Words already tokenized
+        by get_all_words_list() or get_unique_words_set() are not split again.
+
+        :return(WordCounter): Counted words.
+        """
+        with self.profiler.stage('count', self.web_url, len(self.web_content)):
+            if self._words is not None and self.engine == 'python':
+                return WordCounter().update_tokens(self._words)
+            return create_word_counter(self.engine).update(self.web_content)
+
+    def _get_words(self):
+        """
+        Retrieves the lowercased words of the cleaned web content, tokenized on first use.
+        """
+        if self._words is None:
+            web_content = self.web_content
+            with self.profiler.stage('tokenize', self.web_url, len(web_content)):
+                self._words = web_content.lower().split()
+        return self._words
 
     def get_unique_words_set(self, print_to_console: bool = False):
         """
@@ -277,7 +576,11 @@ class CountWordsFromUrl(HTMLContentCleaner):
         :type print_to_console: bool
         :return(set): A set of unique words from the web content.
         """
-        return_set = set(self.web_content.lower().split())
+        self._check_inputs()
+        if self.stream or self._word_counter is not None:
+            return_set = self.word_counter.unique_words()
+        else:
+            return_set = set(self._get_words())
         if print_to_console:
             print(return_set)
         return return_set
@@ -288,9 +591,13 @@ class CountWordsFromUrl(HTMLContentCleaner):
 
         :param print_to_console: If True, prints the list of all words to the console. Default is False.
         :type print_to_console: bool
-        :return: A list of all words from the web content.
+        :return: A list of all words from the web content. In stream mode the words are grouped,
+            the original word order is not kept.
         """
-        all_words_list = self.web_content.lower().split()
+        if self.stream:
+            all_words_list = [word for word, count in self.word_counter.counts.items() for _ in range(count)]
+        else:
+            all_words_list = list(self._get_words())
         if print_to_console:
             print(all_words_list)
         return all_words_list
@@ -303,11 +610,7 @@ class CountWordsFromUrl(HTMLContentCleaner):
         :type print_to_console: bool
         :return(dict): A dictionary where keys are words and values are their counts.
         """
-        result_dict = {}
-        unique_words_set = self.get_unique_words_set()
-        all_words_list = self.get_all_words_list()
-        for unique_word in unique_words_set:
-            result_dict[unique_word] = all_words_list.count(unique_word)
+        result_dict = self.word_counter.counts
         if print_to_console:
             print(result_dict)
         return result_dict
@@ -316,25 +619,24 @@ class CountWordsFromUrl(HTMLContentCleaner):
         """
         Retrieves a list of the top words by frequency.
 
-        :param top_count: The number of top words to retrieve. Default is 10.
+        The ranking is cached, a request for fewer words than an earlier one is served from its prefix.
+
+        :param top_count: The number of top words to retrieve, -1 means all words. Default is 10.
         :type top_count: int
         :param print_to_console: If True, prints the list of top words to the console. Default is False.
         :type print_to_console: bool
-        :return(list): A list of strings representing the top words and their counts.
-        """
-        unsorted_dict = self.get_dict_with_counted_words()
-        sorted_dict = sorted(unsorted_dict.items(), key=lambda x: x[1], reverse=True)
-        iterator = 0
-        return_list = []
-        if top_count == -1:
-            top_count = len(sorted_dict)
-        for word, count in sorted_dict[:top_count]:
-            iterator += 1
-            row = f"{iterator}. {word} --- {count}"
-            if print_to_console:
-                print(row)
-            return_list.append(row)
-        return return_list
+        :return(list): A list of strings representing the top words and their counts, ties sorted alphabetically.
+        """
+        word_counter = self.word_counter
+        if self._top_words is not None:
+            cached_count, top_words = self._top_words
+            complete = cached_count == -1 or len(top_words) < cached_count
+            if complete or 0 <= top_count <= cached_count:
+                return format_top_words(top_words if top_count == -1 else top_words[:max(top_count, 0)],
+                                        print_to_console)
+        top_words = word_counter.most_common(top_count)
+        self._top_words = (top_count, top_words)
+        return format_top_words(top_words, print_to_console)
 
     def save_top_words_to_file(self, top_count: int = 10, print_to_console: bool = False):
         """
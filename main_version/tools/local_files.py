@@ -0,0 +1,182 @@
+import array
+import codecs
+import concurrent.futures
+import mmap
+import os
+from .batch import BatchWordCounter, UrlResult
+from .html_text_extractor import HTMLTextExtractor
+from .parallel import merge_counted_words
+from .word_counter import WordCounter, create_word_counter
+
+HTML_EXTENSIONS = ('.html', '.htm', '.xhtml', '.shtml')
+
+
+def _scan_directory(directory: str, extensions: tuple):
+    """
+    Lists one directory level. Symbolic links to directories are not followed, so link cycles can't loop forever.
+
+    :return(tuple): (sorted paths of matching files, sorted paths of subdirectories)
+    """
+    files = []
+    subdirectories = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirectories.append(entry.path)
+                elif entry.is_file() and entry.name.lower().endswith(extensions):
+                    files.append(entry.path)
+    except OSError as err:
+        print(f"directory listing failed, reason {err}")
+    return sorted(files), sorted(subdirectories)
+
+
+def iter_local_files(paths, extensions: tuple = HTML_EXTENSIONS, max_workers: int = 8):
+    """
+    Finds HTML files in the given files and directory trees.
+
+    Directories are listed concurrently by a thread pool, every listed subdirectory is scheduled
+    as soon as it is found. Files given directly are yielded whatever their extension is.
+
+    :param paths: An iterable of file and directory paths.
+    :type paths: Iterable[str]
+    :param extensions: Lowercase extensions of the files searched in directories. Default is HTML_EXTENSIONS.
+    :type extensions: tuple
+    :param max_workers: The number of directories listed at the same time. Default is 8.
+    :type max_workers: int
+    :return(generator): Yields file paths, files of a directory in alphabetical order.
+    """
+    directories = []
+    for path in paths:
+        if os.path.isdir(path):
+            directories.append(path)
+        else:
+            yield path
+    if not directories:
+        return
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {executor.submit(_scan_directory, directory, extensions) for directory in directories}
+        while pending:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                files, subdirectories = future.result()
+                pending.update(executor.submit(_scan_directory, subdirectory, extensions)
+                               for subdirectory in subdirectories)
+                yield from files
+
+
+def count_local_file(path: str, count_head: bool = False, character_stripper=None, chunk_size: int = 2 ** 20,
+                     engine: str = 'python'):
+    """
+    Cleans and counts words of a local HTML file straight from its memory-mapped bytes.
+
+    The file is never read into a single string: the mapping is decoded in chunks, which are passed through
+    HTMLTextExtractor and the word counter, both carrying their state across chunk boundaries, like in the
+    stream mode of CountWordsFromUrl. Invalid UTF-8 bytes are replaced with U+FFFD.
+
+    :param path: The path of the HTML file.
+    :type path: str
+    :param count_head: A flag indicating whether the <head> block should be removed. Default is False.
+    :type count_head: bool
+    :param character_stripper: Characters removed from the content. Default is None, which means ASCII punctuation.
+    :type character_stripper: CharacterStripper
+    :param chunk_size: The number of mapped bytes decoded at once. Default is 1 MiB.
+    :type chunk_size: int
+    :param engine: Counting engine, 'python' or 'numpy', see create_word_counter(). Default is 'python'.
+    :type engine: str
+    :return(WordCounter): Counted words.
+    :raise: OSError: If the file can't be opened or mapped.
+    """
+    word_counter = create_word_counter(engine)
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return word_counter
+        decoder = codecs.getincrementaldecoder("utf-8")(errors='replace')
+        extractor = HTMLTextExtractor(count_head, character_stripper=character_stripper)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            with memoryview(mapped) as view:
+                for start in range(0, size, chunk_size):
+                    word_counter.feed(extractor.feed(decoder.decode(view[start:start + chunk_size])))
+    word_counter.feed(extractor.feed(decoder.decode(b"", final=True)) + extractor.close())
+    return word_counter.flush()
+
+
+def count_local_file_compact(path: str, count_head: bool = False, character_stripper=None):
+    """
+    Runs count_local_file() in a worker process. Only the path is sent to the worker, which maps the file
+    itself, and the result is kept compact like the one of count_html_bytes().
+
+    :return(tuple): (words separated by spaces, array of their counts)
+    """
+    counts = count_local_file(path, count_head, character_stripper).counts
+    return ' '.join(counts), array.array('q', counts.values())
+
+
+class LocalFilesWordCounter(BatchWordCounter):
+    """
+    Analyzes local HTML files, e.g. saved archives or mirrored sites, instead of URLs.
+
+    Files are memory-mapped and counted by the threads of BatchWordCounter, or by its worker processes
+    if processes is greater than 0. Results are merged into the total counter of all files.
+    """
+
+    source_label = "FILE"
+
+    def __init__(self, result_file: str, max_workers: int = 4, processes: int = 0, count_head: bool = False,
+                 character_stripper=None, compact_total: bool = False, engine: str = 'python', store=None,
+                 profiler=None, sketch_error: float = None, sketch_confidence: float = 0.99):
+        """
+        Initializes the LocalFilesWordCounter instance.
+
+        :param result_file: The file path where the results will be saved.
+        :type result_file: str
+        :param max_workers: The number of files processed at the same time. Default is 4.
+        :type max_workers: int
+        :param processes: If greater than 0, files are cleaned and counted by this number of worker
+            processes. Default is 0.
+        :type processes: int
+        :param count_head: A flag indicating whether the <head> block should be removed. Default is False.
+        :type count_head: bool
+        :param character_stripper: Punctuation marks and special characters removed from the files.
+            Default is None, which means ASCII punctuation marks.
+        :type character_stripper: CharacterStripper
+        :param compact_total: If True, the words of all files are counted in a CompactVocabulary. Default is False.
+        :type compact_total: bool
+        :param engine: Counting engine of single files, 'python' or 'numpy'. Default is 'python'.
+        :type engine: str
+        :param store: Persistent store where the frequency table of every file is saved. Default is None.
+        :type store: CountStore
+        :param profiler: Records time, size and memory of counting every file. Default is None.
+        :type profiler: StageProfiler
+        :param sketch_error: If set, the words of all files are counted approximately, see BatchWordCounter.
+            Default is None.
+        :type sketch_error: float
+        :param sketch_confidence: The probability that an approximate count is within sketch_error. Default is 0.99.
+        :type sketch_confidence: float
+        """
+        super().__init__(result_file, max_workers, processes=processes, character_stripper=character_stripper,
+                         compact_total=compact_total, engine=engine, store=store, profiler=profiler,
+                         sketch_error=sketch_error, sketch_confidence=sketch_confidence)
+        self.count_head = count_head
+
+    def analyze_url(self, path: str):
+        """
+        Counts words of a single local file.
+
+        :param path: The path of the HTML file.
+        :type path: str
+        :return(UrlResult): The result of the analysis.
+        """
+        try:
+            with self.profiler.stage('count_local_file', path, os.path.getsize(path)):
+                if self.parallel_counter is not None:
+                    counted_words = self.parallel_counter.executor.submit(
+                        count_local_file_compact, path, self.count_head, self.character_stripper).result()
+                    return UrlResult(path, merge_counted_words(WordCounter(), counted_words))
+                return UrlResult(path, count_local_file(path, self.count_head, self.character_stripper,
+                                                        engine=self.engine))
+        except OSError as err:
+            return UrlResult(path, error=f"file read failed, reason {err}")
@@ -0,0 +1,121 @@
+import collections
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+
+class CountMemo:
+    """
+    Memoizes cleaned text and word counts by a hash of the raw page content.
+
+    Pages with byte-identical bodies (mirrors, tracking parameter variants, unchanged pages) are
+    cleaned and counted once, later they cost only the hash computation. Entries are kept in memory
+    with least recently used eviction and, if a directory is given, also on disk.
+    """
+
+    version = 1
+
+    def __init__(self, max_entries: int = 256, cache_dir: str = None):
+        """
+        Initializes the CountMemo instance.
+
+        :param max_entries: The maximum number of entries kept in memory. Default is 256.
+        :type max_entries: int
+        :param cache_dir: The directory where entries are stored on disk. Default is None, which means
+            entries are kept in memory only.
+        :type cache_dir: str
+        """
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @classmethod
+    def key(cls, raw_content: bytes, count_head: bool = False, stripper_fingerprint: str = ''):
+        """
+        Computes the memo key of a raw page content and cleaner options.
+
+        :param raw_content: The undecoded page content.
+        :type raw_content: bytes
+        :param count_head: The count_head option of the cleaner.
+        :type count_head: bool
+        :param stripper_fingerprint: The fingerprint of the cleaner's CharacterStripper. Default is ''.
+        :type stripper_fingerprint: str
+        :return(str): The key.
+        """
+        digest = hashlib.blake2b(raw_content, digest_size=16).hexdigest()
+        return f"{digest}-{int(count_head)}{stripper_fingerprint}-v{cls.version}"
+
+    def get(self, key: str):
+        """
+        Retrieves a memoized result.
+
+        :param key: The key computed by key().
+        :type key: str
+        :return(tuple): (cleaned text, dictionary of word counts), or None if the key is unknown.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        entry = self._load(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, entry)
+        return entry
+
+    def put(self, key: str, cleaned_content: str, counts: dict):
+        """
+        Stores a result.
+
+        :param key: The key computed by key().
+        :type key: str
+        :param cleaned_content: The cleaned text.
+        :type cleaned_content: str
+        :param counts: A dictionary where keys are words and values are their counts.
+        :type counts: dict
+        """
+        entry = (cleaned_content, counts)
+        with self._lock:
+            self._remember(key, entry)
+        if self.cache_dir is not None:
+            file_descriptor, temporary_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(file_descriptor, 'w', encoding='utf-8') as f:
+                json.dump({'cleaned_content': cleaned_content, 'counts': counts}, f)
+            os.replace(temporary_path, self._entry_path(key))
+
+    def _remember(self, key: str, entry: tuple):
+        """
+        Adds the entry to memory, evicting the least recently used one. Must be called with the lock held.
+        """
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _entry_path(self, key: str):
+        return os.path.join(self.cache_dir, key + '.json')
+
+    def _load(self, key: str):
+        """
+        Loads the entry from disk, or returns None if it is not stored.
+        """
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self._entry_path(key), 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        return stored['cleaned_content'], stored['counts']
@@ -0,0 +1,124 @@
+from .top_k import select_top_words
+from .word_counter import WordCounter
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Non-ASCII characters str.split() treats as whitespace, the last one is U+3000.
+_UNICODE_SPACES = {code: ' ' for code in range(0x80, 0x3001) if chr(code).isspace()}
+_ASCII_SPACES = [code for code in range(0x80) if chr(code).isspace()]
+
+
+class NumpyWordCounter(WordCounter):
+    """
+    WordCounter counting the words of a text in vectorized batches with NumPy.
+
+    A batch of text is encoded to UTF-8 and split into tokens at whitespace bytes. Every token gets an
+    integer id, a 64-bit multilinear hash of its bytes, the ids are counted with numpy.unique and only
+    one token per id is decoded back to a string. Every token is compared byte by byte with the decoded
+    representative of its id, a batch with a hash collision is counted with str.split() instead, so the
+    results are always exactly the same as the ones of WordCounter. Top words are selected with
+    numpy.argpartition, ties are sorted alphabetically.
+
+    Texts shorter than min_batch_size characters and tokenized input (update_tokens()) are counted
+    by WordCounter, the NumPy overhead is not worth it there. Larger texts are currently counted more
+    slowly than by WordCounter as well (see benchmarks/bench_numpy_counter.py).
+    """
+
+    min_batch_size = 65536
+
+    def __init__(self, batch_size: int = 2 ** 23, tracker=None):
+        """
+        Initializes an empty NumpyWordCounter instance.
+
+        :param batch_size: The number of characters counted at once. Default is 8388608.
+        :type batch_size: int
+        :param tracker: Optional TopKTracker notified about every count change. Default is None.
+        :type tracker: TopKTracker
+        :raise: ImportError: If NumPy is not installed.
+        """
+        if numpy is None:
+            raise ImportError("NumpyWordCounter requires NumPy, install it with: pip install numpy")
+        super().__init__(tracker)
+        self.batch_size = batch_size
+        self._is_space = numpy.zeros(256, dtype=bool)
+        self._is_space[_ASCII_SPACES] = True
+        self._multipliers = numpy.random.default_rng(0x5EED).integers(1, 2 ** 63, size=64, dtype=numpy.uint64)
+        self._multipliers |= numpy.uint64(1)
+
+    def update(self, text: str):
+        """
+        Counts all whitespace separated words of the given text.
+
+        :param text: Cleaned text to count.
+        :type text: str
+        :return(NumpyWordCounter): The counter instance, to allow chaining.
+        """
+        if len(text) < self.min_batch_size or self.tracker is not None:
+            return super().update(text)
+        position = 0
+        while position < len(text):
+            end = position + self.batch_size
+            if end < len(text):
+                # Cut the batch after the last whitespace, a word is never split between batches.
+                cut = max(text.rfind(' ', position, end), text.rfind('\n', position, end))
+                end = cut + 1 if cut > position else len(text)
+            self._count_batch(text[position:end].lower())
+            position = end
+        return self
+
+    def _count_batch(self, text: str):
+        """
+        Counts the words of a lowercased text in a single vectorized pass.
+        """
+        if not text.isascii():
+            text = text.translate(_UNICODE_SPACES)
+        data = numpy.frombuffer(text.encode('utf-8', 'surrogatepass'), dtype=numpy.uint8)
+        in_token = ~self._is_space[data]
+        token_bytes = data[in_token]
+        if not len(token_bytes):
+            return
+        edges = numpy.diff(in_token.view(numpy.int8), prepend=0, append=0)
+        lengths = numpy.flatnonzero(edges == -1) - numpy.flatnonzero(edges == 1)
+        offsets = numpy.zeros(len(lengths), dtype=numpy.int64)
+        numpy.cumsum(lengths[:-1], out=offsets[1:])
+        byte_positions = numpy.arange(len(token_bytes), dtype=numpy.int64) - numpy.repeat(offsets, lengths)
+        weighted = (token_bytes.astype(numpy.uint64) + numpy.uint64(1)) * self._multipliers[byte_positions & 63]
+        token_ids = numpy.add.reduceat(weighted, offsets)
+        token_ids ^= lengths.astype(numpy.uint64) * numpy.uint64(0x9E3779B97F4A7C15)
+        unique_ids, inverse, id_counts = numpy.unique(token_ids, return_inverse=True, return_counts=True)
+        representatives = numpy.empty(len(unique_ids), dtype=numpy.int64)
+        representatives[inverse[::-1]] = numpy.arange(len(token_ids) - 1, -1, -1)
+        token_representatives = representatives[inverse]
+        if not (numpy.array_equal(lengths, lengths[token_representatives]) and numpy.array_equal(
+                token_bytes, token_bytes[numpy.repeat(offsets[token_representatives], lengths) + byte_positions])):
+            super().update(text)
+            return
+        raw = token_bytes.tobytes()
+        counts = self.counts
+        get_count = counts.get
+        for offset, length, count in zip(offsets[representatives].tolist(), lengths[representatives].tolist(),
+                                         id_counts.tolist()):
+            word = raw[offset:offset + length].decode('utf-8', 'surrogatepass')
+            counts[word] = get_count(word, 0) + count
+        self.total_words += len(lengths)
+
+    def most_common(self, top_count: int = 10):
+        """
+        Retrieves words with the highest counts. The count of the top_count-th word is found with
+        numpy.argpartition, only words reaching it are sorted.
+
+        :param top_count: The number of top words to retrieve, -1 means all words. Default is 10.
+        :type top_count: int
+        :return(list): A list of (word, count) tuples in descending count order, ties sorted alphabetically.
+        """
+        counts = self.counts
+        if top_count <= 0 or top_count >= len(counts):
+            return select_top_words(counts, top_count)
+        word_counts = numpy.fromiter(counts.values(), dtype=numpy.int64, count=len(counts))
+        kth = len(word_counts) - top_count
+        threshold = word_counts[numpy.argpartition(word_counts, kth)[kth]]
+        candidates = {word: count for word, count in counts.items() if count >= threshold}
+        return select_top_words(candidates, top_count)
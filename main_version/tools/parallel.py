@@ -0,0 +1,214 @@
+import array
+import concurrent.futures
+import threading
+from .html_text_extractor import HTMLTextExtractor
+from .block_remover import BlockRemover
+from .word_counter import WordCounter
+
+
+def count_html_bytes(raw_content: bytes, count_head: bool = False, character_stripper=None):
+    """
+    Cleans and counts words of a raw HTML document. Runs in worker processes, so both the argument
+    and the result are kept compact: raw bytes in, space separated words and an array of counts out.
+
+    :param raw_content: UTF-8 encoded HTML document or its part split by split_html_bytes().
+    :type raw_content: bytes
+    :param count_head: A flag indicating whether the <head> block should be removed. Default is False.
+    :type count_head: bool
+    :param character_stripper: Characters removed from the content. Default is None, which means ASCII punctuation.
+    :type character_stripper: CharacterStripper
+    :return(tuple): (words separated by spaces, array of their counts)
+    """
+    extractor = HTMLTextExtractor(count_head, character_stripper=character_stripper)
+    cleaned_content = extractor.extract(raw_content.decode(errors='replace'))
+    counts = WordCounter().update(cleaned_content).counts
+    return ' '.join(counts), array.array('q', counts.values())
+
+
+def merge_counted_words(word_counter: WordCounter, counted_words: tuple):
+    """
+    Reduce step: merges a result of count_html_bytes() into the counter.
+
+    :param word_counter: Counter collecting the results.
+    :type word_counter: WordCounter
+    :param counted_words: A result of count_html_bytes().
+    :type counted_words: tuple
+    :return(WordCounter): The updated counter.
+    """
+    words, word_counts = counted_words
+    if not words:
+        return word_counter
+    return word_counter.merge(WordCounter.from_counts(dict(zip(words.split(' '), word_counts))))
+
+
+def split_html_bytes(raw_content: bytes, chunk_size: int, count_head: bool = False):
+    """
+    Splits a raw HTML document into parts which can be cleaned independently.
+
+    A part always ends right before a closing tag ('</') found outside of any tag, comment,
+    script, style (or head) block, so cleaning and counting the parts separately gives the same
+    words as processing the whole document. The check is conservative: a boundary is skipped
+    if anything before it could still be open.
+
+    :param raw_content: UTF-8 encoded HTML document.
+    :type raw_content: bytes
+    :param chunk_size: The preferred size of a part in bytes.
+    :type chunk_size: int
+    :param count_head: A flag indicating whether the <head> block is removed. Default is False.
+    :type count_head: bool
+    :return(list): Parts of the document.
+    """
+    blocks = [(left_d.lower().encode(), right_d.lower().encode(), BlockRemover.is_tag_name_opener(left_d))
+              for left_d, right_d in HTMLTextExtractor(count_head).blocks]
+    lowered_content = raw_content.lower()
+    parts = []
+    start = 0
+    while len(raw_content) - start > chunk_size:
+        boundary = _find_safe_boundary(lowered_content, start, start + chunk_size, blocks)
+        if boundary == -1:
+            break
+        parts.append(raw_content[start:boundary])
+        start = boundary
+    parts.append(raw_content[start:])
+    return parts
+
+
+def _find_safe_boundary(lowered_content: bytes, start: int, position: int, blocks: list):
+    """
+    Finds the first safe split position after the given position.
+
+    :return(int): The split position, or -1 if there is none.
+    """
+    while True:
+        candidate = lowered_content.find(b'</', position)
+        if candidate == -1:
+            return -1
+        position = candidate + 1
+        if lowered_content.rfind(b'<', start, candidate) > lowered_content.rfind(b'>', start, candidate):
+            continue
+        for left_d, right_d, is_tag_name in blocks:
+            if _rfind_opener(lowered_content, left_d, is_tag_name, start, candidate) > \
+                    lowered_content.rfind(right_d, start, candidate):
+                block_end = lowered_content.find(right_d, candidate)
+                if block_end == -1:
+                    return -1
+                position = block_end + len(right_d)
+                break
+        else:
+            return candidate
+
+
+def _rfind_opener(lowered_content: bytes, left_d: bytes, is_tag_name: bool, start: int, end: int):
+    """
+    Finds the last block opener, a tag name opener has to be followed by whitespace, '/' or '>' like in BlockRemover.
+    """
+    while True:
+        index = lowered_content.rfind(left_d, start, end)
+        if index == -1 or not is_tag_name:
+            return index
+        next_byte = lowered_content[index + len(left_d):index + len(left_d) + 1]
+        if next_byte and next_byte in b' \t\n\r\f\v/>':
+            return index
+        end = index
+
+
+class ParallelWordCounter:
+    """
+    Cleans and counts HTML documents on a pool of worker processes.
+
+    Documents are spread across the workers and the partial counts are merged in the parent process
+    (map-reduce). Documents larger than split_size are split at safe tag boundaries and their parts
+    are processed in parallel as well.
+    """
+
+    def __init__(self, max_workers: int = None, count_head: bool = False, split_size: int = 4 * 2 ** 20,
+                 character_stripper=None):
+        """
+        Initializes the ParallelWordCounter instance.
+
+        :param max_workers: The number of worker processes. Default is None, which means the number of CPUs.
+        :type max_workers: int
+        :param count_head: A flag indicating whether the <head> block should be removed. Default is False.
+        :type count_head: bool
+        :param split_size: Documents larger than this number of bytes are split into parts. Default is 4 MiB.
+        :type split_size: int
+        :param character_stripper: Characters removed from the documents. Default is None, which means
+            ASCII punctuation marks.
+        :type character_stripper: CharacterStripper
+        """
+        self.max_workers = max_workers
+        self.count_head = count_head
+        self.split_size = split_size
+        self.character_stripper = character_stripper
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def executor(self):
+        """
+        The process pool, started on first use. Fetching threads reach it at the same time, only one pool
+        is started.
+        """
+        executor = self._executor
+        if executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers)
+                executor = self._executor
+        return executor
+
+    def close(self):
+        """
+        Shuts the process pool down.
+        """
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    def submit_document(self, raw_content: bytes):
+        """
+        Schedules cleaning and counting of a single document.
+
+        :param raw_content: UTF-8 encoded HTML document.
+        :type raw_content: bytes
+        :return(list): Futures of count_html_bytes() results, one per document part.
+        """
+        return [self.executor.submit(count_html_bytes, part, self.count_head, self.character_stripper)
+                for part in split_html_bytes(raw_content, self.split_size, self.count_head)]
+
+    def count_document(self, raw_content: bytes):
+        """
+        Cleans and counts words of a single document.
+
+        :param raw_content: UTF-8 encoded HTML document.
+        :type raw_content: bytes
+        :return(WordCounter): Counted words.
+        """
+        word_counter = WordCounter()
+        for future in self.submit_document(raw_content):
+            merge_counted_words(word_counter, future.result())
+        return word_counter
+
+    def count_documents(self, documents):
+        """
+        Cleans and counts words of many documents in parallel.
+
+        :param documents: An iterable of UTF-8 encoded HTML documents.
+        :type documents: Iterable[bytes]
+        :return(list): WordCounter for every document, in the input order.
+        """
+        futures_per_document = [self.submit_document(raw_content) for raw_content in documents]
+        word_counters = []
+        for futures in futures_per_document:
+            word_counter = WordCounter()
+            for future in futures:
+                merge_counted_words(word_counter, future.result())
+            word_counters.append(word_counter)
+        return word_counters
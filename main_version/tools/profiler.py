@@ -0,0 +1,297 @@
+import collections
+import json
+import threading
+import time
+import tracemalloc
+
+
+class StageRecord:
+    """
+    Measurement of a single run of a pipeline stage.
+    """
+
+    def __init__(self, stage: str, url: str, seconds: float, bytes_in: int, bytes_out: int, peak_bytes: int):
+        """
+        Initializes the StageRecord instance.
+
+        :param stage: The stage name, e.g. 'fetch' or 'clean_all'.
+        :type stage: str
+        :param url: The URL (or path) of the processed document, None if the stage is not bound to one.
+        :type url: str
+        :param seconds: Wall time of the stage.
+        :type seconds: float
+        :param bytes_in: Size of the stage input, bytes for raw content, characters for decoded text.
+        :type bytes_in: int
+        :param bytes_out: Size of the stage output, like bytes_in.
+        :type bytes_out: int
+        :param peak_bytes: Peak of memory allocated during the stage, None if memory is not tracked.
+        :type peak_bytes: int
+        """
+        self.stage = stage
+        self.url = url
+        self.seconds = seconds
+        self.bytes_in = bytes_in
+        self.bytes_out = bytes_out
+        self.peak_bytes = peak_bytes
+
+    def as_dict(self):
+        """
+        Retrieves the record as a dictionary.
+
+        :return(dict): Record fields.
+        """
+        return {'stage': self.stage, 'url': self.url, 'seconds': self.seconds, 'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out, 'peak_bytes': self.peak_bytes}
+
+
+class _NullStage:
+    """
+    Stage context of NullProfiler, a shared object which ignores everything.
+    """
+
+    bytes_in = 0
+    bytes_out = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+class NullProfiler:
+    """
+    Profiler which records nothing, used when profiling is off. A stage costs one method call and
+    entering a shared context object.
+    """
+
+    enabled = False
+    _null_stage = _NullStage()
+
+    def stage(self, name: str, url: str = None, bytes_in: int = 0):
+        """
+        Measures a stage, see StageProfiler.stage().
+
+        :return(_NullStage): Shared context which ignores everything.
+        """
+        return self._null_stage
+
+    def records(self):
+        return []
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class _StageTimer:
+    """
+    Stage context of StageProfiler. The stage sets bytes_out before it ends.
+    """
+
+    def __init__(self, profiler: "StageProfiler", name: str, url: str, bytes_in: int):
+        self.profiler = profiler
+        self.name = name
+        self.url = url
+        self.bytes_in = bytes_in
+        self.bytes_out = 0
+        self._start = 0.0
+        self._start_memory = 0
+        self._peak_memory = 0
+
+    def __enter__(self):
+        if self.profiler.track_memory:
+            self._start_memory = self.profiler.enter_memory_stage(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        seconds = time.perf_counter() - self._start
+        peak_bytes = None
+        if self.profiler.track_memory:
+            peak_bytes = self.profiler.exit_memory_stage(self) - self._start_memory
+        self.profiler.add_record(StageRecord(self.name, self.url, seconds, self.bytes_in, self.bytes_out, peak_bytes))
+        return False
+
+
+class StageProfiler:
+    """
+    Records wall time, input and output size and allocation peak of pipeline stages.
+
+    Stages are measured with a context manager:
+
+        with profiler.stage('clean_all', url, len(text)) as stage:
+            text = clean(text)
+            stage.bytes_out = len(text)
+
+    Allocation peaks are measured with tracemalloc, which slows the program down, so it can be turned off
+    with track_memory=False. Nested stages are supported: the peak of an outer stage includes the peaks of its
+    inner stages. The tracemalloc peak is process wide, when documents are processed by many threads at once,
+    the peak of a stage includes allocations of the stages running at the same time.
+
+    With max_records only the most recent records are kept, e.g. by a long-running server, the per stage
+    summary still covers every recorded stage run.
+    """
+
+    enabled = True
+
+    def __init__(self, track_memory: bool = True, max_records: int = None):
+        """
+        Initializes the StageProfiler instance.
+
+        :param track_memory: If True, allocation peaks are measured with tracemalloc. Default is True.
+        :type track_memory: bool
+        :param max_records: The number of most recent records kept. Default is None, which means all records.
+        :type max_records: int
+        """
+        self.track_memory = track_memory
+        self._records = collections.deque(maxlen=max_records)
+        self._summary = {}
+        self._lock = threading.Lock()
+        self._memory_stages = []
+        self._started_tracing = track_memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+
+    def close(self):
+        """
+        Stops tracemalloc if it was started by this profiler. The records are kept.
+        """
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def stage(self, name: str, url: str = None, bytes_in: int = 0):
+        """
+        Measures a stage.
+
+        :param name: The stage name.
+        :type name: str
+        :param url: The URL (or path) of the processed document. Default is None.
+        :type url: str
+        :param bytes_in: Size of the stage input. Default is 0.
+        :type bytes_in: int
+        :return(_StageTimer): Context manager measuring the stage.
+        """
+        return _StageTimer(self, name, url, bytes_in)
+
+    def enter_memory_stage(self, stage: _StageTimer):
+        """
+        Starts tracking the allocation peak of a stage. The peak reached so far is passed to the open stages
+        before the tracemalloc peak is reset.
+
+        :return(int): Currently allocated bytes.
+        """
+        with self._lock:
+            current, peak = tracemalloc.get_traced_memory()
+            for open_stage in self._memory_stages:
+                open_stage._peak_memory = max(open_stage._peak_memory, peak)
+            tracemalloc.reset_peak()
+            self._memory_stages.append(stage)
+            return current
+
+    def exit_memory_stage(self, stage: _StageTimer):
+        """
+        Stops tracking the allocation peak of a stage.
+
+        :return(int): The highest allocated bytes during the stage.
+        """
+        with self._lock:
+            peak = tracemalloc.get_traced_memory()[1]
+            for open_stage in self._memory_stages:
+                open_stage._peak_memory = max(open_stage._peak_memory, peak)
+            self._memory_stages.remove(stage)
+            return stage._peak_memory
+
+    def add_record(self, record: StageRecord):
+        with self._lock:
+            self._records.append(record)
+            stage = self._summary.setdefault(record.stage, {'calls': 0, 'seconds': 0.0, 'bytes_in': 0,
+                                                            'bytes_out': 0, 'peak_bytes': None})
+            stage['calls'] += 1
+            stage['seconds'] += record.seconds
+            stage['bytes_in'] += record.bytes_in
+            stage['bytes_out'] += record.bytes_out
+            if record.peak_bytes is not None:
+                stage['peak_bytes'] = max(stage['peak_bytes'] or 0, record.peak_bytes)
+
+    def records(self):
+        """
+        Retrieves the recorded measurements.
+
+        :return(list): StageRecord instances in the order the stages ended, only the most recent max_records.
+        """
+        with self._lock:
+            return list(self._records)
+
+    def summary(self):
+        """
+        Aggregates all records per stage, also the ones no longer kept because of max_records.
+
+        :return(dict): Keys are stage names, values are dictionaries with calls, seconds, bytes_in, bytes_out
+            (sums) and peak_bytes (maximum, None if memory is not tracked).
+        """
+        with self._lock:
+            return {name: dict(stage) for name, stage in self._summary.items()}
+
+    def write_json_lines(self, path: str):
+        """
+        Writes every record as one JSON object per line.
+
+        :param path: The output file path.
+        :type path: str
+        :return: The path to the file.
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            for record in self.records():
+                f.write(json.dumps(record.as_dict()) + '\n')
+        return path
+
+    def write_prometheus(self, path: str, prefix: str = 'word_counter'):
+        """
+        Writes the per stage summary in the Prometheus text exposition format. Per URL records are not
+        exported, a label per URL would make the metrics unbounded.
+
+        :param path: The output file path.
+        :type path: str
+        :param prefix: Prefix of the metric names. Default is 'word_counter'.
+        :type prefix: str
+        :return: The path to the file.
+        """
+        metrics = [
+            ('stage_calls_total', 'counter', 'Number of runs of the pipeline stage.', 'calls'),
+            ('stage_seconds_total', 'counter', 'Wall time spent in the pipeline stage.', 'seconds'),
+            ('stage_bytes_in_total', 'counter', 'Size of the input of the pipeline stage.', 'bytes_in'),
+            ('stage_bytes_out_total', 'counter', 'Size of the output of the pipeline stage.', 'bytes_out'),
+            ('stage_peak_bytes', 'gauge', 'Highest allocation peak of a run of the pipeline stage.', 'peak_bytes'),
+        ]
+        summary = self.summary()
+        lines = []
+        for name, metric_type, description, field in metrics:
+            lines.append(f"# HELP {prefix}_{name} {description}")
+            lines.append(f"# TYPE {prefix}_{name} {metric_type}")
+            for stage, values in sorted(summary.items()):
+                if values[field] is not None:
+                    label = stage.replace('\\', '\\\\').replace('"', '\\"')
+                    lines.append(f'{prefix}_{name}{{stage="{label}"}} {values[field]}')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        return path
+
+    def write(self, path: str, output_format: str = 'jsonl'):
+        """
+        Writes the records in the given format.
+
+        :param path: The output file path.
+        :type path: str
+        :param output_format: 'jsonl' for JSON lines or 'prometheus'. Default is 'jsonl'.
+        :type output_format: str
+        :return: The path to the file.
+        """
+        if output_format == 'prometheus':
+            return self.write_prometheus(path)
+        if output_format == 'jsonl':
+            return self.write_json_lines(path)
+        raise ValueError(f"Unknown profile format {output_format}, available formats: jsonl, prometheus")
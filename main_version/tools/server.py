@@ -0,0 +1,335 @@
+import collections
+import concurrent.futures
+import http.server
+import json
+import os
+import socketserver
+import threading
+import time
+import urllib.parse
+from .interview_tools import CountWordsFromUrl, InvalidUrlError
+from .batch import UrlResult
+from .profiler import NULL_PROFILER
+
+
+class AnalysisRequestError(Exception):
+    pass
+
+
+class AnalysisService:
+    """
+    Analyzes URLs for a long-running server, keeping the connection pool, the HTTP response cache,
+    the memo and the imported modules warm between requests.
+
+    Analyses run in a bounded pool of worker threads. Concurrent requests for the same URL are coalesced:
+    the first one fetches the page, the others wait for its result. Successful results are kept in a least
+    recently used result cache for result_ttl seconds.
+    """
+
+    def __init__(self, max_workers: int = 16, max_connections_per_host: int = 4, http=None, cache=None,
+                 memo=None, character_stripper=None, engine: str = 'python', profiler=None,
+                 result_ttl: float = 60.0, max_results: int = 1024):
+        """
+        Initializes the AnalysisService instance.
+
+        :param max_workers: The number of URLs analyzed at the same time. Default is 16.
+        :type max_workers: int
+        :param max_connections_per_host: The maximum number of open connections to a single host. Default is 4.
+        :type max_connections_per_host: int
+        :param http: Connection pool to use instead of a new one. Default is None.
+        :type http: urllib3.PoolManager
+        :param cache: Persistent response cache. Default is None.
+        :type cache: HTTPResponseCache
+        :param memo: Memo of counted words keyed by page content. Default is None.
+        :type memo: CountMemo
+        :param character_stripper: Punctuation marks and special characters removed from the pages.
+            Default is None, which means ASCII punctuation marks.
+        :type character_stripper: CharacterStripper
+        :param engine: Counting engine, 'python' or 'numpy'. Default is 'python'.
+        :type engine: str
+        :param profiler: Records time, sizes and memory of the stages of every analysis. Default is None.
+        :type profiler: StageProfiler
+        :param result_ttl: Seconds a result is served from the result cache, 0 disables it. Default is 60.
+        :type result_ttl: float
+        :param max_results: The maximum number of results in the result cache. Default is 1024.
+        :type max_results: int
+        """
+        if http is None:
+            import urllib3
+            http = urllib3.PoolManager(num_pools=max(10, max_workers),
+                                       maxsize=max_connections_per_host,
+                                       block=True)
+        self.http = http
+        self.cache = cache
+        self.memo = memo
+        self.character_stripper = character_stripper
+        self.engine = engine
+        self.profiler = profiler or NULL_PROFILER
+        self.result_ttl = result_ttl
+        self.max_results = max_results
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+        self.requests = 0
+        self.fetches = 0
+        self.coalesced = 0
+        self.result_hits = 0
+        self.failures = 0
+        self._results = collections.OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def analyze(self, url: str, top_count: int = 10):
+        """
+        Retrieves the top words of a URL.
+
+        :param url: The URL of the web page.
+        :type url: str
+        :param top_count: The number of top words to retrieve, -1 means all words. Default is 10.
+        :type top_count: int
+        :return(dict): The URL, a list of {"word": ..., "count": ...} objects and the source of the result,
+            'fetch', 'coalesced' (joined a running analysis) or 'cache'.
+        :raise: AnalysisRequestError: If the URL is invalid or the page can't be fetched.
+        """
+        result, source = self._get_result(url)
+        if result.error is not None:
+            raise AnalysisRequestError(result.error)
+        top_words = [{'word': word, 'count': count} for word, count in result.word_counter.most_common(top_count)]
+        return {'url': url, 'top_words': top_words, 'source': source}
+
+    def _get_result(self, url: str):
+        """
+        Retrieves the result of a URL from the result cache, a running analysis or a new one.
+
+        :return(tuple): (UrlResult, source)
+        """
+        with self._lock:
+            self.requests += 1
+            entry = self._results.get(url)
+            if entry is not None and time.monotonic() - entry[0] < self.result_ttl:
+                self._results.move_to_end(url)
+                self.result_hits += 1
+                return entry[1], 'cache'
+            future = self._in_flight.get(url)
+            if future is None:
+                self.fetches += 1
+                future = self.executor.submit(self._analyze_url, url)
+                self._in_flight[url] = future
+                source = 'fetch'
+            else:
+                self.coalesced += 1
+                source = 'coalesced'
+        return future.result(), source
+
+    def _analyze_url(self, url: str):
+        """
+        Fetches and counts words of a URL, then publishes the result to the waiting requests.
+        """
+        result = None
+        try:
+            result = self._count_url(url)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight[url]
+                if result is None or result.error is not None:
+                    self.failures += 1
+                elif self.result_ttl > 0:
+                    self._results[url] = (time.monotonic(), result)
+                    self._results.move_to_end(url)
+                    while len(self._results) > self.max_results:
+                        self._results.popitem(last=False)
+
+    def _count_url(self, url: str):
+        """
+        Counts words of a URL through the shared connection pool and caches.
+        """
+        try:
+            count_handler = CountWordsFromUrl(url, os.devnull, http=self.http, cache=self.cache, memo=self.memo,
+                                              character_stripper=self.character_stripper, engine=self.engine,
+                                              profiler=self.profiler)
+        except InvalidUrlError:
+            return UrlResult(url, error="invalid URL format")
+        word_counter = count_handler.word_counter
+        if word_counter is None or count_handler.request_failed:
+            return UrlResult(url, error="request failed")
+        return UrlResult(url, word_counter)
+
+    def stats(self):
+        """
+        Retrieves request statistics.
+
+        :return(dict): Counts of requests, fetches, coalesced requests, result cache hits, failures,
+            running analyses and cached results.
+        """
+        with self._lock:
+            return {'requests': self.requests, 'fetches': self.fetches, 'coalesced': self.coalesced,
+                    'result_hits': self.result_hits, 'failures': self.failures,
+                    'in_flight': len(self._in_flight), 'results': len(self._results)}
+
+    def close(self):
+        """
+        Waits for the running analyses and stops the worker threads.
+        """
+        self.executor.shutdown(wait=True)
+
+
+class AnalysisRequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    JSON API of AnalysisService:
+
+        POST /analyze  {"url": "https://example.com/", "top": 10}
+        GET  /analyze?url=https://example.com/&top=10
+        GET  /health
+
+    Connections are kept alive (HTTP/1.1), so a client can send many requests over one connection.
+    """
+
+    protocol_version = "HTTP/1.1"
+    max_body_size = 2 ** 16
+
+    def do_GET(self):
+        parsed = urllib.parse.urlsplit(self.path)
+        if parsed.path == '/health':
+            self._send_json(200, {'status': 'ok', **self.server.service.stats()})
+        elif parsed.path == '/analyze':
+            query = urllib.parse.parse_qs(parsed.query)
+            self._analyze({name: values[-1] for name, values in query.items()})
+        else:
+            self._send_json(404, {'error': f"unknown path {parsed.path}"})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > self.max_body_size:
+            self.close_connection = True
+            self._send_json(413, {'error': "request body too large"})
+            return
+        # The body is read before any answer, so the next request of the connection starts after it.
+        body = self.rfile.read(length)
+        if urllib.parse.urlsplit(self.path).path != '/analyze':
+            self._send_json(404, {'error': f"unknown path {self.path}"})
+            return
+        try:
+            request = json.loads(body or b'{}')
+        except ValueError:
+            self._send_json(400, {'error': "request body is not valid JSON"})
+            return
+        if not isinstance(request, dict):
+            self._send_json(400, {'error': "request body must be a JSON object"})
+            return
+        self._analyze(request)
+
+    def _analyze(self, request: dict):
+        """
+        Validates an analysis request and sends its result.
+        """
+        url = request.get('url')
+        try:
+            top_count = int(request.get('top', 10))
+        except (TypeError, ValueError):
+            top_count = None
+        if not isinstance(url, str) or top_count is None or top_count < -1:
+            self._send_json(400, {'error': "expected a 'url' string and an optional 'top' integer >= -1"})
+            return
+        try:
+            self._send_json(200, self.server.service.analyze(url, top_count))
+        except AnalysisRequestError as err:
+            status = 400 if str(err) == "invalid URL format" else 502
+            self._send_json(status, {'url': url, 'error': str(err)})
+        except Exception as err:
+            # An unexpected failure of the analysis, shared by the coalesced requests, still gets a JSON reply.
+            self._send_json(500, {'url': url, 'error': f"analysis failed, reason {err}"})
+
+    def _send_json(self, status: int, body: dict):
+        """
+        Sends a JSON response.
+        """
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self):
+        # Unix socket clients have no address.
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class AnalysisHTTPServer(http.server.ThreadingHTTPServer):
+    """
+    Serves AnalysisService over TCP.
+    """
+
+    def __init__(self, address: tuple, service: AnalysisService, verbose: bool = False):
+        self.service = service
+        self.verbose = verbose
+        super().__init__(address, AnalysisRequestHandler)
+
+
+class AnalysisUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Serves AnalysisService over a Unix socket, a stale socket file is replaced.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path: str, service: AnalysisService, verbose: bool = False):
+        self.service = service
+        self.verbose = verbose
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, AnalysisRequestHandler)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+def create_server(address: str, service: AnalysisService, verbose: bool = False):
+    """
+    Creates a server of the given address.
+
+    :param address: 'host:port' (port 0 picks a free one) or 'unix:<socket path>'.
+    :type address: str
+    :param service: The service answering the requests.
+    :type service: AnalysisService
+    :param verbose: If True, every request is logged to standard error. Default is False.
+    :type verbose: bool
+    :return(socketserver.BaseServer): The server, not serving yet.
+    :raise: ValueError: If the address format is invalid.
+    """
+    if address.startswith('unix:'):
+        return AnalysisUnixServer(address[len('unix:'):], service, verbose)
+    host, separator, port = address.rpartition(':')
+    if not separator or not port.isdigit():
+        raise ValueError(f"Invalid server address {address}, expected host:port or unix:<socket path>")
+    return AnalysisHTTPServer((host.strip('[]') or '127.0.0.1', int(port)), service, verbose)
+
+
+def serve(address: str, service: AnalysisService, verbose: bool = False):
+    """
+    Serves requests until interrupted with Ctrl+C.
+
+    :param address: 'host:port' or 'unix:<socket path>', see create_server().
+    :type address: str
+    :param service: The service answering the requests.
+    :type service: AnalysisService
+    :param verbose: If True, every request is logged to standard error. Default is False.
+    :type verbose: bool
+    """
+    server = create_server(address, service, verbose)
+    if isinstance(server.server_address, tuple):
+        print(f"Serving on http://{server.server_address[0]}:{server.server_address[1]}/analyze")
+    else:
+        print(f"Serving on unix:{server.server_address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
@@ -0,0 +1,574 @@
+import array
+import hashlib
+import heapq
+import math
+import struct
+import sys
+from .top_k import rank_key
+
+
+class SketchFormatError(Exception):
+    pass
+
+
+def format_heavy_hitters(heavy_hitters: list, print_to_console: bool = False):
+    """
+    Formats heavy hitters as numbered rows with their error bounds, e.g. "1. word --- 120 (error <= 3)".
+
+    :param heavy_hitters: A list of (word, estimate, error) tuples, see SketchWordCounter.heavy_hitters().
+    :type heavy_hitters: list
+    :param print_to_console: If True, prints the rows to the console. Default is False.
+    :type print_to_console: bool
+    :return(list): A list of strings representing the words, their estimated counts and error bounds.
+    """
+    return_list = []
+    for iterator, (word, count, error) in enumerate(heavy_hitters, start=1):
+        row = f"{iterator}. {word} --- {count} (error <= {error})"
+        if print_to_console:
+            print(row)
+        return_list.append(row)
+    return return_list
+
+
+class CountMinSketch:
+    """
+    Count-Min sketch: a depth x width table of counters estimating word counts in fixed memory.
+
+    Every word increments one counter per row, the estimate is the minimum of its counters. An estimate is
+    never lower than the true count and, with probability 1 - exp(-depth), at most e / width * total higher.
+    Sketches of the same dimensions and seed are merged by adding their tables. Words are hashed with keyed
+    BLAKE2b, so the positions do not depend on the process (unlike hash()) and sketches built by different
+    processes can be merged. The seed is prepended to the hashed bytes, keyed hashing is twice as slow.
+    """
+
+    def __init__(self, width: int, depth: int, seed: int = 0):
+        """
+        Initializes an empty CountMinSketch instance.
+
+        :param width: The number of counters of a row.
+        :type width: int
+        :param depth: The number of rows.
+        :type depth: int
+        :param seed: Selects the hash functions, only sketches of the same seed can be merged. Default is 0.
+        :type seed: int
+        """
+        if width <= 0 or depth <= 0:
+            raise ValueError("Width and depth should be positive")
+        self.width = width
+        self.depth = depth
+        self.seed = seed
+        self.table = array.array('q', bytes(8 * width * depth))
+        self._hash_prefix = seed.to_bytes(8, 'little')
+
+    @classmethod
+    def from_error(cls, error: float, confidence: float, seed: int = 0):
+        """
+        Creates a sketch whose estimates exceed the true counts by at most error * total with the given confidence.
+
+        :param error: The maximum overestimation relative to the total count, e.g. 0.0001.
+        :type error: float
+        :param confidence: The probability that an estimate is within the error, e.g. 0.99.
+        :type confidence: float
+        :param seed: See __init__(). Default is 0.
+        :type seed: int
+        :return(CountMinSketch): The created sketch.
+        """
+        if not 0 < error < 1 or not 0 < confidence < 1:
+            raise ValueError("Error and confidence should be between 0 and 1")
+        return cls(math.ceil(math.e / error), math.ceil(math.log(1 / (1 - confidence))), seed)
+
+    def _positions(self, word: str):
+        # Double hashing: the row positions are derived from two 32-bit halves of one digest.
+        digest = int.from_bytes(hashlib.blake2b(self._hash_prefix + word.encode('utf-8', 'surrogatepass'),
+                                                digest_size=8).digest(), 'little')
+        first = digest & 0xFFFFFFFF
+        second = (digest >> 32) | 1
+        width = self.width
+        return [row * width + (first + row * second) % width for row in range(self.depth)]
+
+    def add(self, word: str, count: int = 1):
+        """
+        Adds occurrences of a word.
+
+        :param word: The word.
+        :type word: str
+        :param count: The number of occurrences. Default is 1.
+        :type count: int
+        :return(int): The estimate of the word after the update.
+        """
+        # Same positions as _positions(), computed inline: this is the hot loop of SketchWordCounter.
+        digest = int.from_bytes(hashlib.blake2b(self._hash_prefix + word.encode('utf-8', 'surrogatepass'),
+                                                digest_size=8).digest(), 'little')
+        offset = digest & 0xFFFFFFFF
+        step = (digest >> 32) | 1
+        width = self.width
+        table = self.table
+        estimate = None
+        for row_start in range(0, len(table), width):
+            position = row_start + offset % width
+            value = table[position] + count
+            table[position] = value
+            if estimate is None or value < estimate:
+                estimate = value
+            offset += step
+        return estimate
+
+    def estimate(self, word: str):
+        """
+        Estimates the count of a word.
+
+        :param word: The word.
+        :type word: str
+        :return(int): An upper bound of the count.
+        """
+        table = self.table
+        return min(table[position] for position in self._positions(word))
+
+    def merge(self, other: "CountMinSketch"):
+        """
+        Adds the counters of another sketch to this one.
+
+        :param other: Sketch of the same width, depth and seed.
+        :type other: CountMinSketch
+        :return(CountMinSketch): The sketch instance, to allow chaining.
+        :raise: ValueError: If the sketches have different dimensions or seeds.
+        """
+        if (self.width, self.depth, self.seed) != (other.width, other.depth, other.seed):
+            raise ValueError("Only sketches of the same width, depth and seed can be merged")
+        self.table = array.array('q', map(sum, zip(self.table, other.table)))
+        return self
+
+    def memory_usage(self):
+        """
+        :return(int): The size of the table in bytes.
+        """
+        return self.table.itemsize * len(self.table)
+
+
+class SpaceSaving:
+    """
+    Space-Saving summary tracking the most frequent words with at most capacity counters.
+
+    A new word replaces the word with the lowest counter and inherits its count, which becomes the word's
+    error. Every tracked count is an upper bound of the true count and count - error a lower bound; every
+    word whose true count exceeds total / capacity is tracked. The lowest counter is found with a heap of
+    (count, word) entries, outdated entries are skipped and the heap is rebuilt when it gets too long.
+
+    If an upper bound of a new word's count is known (e.g. a Count-Min estimate), a word whose bound does not
+    exceed the lowest counter is not admitted, and an admitted word's count is capped by the bound. Both keep
+    the guarantees and avoid evicting frequent words for the long tail of rare ones.
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Initializes an empty SpaceSaving instance.
+
+        :param capacity: The maximum number of tracked words.
+        :type capacity: int
+        """
+        if capacity <= 0:
+            raise ValueError("Capacity should be positive")
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self._heap = []
+        # The lowest counter never decreases between merges, so a bound not above the last seen one
+        # is rejected without looking at the heap.
+        self._min_floor = 0
+
+    def __len__(self):
+        return len(self.counts)
+
+    def add(self, word: str, count: int = 1, upper_bound: int = None):
+        """
+        Adds occurrences of a word.
+
+        :param word: The word.
+        :type word: str
+        :param count: The number of occurrences. Default is 1.
+        :type count: int
+        :param upper_bound: An upper bound of the total count of the word including these occurrences.
+            Default is None, which means unknown.
+        :type upper_bound: int
+        """
+        counts = self.counts
+        if word in counts:
+            counts[word] += count
+        elif len(counts) < self.capacity:
+            counts[word] = count
+            self.errors[word] = 0
+        else:
+            if upper_bound is not None and upper_bound <= self._min_floor:
+                return
+            min_count, min_word = self._pop_min()
+            self._min_floor = min_count
+            if upper_bound is not None and upper_bound <= min_count:
+                heapq.heappush(self._heap, (min_count, min_word))
+                return
+            del counts[min_word]
+            del self.errors[min_word]
+            new_count = min_count + count if upper_bound is None else min(min_count + count, upper_bound)
+            counts[word] = new_count
+            self.errors[word] = new_count - count
+        heapq.heappush(self._heap, (counts[word], word))
+        if len(self._heap) > 4 * self.capacity:
+            self._rebuild_heap()
+
+    def min_count(self):
+        """
+        :return(int): The upper bound of the count of any untracked word, 0 while the summary is not full.
+        """
+        if len(self.counts) < self.capacity:
+            return 0
+        min_entry = self._pop_min()
+        heapq.heappush(self._heap, min_entry)
+        return min_entry[0]
+
+    def _pop_min(self):
+        """
+        Removes and returns the up-to-date heap entry of the word with the lowest counter.
+        """
+        heap = self._heap
+        counts = self.counts
+        while True:
+            count, word = heapq.heappop(heap)
+            if counts.get(word) == count:
+                return count, word
+
+    def _rebuild_heap(self):
+        self._heap = [(count, word) for word, count in self.counts.items()]
+        heapq.heapify(self._heap)
+
+    def merge(self, other: "SpaceSaving"):
+        """
+        Adds another summary to this one. A word missing in a full summary counts as its lowest counter,
+        then the capacity words with the highest counts are kept, so the bounds of both summaries still hold.
+
+        :param other: Summary to merge into this one.
+        :type other: SpaceSaving
+        :return(SpaceSaving): The summary instance, to allow chaining.
+        """
+        own_min = self.min_count()
+        other_min = other.min_count()
+        merged = {}
+        for word in self.counts.keys() | other.counts.keys():
+            count = self.counts.get(word, own_min) + other.counts.get(word, other_min)
+            lower_bound = (self.counts.get(word, 0) - self.errors.get(word, 0) + other.counts.get(word, 0)
+                           - other.errors.get(word, 0))
+            merged[word] = (count, count - lower_bound)
+        kept = heapq.nlargest(self.capacity, merged.items(), key=lambda item: item[1][0])
+        self.counts = {word: count for word, (count, error) in kept}
+        self.errors = {word: error for word, (count, error) in kept}
+        self._min_floor = 0
+        self._rebuild_heap()
+        return self
+
+    def memory_usage(self):
+        """
+        :return(int): The size in bytes of the dictionaries, the heap and the tracked words.
+        """
+        return (sys.getsizeof(self.counts) + sys.getsizeof(self.errors) + sys.getsizeof(self._heap)
+                + sum(sys.getsizeof(word) + sys.getsizeof(count) for word, count in self.counts.items())
+                + 64 * len(self._heap))
+
+
+class SketchWordCounter:
+    """
+    Approximate word frequency table of fixed size for crawl-scale totals, where only the top words matter.
+
+    Words are collected in a small dictionary of at most pending_limit words, which is flushed into a
+    Count-Min sketch and a Space-Saving summary, so a word is hashed once per flush instead of once per
+    occurrence. The memory footprint depends only on error, confidence and pending_limit, not on the
+    vocabulary. The estimate of a tracked word is the lower of its Space-Saving and sketch counts, both are
+    upper bounds; heavy_hitters() also reports how much an estimate may exceed the true count.
+
+    Counters with the same parameters are merged exactly for the sketch part and with the mergeable
+    summaries rule for the Space-Saving part, also after save() and load() in another process.
+    """
+
+    magic = b'CMSK'
+    version = 1
+    _header = struct.Struct('<4sB?QQQQQQ')
+
+    def __init__(self, error: float = 0.0001, confidence: float = 0.99, capacity: int = None,
+                 pending_limit: int = 8192, seed: int = 0):
+        """
+        Initializes an empty SketchWordCounter instance.
+
+        :param error: The maximum overestimation of a count relative to the total count. Default is 0.0001.
+        :type error: float
+        :param confidence: The probability that a sketch estimate is within the error. Default is 0.99.
+        :type confidence: float
+        :param capacity: The number of words tracked by Space-Saving. Default is None, which means 1 / error.
+        :type capacity: int
+        :param pending_limit: The number of distinct words collected before they are flushed. Default is 8192.
+        :type pending_limit: int
+        :param seed: Selects the hash functions, only counters of the same seed can be merged. Default is 0.
+        :type seed: int
+        """
+        if pending_limit <= 0:
+            raise ValueError("Pending limit should be positive")
+        self.sketch = CountMinSketch.from_error(error, confidence, seed)
+        self.summary = SpaceSaving(capacity or math.ceil(1 / error))
+        self.error = error
+        self.confidence = confidence
+        self.pending_limit = pending_limit
+        self.total_words = 0
+        self._pending = {}
+        self._pending_word = ''
+
+    def add(self, word: str, count: int = 1):
+        """
+        Adds occurrences of a word.
+
+        :param word: The word, expected to be lowercased like in WordCounter.
+        :type word: str
+        :param count: The number of occurrences. Default is 1.
+        :type count: int
+        """
+        pending = self._pending
+        pending[word] = pending.get(word, 0) + count
+        self.total_words += count
+        if len(pending) >= self.pending_limit:
+            self._flush_pending()
+
+    def update(self, text: str):
+        """
+        Counts all whitespace separated words of the given text.
+
+        :param text: Cleaned text to count.
+        :type text: str
+        :return(SketchWordCounter): The counter instance, to allow chaining.
+        """
+        return self.update_tokens(text.lower().split())
+
+    def feed(self, text_chunk: str):
+        """
+        Counts words of a text delivered in chunks, see WordCounter.feed().
+
+        :param text_chunk: The next part of the cleaned text.
+        :type text_chunk: str
+        :return(SketchWordCounter): The counter instance, to allow chaining.
+        """
+        text = self._pending_word + text_chunk
+        if not text or text[-1].isspace():
+            self._pending_word = ''
+        else:
+            parts = text.rsplit(None, 1)
+            self._pending_word = parts[-1]
+            text = parts[0] if len(parts) == 2 else ''
+        return self.update(text)
+
+    def flush(self):
+        """
+        Counts the word kept by feed() after the last chunk and adds the pending words to the sketch
+        and the summary.
+
+        :return(SketchWordCounter): The counter instance, to allow chaining.
+        """
+        text, self._pending_word = self._pending_word, ''
+        self.update(text)
+        self._flush_pending()
+        return self
+
+    def update_tokens(self, tokens):
+        """
+        Counts already tokenized words. Tokens are expected to be lowercased.
+
+        :param tokens: An iterable of words.
+        :type tokens: Iterable[str]
+        :return(SketchWordCounter): The counter instance, to allow chaining.
+        """
+        pending = self._pending
+        get_count = pending.get
+        pending_limit = self.pending_limit
+        tokens_count = 0
+        for token in tokens:
+            pending[token] = get_count(token, 0) + 1
+            tokens_count += 1
+            if len(pending) >= pending_limit:
+                self._flush_pending()
+                pending = self._pending
+                get_count = pending.get
+        self.total_words += tokens_count
+        return self
+
+    def update_counts(self, counts: dict):
+        """
+        Adds a frequency table, e.g. WordCounter.counts of a single document.
+
+        :param counts: A dictionary where keys are words and values are their counts.
+        :type counts: dict
+        :return(SketchWordCounter): The counter instance, to allow chaining.
+        """
+        add = self.add
+        for word, count in counts.items():
+            add(word, count)
+        return self
+
+    def merge(self, other):
+        """
+        Adds counts of another SketchWordCounter or of an exact WordCounter to this one.
+
+        :param other: Counts to merge into this one.
+        :type other: SketchWordCounter or WordCounter
+        :return(SketchWordCounter): The counter instance, to allow chaining.
+        :raise: ValueError: If the other counter has a different sketch size or seed.
+        """
+        if not isinstance(other, SketchWordCounter):
+            return self.update_counts(other.counts)
+        self._flush_pending()
+        other._flush_pending()
+        self.sketch.merge(other.sketch)
+        self.summary.merge(other.summary)
+        self.total_words += other.total_words
+        return self
+
+    def _flush_pending(self):
+        """
+        Adds the pending words to the sketch and the summary.
+        """
+        add_to_sketch = self.sketch.add
+        add_to_summary = self.summary.add
+        for word, count in self._pending.items():
+            add_to_summary(word, count, add_to_sketch(word, count))
+        self._pending = {}
+
+    def estimate(self, word: str):
+        """
+        Estimates the count of any word, tracked or not.
+
+        :param word: The word.
+        :type word: str
+        :return(int): An upper bound of the count (with the configured confidence).
+        """
+        self._flush_pending()
+        estimate = self.sketch.estimate(word)
+        if word in self.summary.counts:
+            estimate = min(estimate, self.summary.counts[word])
+        return estimate
+
+    def heavy_hitters(self, top_count: int = 10):
+        """
+        Retrieves the words with the highest estimated counts and their error bounds.
+
+        :param top_count: The number of words to retrieve, -1 means all tracked words. Default is 10.
+        :type top_count: int
+        :return(list): A list of (word, estimate, error) tuples in descending estimate order, ties sorted
+            alphabetically. The true count lies between estimate - error and estimate.
+        """
+        self._flush_pending()
+        summary = self.summary
+        estimate = self.sketch.estimate
+        ranked = []
+        for word, count in summary.counts.items():
+            upper_bound = min(count, estimate(word))
+            ranked.append((word, upper_bound, upper_bound - (count - summary.errors[word])))
+        if top_count == -1:
+            return sorted(ranked, key=rank_key)
+        if top_count <= 0:
+            return []
+        return heapq.nsmallest(top_count, ranked, key=rank_key)
+
+    def most_common(self, top_count: int = 10):
+        """
+        Retrieves words with the highest estimated counts, see heavy_hitters().
+
+        :param top_count: The number of top words to retrieve, -1 means all tracked words. Default is 10.
+        :type top_count: int
+        :return(list): A list of (word, estimate) tuples in descending count order, ties sorted alphabetically.
+        """
+        return [(word, count) for word, count, _ in self.heavy_hitters(top_count)]
+
+    def unique_words(self):
+        """
+        Retrieves the tracked words, rare words are not known to the counter.
+
+        :return(set): A set of tracked words.
+        """
+        self._flush_pending()
+        return set(self.summary.counts)
+
+    def as_dict(self):
+        """
+        Retrieves the estimated counts of the tracked words.
+
+        :return(dict): A dictionary where keys are words and values are their estimated counts.
+        """
+        return dict(self.most_common(-1))
+
+    def memory_usage(self):
+        """
+        Computes the memory held by the counter.
+
+        :return(int): The size in bytes of the sketch, the summary and the pending dictionary with its keys.
+        """
+        pending_size = sys.getsizeof(self._pending) + sum(
+            sys.getsizeof(word) + sys.getsizeof(count) for word, count in self._pending.items())
+        return self.sketch.memory_usage() + self.summary.memory_usage() + pending_size
+
+    def save(self, path: str):
+        """
+        Flushes the counter and writes it to a binary file, e.g. to merge it in another process.
+
+        :param path: The file path.
+        :type path: str
+        :return: The path to the file.
+        """
+        self._flush_pending()
+        sketch = self.sketch
+        summary = self.summary
+        words = '\n'.join(summary.counts).encode('utf-8', 'surrogatepass')
+        with open(path, 'wb') as f:
+            f.write(self._header.pack(self.magic, self.version, sys.byteorder == 'little', sketch.width,
+                                      sketch.depth, sketch.seed, summary.capacity, self.total_words, len(summary)))
+            f.write(struct.pack('<dd', self.error, self.confidence))
+            sketch.table.tofile(f)
+            array.array('q', summary.counts.values()).tofile(f)
+            array.array('q', (summary.errors[word] for word in summary.counts)).tofile(f)
+            f.write(words)
+        return path
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        Reads a counter written by save().
+
+        :param path: The file path.
+        :type path: str
+        :return(SketchWordCounter): The loaded counter.
+        :raise: SketchFormatError: If the file is not a saved counter.
+        """
+        with open(path, 'rb') as f:
+            header = f.read(cls._header.size + 16)
+            if len(header) != cls._header.size + 16:
+                raise SketchFormatError(f"{path} is too short to be a sketch file")
+            (magic, version, little_endian, width, depth, seed, capacity, total_words,
+             tracked_count) = cls._header.unpack(header[:cls._header.size])
+            if magic != cls.magic or version != cls.version:
+                raise SketchFormatError(f"{path} is not a sketch file of version {cls.version}")
+            error, confidence = struct.unpack('<dd', header[cls._header.size:])
+            table = array.array('q')
+            counts = array.array('q')
+            errors = array.array('q')
+            try:
+                table.fromfile(f, width * depth)
+                counts.fromfile(f, tracked_count)
+                errors.fromfile(f, tracked_count)
+            except EOFError as err:
+                raise SketchFormatError(f"{path} is truncated, reason {err}") from err
+            words = f.read().decode('utf-8', 'surrogatepass').split('\n') if tracked_count else []
+        if len(words) != tracked_count:
+            raise SketchFormatError(f"{path} is truncated or corrupted")
+        if little_endian != (sys.byteorder == 'little'):
+            for values in (table, counts, errors):
+                values.byteswap()
+        counter = cls(error, confidence, capacity, seed=seed)
+        if (counter.sketch.width, counter.sketch.depth) != (width, depth):
+            raise SketchFormatError(f"{path} has a sketch size not matching its error and confidence")
+        counter.sketch.table = table
+        counter.summary.counts = dict(zip(words, counts))
+        counter.summary.errors = dict(zip(words, errors))
+        counter.summary._rebuild_heap()
+        counter.total_words = total_words
+        return counter
@@ -0,0 +1,133 @@
+import heapq
+
+
+def rank_key(item: tuple):
+    """
+    Sorting key for (word, count) pairs: descending count, ties broken alphabetically.
+
+    :param item: A (word, count) pair.
+    :type item: tuple
+    :return(tuple): The key used to rank the pair.
+    """
+    return -item[1], item[0]
+
+
+def select_top_words(counts: dict, top_count: int = 10):
+    """
+    Selects words with the highest counts using a bounded heap, in O(n log k).
+
+    :param counts: A dictionary where keys are words and values are their counts.
+    :type counts: dict
+    :param top_count: The number of top words to retrieve, -1 means all words. Default is 10.
+    :type top_count: int
+    :return(list): A list of (word, count) tuples in descending count order.
+    """
+    if top_count == -1:
+        return sorted(counts.items(), key=rank_key)
+    if top_count <= 0:
+        return []
+    return heapq.nsmallest(top_count, counts.items(), key=rank_key)
+
+
+def format_top_words(top_words: list, print_to_console: bool = False):
+    """
+    Formats ranked words as numbered rows, e.g. "1. word --- 12".
+
+    :param top_words: A list of (word, count) tuples in descending count order.
+    :type top_words: list
+    :param print_to_console: If True, prints the rows to the console. Default is False.
+    :type print_to_console: bool
+    :return(list): A list of strings representing the top words and their counts.
+    """
+    return_list = []
+    for iterator, (word, count) in enumerate(top_words, start=1):
+        row = f"{iterator}. {word} --- {count}"
+        if print_to_console:
+            print(row)
+        return_list.append(row)
+    return return_list
+
+
+class _RankedWord:
+    """
+    Heap entry ordered so that the lowest ranked word is at the top of a min-heap.
+    """
+    __slots__ = ('count', 'word')
+
+    def __init__(self, count: int, word: str):
+        self.count = count
+        self.word = word
+
+    def __lt__(self, other: "_RankedWord"):
+        if self.count != other.count:
+            return self.count < other.count
+        return self.word > other.word
+
+
+class TopKTracker:
+    """
+    Keeps the current top-K words while counts are being updated.
+
+    Counts reported for a word must never decrease, which holds for every counter in this package.
+    Each update costs O(log k), the leaderboard can be read at any time without sorting all words.
+    """
+
+    def __init__(self, top_count: int = 10):
+        """
+        Initializes the TopKTracker instance.
+
+        :param top_count: The number of top words to track.
+        :type top_count: int
+        """
+        if top_count <= 0:
+            raise ValueError("Tracked top count should be a positive number")
+        self.top_count = top_count
+        self._members = {}
+        self._heap = []
+
+    def observe(self, word: str, count: int):
+        """
+        Reports the current count of a word.
+
+        :param word: The updated word.
+        :type word: str
+        :param count: The current total count of the word.
+        :type count: int
+        """
+        members = self._members
+        if word in members:
+            members[word] = count
+            heapq.heappush(self._heap, _RankedWord(count, word))
+            if len(self._heap) > 4 * self.top_count:
+                self._heap = [_RankedWord(member_count, member) for member, member_count in members.items()]
+                heapq.heapify(self._heap)
+        elif len(members) < self.top_count:
+            members[word] = count
+            heapq.heappush(self._heap, _RankedWord(count, word))
+        else:
+            worst = self._pop_stale_entries()
+            candidate = _RankedWord(count, word)
+            if worst < candidate:
+                heapq.heapreplace(self._heap, candidate)
+                del members[worst.word]
+                members[word] = count
+
+    def _pop_stale_entries(self):
+        """
+        Drops heap entries that no longer match the tracked counts.
+
+        :return(_RankedWord): The valid lowest ranked entry.
+        """
+        heap = self._heap
+        members = self._members
+        while members.get(heap[0].word) != heap[0].count:
+            heapq.heappop(heap)
+        return heap[0]
+
+    def leaderboard(self):
+        """
+        Retrieves the tracked words.
+
+        :return(list): A list of (word, count) tuples in descending count order.
+        """
+        return sorted(self._members.items(), key=rank_key)
@@ -0,0 +1,499 @@
+import array
+import heapq
+import itertools
+import struct
+import sys
+from .top_k import rank_key
+
+
+class VocabularyFormatError(Exception):
+    pass
+
+
+def _encode_length(length: int):
+    """
+    Encodes a word length as a variable-length number (7 bits per byte, lowest bits first).
+    """
+    encoded = bytearray()
+    while length >= 0x80:
+        encoded.append(length & 0x7F | 0x80)
+        length >>= 7
+    encoded.append(length)
+    return encoded
+
+
+def _decode_length(words: bytearray, offset: int):
+    """
+    Decodes a word length written by _encode_length().
+
+    :return(tuple): (length, position of the first byte of the word)
+    """
+    length = 0
+    shift = 0
+    while True:
+        byte = words[offset]
+        offset += 1
+        length |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return length, offset
+        shift += 7
+
+
+class _SortedRun:
+    """
+    Immutable block of distinct words sorted by their UTF-8 bytes, with their counts.
+
+    Words are stored one after another in a bytearray, each prefixed by its length. Counts are kept
+    in a one byte array, counts of 255 or more in a dictionary keyed by the word index. Offsets of
+    every checkpoint_interval-th word are kept for the binary search.
+    """
+
+    checkpoint_interval = 64
+    large_count = 255
+
+    def __init__(self, tier: int = 0):
+        self.tier = tier
+        self.words = bytearray()
+        self.counts = array.array('B')
+        self.large_counts = {}
+        self.checkpoints = array.array('Q')
+
+    def __len__(self):
+        return len(self.counts)
+
+    @classmethod
+    def from_sorted_items(cls, items, tier: int = 0):
+        """
+        Builds a run from (encoded word, count) tuples sorted by the word, equal words are summed.
+        """
+        run = cls(tier)
+        words = run.words
+        counts = run.counts
+        large_counts = run.large_counts
+        checkpoints = run.checkpoints
+        interval = cls.checkpoint_interval
+        large_count = cls.large_count
+        previous_word = None
+        previous_count = 0
+        for encoded_word, count in itertools.chain(items, ((None, 0),)):
+            if encoded_word == previous_word:
+                previous_count += count
+                continue
+            if previous_word is not None:
+                index = len(counts)
+                if index % interval == 0:
+                    checkpoints.append(len(words))
+                if len(previous_word) < 0x80:
+                    words.append(len(previous_word))
+                else:
+                    words += _encode_length(len(previous_word))
+                words += previous_word
+                if previous_count < large_count:
+                    counts.append(previous_count)
+                else:
+                    counts.append(large_count)
+                    large_counts[index] = previous_count
+            previous_word = encoded_word
+            previous_count = count
+        return run
+
+    def count_at(self, index: int):
+        count = self.counts[index]
+        return self.large_counts[index] if count == self.large_count else count
+
+    def _word_at_offset(self, offset: int):
+        """
+        :return(tuple): (encoded word, offset of the next word)
+        """
+        words = self.words
+        length = words[offset]
+        if length < 0x80:
+            start = offset + 1
+        else:
+            length, start = _decode_length(words, offset)
+        return bytes(words[start:start + length]), start + length
+
+    def word_at(self, index: int):
+        offset = self.checkpoints[index // self.checkpoint_interval]
+        for _ in range(index % self.checkpoint_interval):
+            offset = self._word_at_offset(offset)[1]
+        return self._word_at_offset(offset)[0]
+
+    def find(self, encoded_word: bytes):
+        """
+        :return(int): Index of the word, or -1 if the run does not contain it.
+        """
+        checkpoints = self.checkpoints
+        low, high = 0, len(checkpoints)
+        while low < high:
+            middle = (low + high) // 2
+            if self._word_at_offset(checkpoints[middle])[0] <= encoded_word:
+                low = middle + 1
+            else:
+                high = middle
+        if low == 0:
+            return -1
+        index = (low - 1) * self.checkpoint_interval
+        offset = checkpoints[low - 1]
+        for index in range(index, min(index + self.checkpoint_interval, len(self.counts))):
+            word, offset = self._word_at_offset(offset)
+            if word == encoded_word:
+                return index
+            if word > encoded_word:
+                return -1
+        return -1
+
+    def items(self):
+        """
+        :return(generator): Yields (encoded word, count) tuples in word order.
+        """
+        words = self.words
+        counts = self.counts
+        large_counts = self.large_counts
+        large_count = self.large_count
+        offset = 0
+        for index, count in enumerate(counts):
+            length = words[offset]
+            if length < 0x80:
+                start = offset + 1
+            else:
+                length, start = _decode_length(words, offset)
+            offset = start + length
+            yield bytes(words[start:offset]), large_counts[index] if count == large_count else count
+
+    def memory_usage(self):
+        return (sys.getsizeof(self.words) + sys.getsizeof(self.counts) + sys.getsizeof(self.checkpoints)
+                + sys.getsizeof(self.large_counts)
+                + sum(sys.getsizeof(index) + sys.getsizeof(count) for index, count in self.large_counts.items()))
+
+
+class CompactVocabulary:
+    """
+    Memory efficient word frequency table for very large vocabularies.
+
+    New counts are collected in a small dictionary. When it reaches pending_limit words, its words
+    are sorted and interned as UTF-8 bytes in an immutable sorted run: one bytearray with length
+    prefixed words, a one byte count per word (larger counts in a dictionary) and a sparse index
+    for binary search. Runs are merged in tiers like in a log-structured merge tree, fanout runs
+    of a tier are merged into one run of the next tier, so a word is copied O(log n) times.
+    No Python object is kept per interned word: a word costs the length of its bytes plus about
+    2 bytes, instead of around 80 bytes in a dict of str to int.
+
+    Reading all words (items(), most_common(), save(), len()) first compacts everything into a single run.
+    """
+
+    magic = b'CVOC'
+    version = 1
+    _header = struct.Struct('<4sB?QQQQQ')
+
+    def __init__(self, pending_limit: int = 65536, fanout: int = 4):
+        """
+        Initializes an empty CompactVocabulary instance.
+
+        :param pending_limit: The number of words collected in a dictionary before they are interned.
+            Default is 65536.
+        :type pending_limit: int
+        :param fanout: The number of runs of a tier merged together. Default is 4.
+        :type fanout: int
+        """
+        if pending_limit <= 0 or fanout < 2:
+            raise ValueError("Pending limit should be positive and fanout should be at least 2")
+        self.pending_limit = pending_limit
+        self.fanout = fanout
+        self.total_words = 0
+        self._pending = {}
+        self._runs = []
+
+    def __len__(self):
+        self.compact()
+        return len(self._runs[0]) if self._runs else 0
+
+    def __contains__(self, word: str):
+        return self.count(word) > 0
+
+    @classmethod
+    def from_counts(cls, counts: dict):
+        """
+        Creates a vocabulary from an existing frequency table.
+
+        :param counts: A dictionary where keys are words and values are their counts.
+        :type counts: dict
+        :return(CompactVocabulary): The created vocabulary.
+        """
+        return cls().update_counts(counts)
+
+    @classmethod
+    def from_sorted_items(cls, items):
+        """
+        Creates a vocabulary from a stream of counted words in one pass, without collecting them in a dictionary.
+
+        :param items: An iterable of (word, count) tuples in alphabetical (code point) order, equal words are summed.
+        :type items: Iterable[tuple]
+        :return(CompactVocabulary): The created vocabulary.
+        """
+        vocabulary = cls()
+
+        def encoded_items():
+            for word, count in items:
+                vocabulary.total_words += count
+                yield word.encode(), count
+
+        run = _SortedRun.from_sorted_items(encoded_items())
+        if len(run):
+            vocabulary._runs.append(run)
+        return vocabulary
+
+    def add(self, word: str, count: int = 1):
+        """
+        Adds occurrences of a word.
+
+        :param word: The word, expected to be lowercased like in WordCounter.
+        :type word: str
+        :param count: The number of occurrences. Default is 1.
+        :type count: int
+        """
+        pending = self._pending
+        pending[word] = pending.get(word, 0) + count
+        self.total_words += count
+        if len(pending) >= self.pending_limit:
+            self._flush_pending()
+
+    def update_counts(self, counts: dict):
+        """
+        Adds a frequency table, e.g. WordCounter.counts of a single document.
+
+        :param counts: A dictionary where keys are words and values are their counts.
+        :type counts: dict
+        :return(CompactVocabulary): The vocabulary instance, to allow chaining.
+        """
+        pending = self._pending
+        get_count = pending.get
+        pending_limit = self.pending_limit
+        for word, count in counts.items():
+            pending[word] = get_count(word, 0) + count
+            self.total_words += count
+            if len(pending) >= pending_limit:
+                self._flush_pending()
+                pending = self._pending
+                get_count = pending.get
+        return self
+
+    def update_tokens(self, tokens):
+        """
+        Counts already tokenized words. Tokens are expected to be lowercased.
+
+        :param tokens: An iterable of words.
+        :type tokens: Iterable[str]
+        :return(CompactVocabulary): The vocabulary instance, to allow chaining.
+        """
+        add = self.add
+        for token in tokens:
+            add(token)
+        return self
+
+    def merge(self, other):
+        """
+        Adds counts of another vocabulary or WordCounter to this one. Runs of another vocabulary are shared,
+        not copied, they are never modified.
+
+        :param other: Counts to merge into this one.
+        :type other: CompactVocabulary or WordCounter
+        :return(CompactVocabulary): The vocabulary instance, to allow chaining.
+        """
+        if not isinstance(other, CompactVocabulary):
+            return self.update_counts(other.counts)
+        other.compact()
+        self.total_words += other.total_words
+        if other._runs:
+            run = other._runs[0]
+            self._runs.append(run)
+            self._runs.sort(key=lambda sorted_run: -sorted_run.tier)
+            self._merge_full_tiers()
+        return self
+
+    def _flush_pending(self):
+        """
+        Interns the pending words as a new run of the lowest tier.
+        """
+        if not self._pending:
+            return
+        items = sorted((word.encode(), count) for word, count in self._pending.items())
+        self._pending = {}
+        self._runs.append(_SortedRun.from_sorted_items(items))
+        self._merge_full_tiers()
+
+    def _merge_full_tiers(self):
+        """
+        Merges the newest runs while fanout of them belong to the same tier.
+        """
+        runs = self._runs
+        while len(runs) >= self.fanout and all(run.tier == runs[-1].tier for run in runs[-self.fanout:]):
+            merged_runs = runs[-self.fanout:]
+            del runs[-self.fanout:]
+            runs.append(self._merge_runs(merged_runs, merged_runs[0].tier + 1))
+
+    @staticmethod
+    def _merge_runs(runs: list, tier: int):
+        return _SortedRun.from_sorted_items(heapq.merge(*(run.items() for run in runs)), tier)
+
+    def compact(self):
+        """
+        Interns the pending words and merges all runs into one.
+
+        :return(CompactVocabulary): The vocabulary instance, to allow chaining.
+        """
+        self._flush_pending()
+        if len(self._runs) > 1:
+            self._runs = [self._merge_runs(self._runs, max(run.tier for run in self._runs) + 1)]
+        return self
+
+    def count(self, word: str):
+        """
+        Retrieves the count of a word.
+
+        :param word: The word.
+        :type word: str
+        :return(int): The count, 0 for unknown words.
+        """
+        count = self._pending.get(word, 0)
+        encoded_word = word.encode()
+        for run in self._runs:
+            index = run.find(encoded_word)
+            if index != -1:
+                count += run.count_at(index)
+        return count
+
+    def items(self):
+        """
+        Iterates over counted words in alphabetical (code point) order.
+
+        :return(generator): Yields (word, count) tuples.
+        """
+        self.compact()
+        if self._runs:
+            for encoded_word, count in self._runs[0].items():
+                yield encoded_word.decode(), count
+
+    def unique_words(self):
+        """
+        Retrieves a set of counted words.
+
+        :return(set): A set of unique words.
+        """
+        return {word for word, _ in self.items()}
+
+    def as_dict(self):
+        """
+        Retrieves the frequency table as a dictionary.
+
+        :return(dict): A dictionary where keys are words and values are their counts.
+        """
+        return dict(self.items())
+
+    def most_common(self, top_count: int = 10):
+        """
+        Retrieves words with the highest counts.
+
+        The count of the top_count-th word is found on the counts array first and only words which
+        reach it are decoded. If there are at least top_count large counts, only those are looked at.
+        Words are decoded one by one when they are few, otherwise (e.g. a long tail of equal small counts)
+        the run is decoded in one sequential pass, which is cheaper than locating every word separately.
+
+        :param top_count: The number of top words to retrieve, -1 means all words. Default is 10.
+        :type top_count: int
+        :return(list): A list of (word, count) tuples in descending count order, ties sorted alphabetically.
+        """
+        if top_count == -1:
+            return sorted(self.items(), key=rank_key)
+        self.compact()
+        if top_count <= 0 or not self._runs:
+            return []
+        run = self._runs[0]
+        if len(run.large_counts) >= top_count:
+            threshold = heapq.nlargest(top_count, run.large_counts.values())[-1]
+            indexes = [index for index, count in run.large_counts.items() if count >= threshold]
+        else:
+            small_counts = (count for count in run.counts if count != run.large_count)
+            small_top = heapq.nlargest(top_count - len(run.large_counts), small_counts)
+            # Without small counts every count is large and there are fewer words than top_count.
+            threshold = small_top[-1] if small_top else run.large_count
+            indexes = [index for index, count in enumerate(run.counts) if count >= threshold]
+        # word_at() decodes half a checkpoint interval of words on average.
+        if len(indexes) * (run.checkpoint_interval // 2) > len(run):
+            candidates = ((encoded_word.decode(), count) for encoded_word, count in run.items() if count >= threshold)
+        else:
+            candidates = ((run.word_at(index).decode(), run.count_at(index)) for index in indexes)
+        return heapq.nsmallest(top_count, candidates, key=rank_key)
+
+    def memory_usage(self):
+        """
+        Computes the memory held by the vocabulary.
+
+        :return(int): The size in bytes of the runs and of the pending dictionary with its keys.
+        """
+        pending_size = sys.getsizeof(self._pending) + sum(
+            sys.getsizeof(word) + sys.getsizeof(count) for word, count in self._pending.items())
+        return pending_size + sum(run.memory_usage() for run in self._runs)
+
+    def save(self, path: str):
+        """
+        Compacts the vocabulary and writes it to a binary file.
+
+        :param path: The file path.
+        :type path: str
+        :return: The path to the file.
+        """
+        self.compact()
+        run = self._runs[0] if self._runs else _SortedRun()
+        large_indexes = array.array('Q', run.large_counts.keys())
+        large_counts = array.array('Q', run.large_counts.values())
+        with open(path, 'wb') as f:
+            f.write(self._header.pack(self.magic, self.version, sys.byteorder == 'little', self.total_words,
+                                      len(run), len(run.words), len(run.checkpoints), len(large_indexes)))
+            run.counts.tofile(f)
+            run.checkpoints.tofile(f)
+            large_indexes.tofile(f)
+            large_counts.tofile(f)
+            f.write(run.words)
+        return path
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        Reads a vocabulary written by save().
+
+        :param path: The file path.
+        :type path: str
+        :return(CompactVocabulary): The loaded vocabulary.
+        :raise: VocabularyFormatError: If the file is not a saved vocabulary.
+        """
+        with open(path, 'rb') as f:
+            header = f.read(cls._header.size)
+            if len(header) != cls._header.size:
+                raise VocabularyFormatError(f"{path} is too short to be a vocabulary file")
+            (magic, version, little_endian, total_words, words_count, words_size, checkpoints_count,
+             large_counts_count) = cls._header.unpack(header)
+            if magic != cls.magic or version != cls.version:
+                raise VocabularyFormatError(f"{path} is not a vocabulary file of version {cls.version}")
+            run = _SortedRun()
+            large_indexes = array.array('Q')
+            large_counts = array.array('Q')
+            try:
+                run.counts.fromfile(f, words_count)
+                run.checkpoints.fromfile(f, checkpoints_count)
+                large_indexes.fromfile(f, large_counts_count)
+                large_counts.fromfile(f, large_counts_count)
+            except EOFError as err:
+                raise VocabularyFormatError(f"{path} is truncated, reason {err}") from err
+            run.words = bytearray(f.read())
+        if len(run.words) != words_size:
+            raise VocabularyFormatError(f"{path} is truncated or corrupted")
+        if little_endian != (sys.byteorder == 'little'):
+            for values in (run.checkpoints, large_indexes, large_counts):
+                values.byteswap()
+        run.large_counts = dict(zip(large_indexes, large_counts))
+        vocabulary = cls()
+        vocabulary.total_words = total_words
+        if words_count:
+            vocabulary._runs.append(run)
+        return vocabulary
@@ -0,0 +1,173 @@
+from .top_k import select_top_words
+
+ENGINES = ('python', 'numpy')
+
+
+def resolve_engine(engine: str = 'python'):
+    """
+    Checks that the counting engine can be used.
+
+    :param engine: The requested engine, one of ENGINES.
+    :type engine: str
+    :return(str): The engine, or 'python' if NumPy is requested but not installed.
+    :raise: ValueError: If the engine is unknown.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown counting engine {engine}, available engines: {', '.join(ENGINES)}")
+    if engine == 'numpy':
+        from .numpy_counter import numpy
+        if numpy is None:
+            print("NumPy is not installed, the python engine is used instead")
+            return 'python'
+    return engine
+
+
+def create_word_counter(engine: str = 'python'):
+    """
+    Creates an empty counter of the given engine, falling back to WordCounter if NumPy is not installed.
+
+    :param engine: 'python' for WordCounter or 'numpy' for NumpyWordCounter. Default is 'python'.
+    :type engine: str
+    :return(WordCounter): The counter.
+    """
+    if engine == 'numpy':
+        from .numpy_counter import NumpyWordCounter, numpy
+        if numpy is not None:
+            return NumpyWordCounter()
+    return WordCounter()
+
+
+class WordCounter:
+    """
+    Hash-map based word frequency counter.
+
+    Words are lowercased once and counted in a single pass over the tokens, so building the
+    frequency table is linear in the size of the text instead of O(unique words x total words).
+    """
+
+    def __init__(self, tracker=None):
+        """
+        Initializes an empty WordCounter instance.
+
+        :param tracker: Optional TopKTracker notified about every count change. Default is None.
+        :type tracker: TopKTracker
+        """
+        self.counts = {}
+        self.total_words = 0
+        self.tracker = tracker
+        self._pending_word = ''
+
+    @classmethod
+    def from_counts(cls, counts: dict):
+        """
+        Creates a counter from an existing frequency table.
+
+        :param counts: A dictionary where keys are words and values are their counts.
+        :type counts: dict
+        :return(WordCounter): The created counter.
+        """
+        word_counter = cls()
+        word_counter.counts = counts
+        word_counter.total_words = sum(counts.values())
+        return word_counter
+
+    def update(self, text: str):
+        """
+        Counts all whitespace separated words of the given text.
+
+        :param text: Cleaned text to count.
+        :type text: str
+        :return(WordCounter): The counter instance, to allow chaining.
+        """
+        return self.update_tokens(text.lower().split())
+
+    def feed(self, text_chunk: str):
+        """
+        Counts words of a text delivered in chunks. A word cut at the end of the chunk is
+        kept until the next chunk or flush().
+
+        :param text_chunk: The next part of the cleaned text.
+        :type text_chunk: str
+        :return(WordCounter): The counter instance, to allow chaining.
+        """
+        text = self._pending_word + text_chunk
+        if not text or text[-1].isspace():
+            self._pending_word = ''
+        else:
+            parts = text.rsplit(None, 1)
+            self._pending_word = parts[-1]
+            text = parts[0] if len(parts) == 2 else ''
+        return self.update(text)
+
+    def flush(self):
+        """
+        Counts the word kept by feed() after the last chunk.
+
+        :return(WordCounter): The counter instance, to allow chaining.
+        """
+        text, self._pending_word = self._pending_word, ''
+        return self.update(text)
+
+    def update_tokens(self, tokens):
+        """
+        Counts already tokenized words. Tokens are expected to be lowercased.
+
+        :param tokens: An iterable of words.
+        :type tokens: Iterable[str]
+        :return(WordCounter): The counter instance, to allow chaining.
+        """
+        if self.tracker is not None:
+            return self.merge(WordCounter().update_tokens(tokens))
+        counts = self.counts
+        get_count = counts.get
+        tokens_count = 0
+        for token in tokens:
+            counts[token] = get_count(token, 0) + 1
+            tokens_count += 1
+        self.total_words += tokens_count
+        return self
+
+    def merge(self, other: "WordCounter"):
+        """
+        Adds counts of another counter to this one.
+
+        :param other: Counter to merge into this one.
+        :type other: WordCounter
+        :return(WordCounter): The counter instance, to allow chaining.
+        """
+        counts = self.counts
+        get_count = counts.get
+        for word, count in other.counts.items():
+            counts[word] = get_count(word, 0) + count
+        if self.tracker is not None:
+            observe = self.tracker.observe
+            for word in other.counts:
+                observe(word, counts[word])
+        self.total_words += other.total_words
+        return self
+
+    def unique_words(self):
+        """
+        Retrieves a set of counted words.
+
+        :return(set): A set of unique words.
+        """
+        return set(self.counts)
+
+    def as_dict(self):
+        """
+        Retrieves a copy of the frequency table.
+
+        :return(dict): A dictionary where keys are words and values are their counts.
+        """
+        return dict(self.counts)
+
+    def most_common(self, top_count: int = 10):
+        """
+        Retrieves words with the highest counts.
+
+        :param top_count: The number of top words to retrieve, -1 means all words. Default is 10.
+        :type top_count: int
+        :return(list): A list of (word, count) tuples in descending count order, ties sorted alphabetically.
+        """
+        return select_top_words(self.counts, top_count)